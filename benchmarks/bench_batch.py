@@ -0,0 +1,75 @@
+"""Сценарий SQL: построчное выполнение, как при вводе в интерактивный режим, против пакетного режима.
+
+Сценарий содержит вставки по одной строке, изменения и выборки. Построчный
+режим выполняет каждую команду отдельно, пакетный - run_script с
+группировкой изменений одной таблицы.
+
+Запуск: poetry run python benchmarks/bench_batch.py [--statements N]
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+from typing import List
+
+from primitive_db import utils
+from primitive_db.batch import run_script
+from primitive_db.engine import execute_command
+
+
+def build_script(table: str, statements: int) -> List[str]:
+    """Строит сценарий: в основном INSERT, каждая 50-я команда - UPDATE или SELECT."""
+    lines = [f"CREATE TABLE {table} (name str, age int)"]
+    for i in range(statements):
+        if i % 100 == 50:
+            lines.append(f"UPDATE {table} SET age = 1 WHERE ID = {i // 2}")
+        elif i % 100 == 99:
+            lines.append(f"SELECT COUNT(*) FROM {table} WHERE age > 40")
+        else:
+            lines.append(f'INSERT INTO {table} VALUES ("user{i}", {i % 90})')
+    return lines
+
+
+def run_line_by_line(lines: List[str]) -> float:
+    """Выполняет команды по одной и возвращает время в секундах."""
+    start = time.perf_counter()
+    for line in lines:
+        result = execute_command(line)
+        if not isinstance(result, str):
+            list(result)
+    return time.perf_counter() - start
+
+
+def run_batch(lines: List[str]) -> float:
+    """Выполняет сценарий в пакетном режиме и возвращает время в секундах."""
+    start = time.perf_counter()
+    errors = run_script("\n".join(lines), quiet=True, out=io.StringIO())
+    assert errors == 0, errors
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--statements", type=int, default=2000)
+    arg_parser.add_argument("--fsync", default="always", choices=["always", "interval", "never"])
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        utils.set_wal_fsync_policy(args.fsync)
+        line_by_line = run_line_by_line(build_script("lines", args.statements))
+        # Как при выходе из интерактивного режима: контрольная точка очищает журнал
+        utils.close_database()
+        batch = run_batch(build_script("batch", args.statements))
+        assert utils.load_table_data("lines") == utils.load_table_data("batch")
+        utils.close_database()
+
+    print(f"Команд: {args.statements}, fsync={args.fsync}")
+    print(f"{'режим':16} {'всего, мс':>10} {'команд/с':>10}")
+    for name, elapsed in [("построчно", line_by_line), ("пакетный", batch)]:
+        print(f"{name:16} {elapsed * 1000:10.1f} {args.statements / elapsed:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Память на строку и скорость фильтров: строки-словари против столбцового представления.
+
+Запуск: poetry run python benchmarks/bench_columnar.py [--rows N]
+"""
+import argparse
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from primitive_db import columnar
+from primitive_db.columnar import ColumnarTable
+from primitive_db.parser import parse_where_condition
+from primitive_db.predicates import compile_condition
+
+COLUMN_TYPES = {"ID": "int", "name": "str", "age": "int", "is_active": "bool"}
+
+
+def make_rows(count: int) -> List[Dict[str, Any]]:
+    """Генерирует синтетические строки таблицы."""
+    return [
+        {"ID": i, "name": f"user{i}", "age": i % 90, "is_active": i % 2 == 0}
+        for i in range(1, count + 1)
+    ]
+
+
+def dict_rows_bytes(rows: List[Dict[str, Any]]) -> int:
+    """Оценивает объем строк-словарей (без общих разделяемых объектов)."""
+    total = sys.getsizeof(rows)
+    for row in rows:
+        total += sys.getsizeof(row)
+        total += sys.getsizeof(row["name"]) + sys.getsizeof(row["ID"])
+    return total
+
+
+def best_ms(func: Callable[[], Any]) -> float:
+    """Возвращает лучшее из трех время выполнения в миллисекундах."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--rows", type=int, default=500_000)
+    args = arg_parser.parse_args()
+
+    rows = make_rows(args.rows)
+    table = ColumnarTable.from_rows(COLUMN_TYPES, rows)
+
+    print(f"Строк: {args.rows}, NumPy: {'да' if columnar.numpy is not None else 'нет'}")
+    print(f"Память на строку: словари {dict_rows_bytes(rows) / len(rows):.0f} Б, "
+          f"столбцы {table.nbytes() / len(rows):.0f} Б")
+    print(f"{'условие':40} {'строки, мс':>12} {'столбцы, мс':>12}")
+
+    for where in [
+        "age > 80",
+        "age BETWEEN 10 AND 20 AND is_active = true",
+        "name = user777",
+        "NOT age IN (1, 2, 3)",
+    ]:
+        condition = parse_where_condition(where)
+        predicate = compile_condition(condition)
+        row_ms = best_ms(lambda p=predicate: [row for row in rows if p(row)])
+        column_ms = best_ms(lambda c=condition: table.filter_positions(c))
+        print(f"{where:40} {row_ms:12.1f} {column_ms:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
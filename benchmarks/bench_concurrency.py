@@ -0,0 +1,120 @@
+"""Нагрузочный тест: несколько процессов пишут и читают одну базу одновременно.
+
+Писатели вставляют строки по одной и транзакциями, читатели выполняют
+SELECT COUNT(*). В конце проверяется, что ни одна вставка не потеряна:
+все ID уникальны и идут подряд, счетчики в метаданных совпадают с данными.
+
+Запуск: poetry run python benchmarks/bench_concurrency.py [--writers N] [--readers M]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Tuple
+
+from primitive_db import utils
+from primitive_db.core import aggregate_from
+from primitive_db.engine import execute_command
+
+
+def writer(workdir: str, worker_id: int, inserts: int, batch: int) -> int:
+    """Вставляет строки: половину по одной, половину транзакциями по batch строк."""
+    os.chdir(workdir)
+    single = inserts // 2
+    for i in range(single):
+        result = execute_command(f'INSERT INTO t VALUES ("w{worker_id}", {i})')
+        assert "успешно" in result, result
+    done = single
+    while done < inserts:
+        count = min(batch, inserts - done)
+        execute_command("BEGIN")
+        for i in range(done, done + count):
+            execute_command(f'INSERT INTO t VALUES ("w{worker_id}", {i})')
+        result = execute_command("COMMIT")
+        assert "зафиксирована" in result, result
+        done += count
+    utils.close_database()
+    return inserts
+
+
+def reader(workdir: str, duration: float) -> Tuple[int, int]:
+    """Считает строки сканированием таблицы, пока идет запись.
+
+    Число строк не должно убывать, а каждый прочитанный набор должен быть
+    целым: транзакции писателей добавляют строки пачками по batch.
+    """
+    os.chdir(workdir)
+    reads = 0
+    last_count = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        result = aggregate_from(
+            "t", [("COUNT", "*")], {"column": "seq", "operator": ">=", "value": 0},
+            output_mode="jsonl",
+        )
+        count = int(next(iter(result)).split(":")[1].strip(" }"))
+        assert count >= last_count, f"count went back: {last_count} -> {count}"
+        last_count = count
+        reads += 1
+    return reads, last_count
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--writers", type=int, default=4)
+    arg_parser.add_argument("--readers", type=int, default=2)
+    arg_parser.add_argument("--inserts", type=int, default=300, help="вставок на писателя")
+    arg_parser.add_argument("--batch", type=int, default=25, help="строк в транзакции")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        execute_command("CREATE TABLE t (worker str, seq int)")
+        utils.close_database()
+
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(args.writers + args.readers) as pool:
+            start = time.perf_counter()
+            writers = [
+                pool.apply_async(writer, (workdir, worker_id, args.inserts, args.batch))
+                for worker_id in range(args.writers)
+            ]
+            readers = [
+                pool.apply_async(reader, (workdir, 2.0)) for _ in range(args.readers)
+            ]
+            written = sum(result.get() for result in writers)
+            elapsed = time.perf_counter() - start
+            reads = [result.get() for result in readers]
+
+        utils.recover_database()
+        rows = utils.load_table_data("t")
+        table_meta = utils.load_metadata()["tables"]["t"]
+        ids = sorted(row["ID"] for row in rows)
+        per_worker = {}
+        for row in rows:
+            per_worker.setdefault(row["worker"], set()).add(row["seq"])
+
+        print(f"Писателей: {args.writers}, читателей: {args.readers}, вставок: {written}")
+        print(f"Запись: {written / elapsed:.0f} вставок/с за {elapsed:.2f} с")
+        print(f"Чтение: {sum(count for count, _ in reads) / 2.0:.0f} COUNT(*)/с")
+
+        expected_ids = list(range(1, written + 1))
+        checks = {
+            "все строки на месте": len(rows) == written,
+            "ID уникальны и идут подряд": ids == expected_ids,
+            "row_count совпадает": table_meta["row_count"] == written,
+            "next_id совпадает": table_meta["next_id"] == written + 1,
+            "у каждого писателя все строки": all(
+                per_worker.get(f"w{worker_id}") == set(range(args.inserts))
+                for worker_id in range(args.writers)
+            ),
+        }
+        for name, passed in checks.items():
+            print(f"{name:32} {'OK' if passed else 'ОШИБКА'}")
+        if not all(checks.values()):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
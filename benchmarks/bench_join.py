@@ -0,0 +1,121 @@
+"""Соединение таблиц: хеш-соединение и вложенные циклы по индексу.
+
+Таблица заказов (--rows строк) соединяется с таблицей пользователей
+(--users строк) по столбцу без индекса: хеш-таблица строится по меньшей
+таблице, порядок таблиц в команде на время не влияет. Для сравнения то
+же соединение выполняется с хеш-таблицей по большей таблице. Затем по
+столбцу заказов строится индекс, и без статистики те же команды
+выполняются вложенными циклами по индексу: выигрыш заметен, когда
+условие на пользователей оставляет мало строк, а для всех строк индекс
+медленнее хеш-таблицы. После ANALYZE планировщик выбирает индекс, только
+если ожидаемых пар немного. Время включает вывод строк в режиме jsonl.
+
+Запуск: poetry run python benchmarks/bench_join.py [--rows N] [--users N] [--repeat N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from primitive_db import core, utils
+from primitive_db.joins import hash_join, plan_join, row_combiner
+from primitive_db.parser import parse_statement
+
+QUERIES = (
+    ("все строки", "SELECT FROM orders JOIN users ON orders.user_id = users.uid"),
+    ("таблицы наоборот", "SELECT FROM users JOIN orders ON users.uid = orders.user_id"),
+    ("один пользователь", "SELECT FROM orders JOIN users ON orders.user_id = users.uid "
+                          "WHERE users.name = 'user7'"),
+    ("1% пользователей", "SELECT FROM orders JOIN users ON orders.user_id = users.uid "
+                         "WHERE users.uid < {users_1pct}"),
+)
+
+
+def run_join(statement) -> int:
+    """Выполняет соединение, возвращает число строк результата."""
+    result = core.join_tables(
+        statement.left, statement.right, statement.kind, statement.on, statement.where,
+        output_mode="jsonl",
+    )
+    if isinstance(result, str):
+        return 0
+    return sum(chunk.count("\n") + 1 for chunk in result)
+
+
+def best_time(repeat: int, function, *args) -> tuple:
+    """Возвращает (результат, лучшее время в с) из repeat вызовов function(*args)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def join_method(statement) -> str:
+    """Возвращает способ соединения, который выберет планировщик."""
+    left, right, _ = core.join_sides(
+        statement.left, statement.right, statement.kind, statement.on, statement.where, None
+    )
+    return plan_join(statement.kind, left, right)[0]
+
+
+def forced_hash_join(statement, build_larger: bool) -> int:
+    """Хеш-соединение с хеш-таблицей по меньшей или по большей таблице."""
+    left, right, _ = core.join_sides(
+        statement.left, statement.right, statement.kind, statement.on, {}, None
+    )
+    _, outer, inner = plan_join("INNER", left, right)
+    if build_larger:
+        outer, inner = inner, outer
+    combine = row_combiner(left, right, outer is left)
+    rows = hash_join(
+        core.iter_matching_rows(outer.table, outer.meta),
+        core.iter_matching_rows(inner.table, inner.meta),
+        outer.column, inner.column, combine,
+    )
+    return sum(1 for _ in rows)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--rows", type=int, default=200_000)
+    arg_parser.add_argument("--users", type=int, default=10_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        utils.set_wal_fsync_policy("never")
+        core.create_table("users", {"uid": "int", "name": "str"})
+        core.insert_many("users", [[uid, f"user{uid}"] for uid in range(args.users)])
+        core.create_table("orders", {"user_id": "int", "amount": "int"})
+        core.insert_many("orders", [
+            [row_id * 7919 % args.users, row_id % 1000] for row_id in range(args.rows)
+        ])
+        statements = [
+            (label, parse_statement(text.format(users_1pct=args.users // 100)))
+            for label, text in QUERIES
+        ]
+
+        print(f"Заказов: {args.rows}, пользователей: {args.users}")
+        print(f"{'команда':44} {'строк':>8} {'время, мс':>10} {'способ':>7}")
+        for build_larger, label in ((False, "по меньшей"), (True, "по большей")):
+            count, elapsed = best_time(args.repeat, forced_hash_join, statements[0][1], build_larger)
+            print(f"{'хеш-таблица ' + label + ' (без вывода)':44} {count:8} "
+                  f"{elapsed * 1000:10.1f} {'hash':>7}")
+
+        for setup in ("без индекса", "индекс", "индекс и ANALYZE"):
+            if setup == "индекс":
+                core.create_index("orders", "user_id", "hash")
+            elif setup == "индекс и ANALYZE":
+                core.analyze_tables()
+            for label, statement in statements:
+                count, elapsed = best_time(args.repeat, run_join, statement)
+                print(f"{setup + ', ' + label:44} {count:8} {elapsed * 1000:10.1f} "
+                      f"{join_method(statement):>7}")
+        utils.close_database()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Двоичная таблица через mmap: открытие, поиск по ID, перебор и память.
+
+Таблица записывается в двоичном формате и читается двумя способами:
+полной загрузкой в словарь (как до отображения файла в память) и через
+MappedTable, которая при открытии читает только каталог страниц и
+декодирует строки по требованию. Память - пик выделений Python
+(tracemalloc) при открытии и поиске; страницы файла в нее не входят,
+их держит и вытесняет кеш страниц ОС.
+
+Запуск: poetry run python benchmarks/bench_mmap.py [--rows N]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from primitive_db.mapped import MappedTable
+from primitive_db.storage import BinaryStorage
+
+
+def make_row(row_id: int) -> dict:
+    """Генерирует синтетическую строку таблицы."""
+    return {
+        "ID": row_id,
+        "name": f"user{row_id}",
+        "email": f"user{row_id}@example.com",
+        "age": row_id % 90,
+        "score": row_id * 37 % 100_000,
+        "is_active": row_id % 3 != 0,
+    }
+
+
+def timed(function, *args) -> tuple:
+    """Выполняет функцию, возвращает (результат, время в с)."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def peak_memory(function, *args) -> int:
+    """Возвращает пик памяти Python в байтах при выполнении функции.
+
+    Измерение отдельное: tracemalloc заметно замедляет выделения.
+    """
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def open_and_lookup(open_rows, source, ids) -> None:
+    """Открывает таблицу и читает строки по ID."""
+    lookup_all(open_rows(source), ids)
+
+
+def lookup_all(rows, ids) -> int:
+    """Читает строки по списку ID, возвращает число найденных."""
+    return sum(1 for row_id in ids if rows.get(row_id) is not None)
+
+
+def scan_all(rows) -> int:
+    """Перебирает все строки, возвращает их число."""
+    return sum(1 for _ in rows.values())
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--rows", type=int, default=500_000)
+    arg_parser.add_argument("--lookups", type=int, default=1000)
+    args = arg_parser.parse_args()
+
+    storage = BinaryStorage()
+    ids = random.Random(1).sample(range(1, args.rows + 1), args.lookups)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        os.makedirs("data")
+        storage.rewrite("bench", [make_row(i) for i in range(1, args.rows + 1)])
+        path = storage.file_path("bench")
+        print(f"Строк: {args.rows}, файл: {os.path.getsize(path) / 1024 / 1024:.1f} МБ")
+        print(
+            f"{'способ':10} {'открытие, мс':>13} {'память, МБ':>11} "
+            f"{'поиск по ID, мкс':>17} {'перебор, мс':>12}"
+        )
+
+        for name, open_rows in (
+            ("словарь", storage.load_row_map),
+            ("mmap", MappedTable),
+        ):
+            source = "bench" if name == "словарь" else path
+            rows, open_time = timed(open_rows, source)
+            found, lookup_time = timed(lookup_all, rows, ids)
+            assert found == len(ids)
+            count, scan_time = timed(scan_all, rows)
+            assert count == args.rows
+            del rows
+            peak = peak_memory(open_and_lookup, open_rows, source, ids)
+            print(
+                f"{name:10} {open_time * 1000:13.1f} {peak / 1024 / 1024:11.1f} "
+                f"{lookup_time / len(ids) * 1e6:17.1f} {scan_time * 1000:12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""ORDER BY: отбор первых записей кучей и внешняя сортировка слиянием.
+
+Строки синтетической таблицы упорядочиваются по неиндексированному
+столбцу. С LIMIT k первые k строк отбираются кучей (sorting.sort_rows)
+и сравниваются с полной сортировкой и срезом. Без LIMIT вся выборка
+сортируется в памяти без ограничения бюджета и с малым бюджетом, при
+котором отсортированные части сбрасываются во временные файлы и
+сливаются.
+Чтение таблицы входит во все замеры одинаково.
+
+Запуск: poetry run python benchmarks/bench_order.py [--rows N] [--budget-mb N] [--repeat N]
+"""
+import argparse
+import os
+import tempfile
+import time
+from itertools import islice
+
+from primitive_db import core, utils
+from primitive_db.sorting import set_sort_memory, sort_key, sort_rows
+
+ORDER_BY = [("score", True), ("ID", False)]
+LIMITS = (10, 1000)
+
+
+def make_values(row_id: int, rows: int) -> list:
+    """Генерирует значения синтетической строки (без ID)."""
+    return [f"user{row_id}", row_id % 90, row_id * 7919 % rows]
+
+
+def best_time(repeat: int, function, *args) -> tuple:
+    """Возвращает (число строк, лучшее время в с) из repeat вызовов function(*args)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = sum(1 for _ in function(*args))
+        best = min(best, time.perf_counter() - start)
+    return count, best
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--rows", type=int, default=200_000)
+    arg_parser.add_argument("--budget-mb", type=float, default=4,
+                            help="бюджет памяти для замера внешней сортировки")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        utils.set_wal_fsync_policy("never")
+        core.create_table("t", {"name": "str", "age": "int", "score": "int"})
+        core.insert_many("t", [make_values(row_id, args.rows) for row_id in range(1, args.rows + 1)])
+        table_meta = utils.load_metadata()["tables"]["t"]
+        key = sort_key(ORDER_BY, table_meta["columns"])
+
+        def scan():
+            return core.iter_matching_rows("t", table_meta)
+
+        def sort_and_slice(limit: int) -> list:
+            return sorted(scan(), key=key)[:limit]
+
+        def sorted_rows(limit=None):
+            return sort_rows(scan(), key, limit)
+
+        print(f"Строк: {args.rows}, ORDER BY score DESC, ID")
+        print(f"{'способ':34} {'строк':>8} {'время, мс':>10}")
+        for limit in LIMITS:
+            count, full = best_time(args.repeat, sort_and_slice, limit)
+            print(f"{f'полная сортировка, LIMIT {limit}':34} {count:8} {full * 1000:10.1f}")
+            count, heap = best_time(args.repeat, sorted_rows, limit)
+            print(f"{f'куча, LIMIT {limit}':34} {count:8} {heap * 1000:10.1f}")
+
+        set_sort_memory(2 ** 40)
+        count, in_memory = best_time(args.repeat, sorted_rows)
+        print(f"{'в памяти, без LIMIT':34} {count:8} {in_memory * 1000:10.1f}")
+        set_sort_memory(int(args.budget_mb * 1024 * 1024))
+        count, external = best_time(args.repeat, sorted_rows)
+        print(f"{f'слиянием, бюджет {args.budget_mb:g} МБ':34} {count:8} {external * 1000:10.1f}")
+        _, first = best_time(args.repeat, lambda: islice(sorted_rows(), 1))
+        print(f"{'слиянием, до первой строки':34} {1:8} {first * 1000:10.1f}")
+        set_sort_memory()
+        utils.close_database()
+
+
+if __name__ == "__main__":
+    main()
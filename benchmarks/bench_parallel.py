@@ -0,0 +1,91 @@
+"""Параллельное сканирование большой таблицы: время от числа процессов.
+
+Двоичная таблица фильтруется по условию без подходящего индекса сначала
+в одном процессе, затем в 2..N процессах (parallel.py). Каждый процесс
+сам отображает файл и проверяет условие на своих страницах, основной
+процесс склеивает результаты в порядке страниц. Узкое условие показывает
+чистое ускорение разбора страниц, широкое - цену передачи найденных строк
+между процессами. Запуск процессов в замер не входит.
+
+Запуск: poetry run python benchmarks/bench_parallel.py [--rows N] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from primitive_db.mapped import MappedTable
+from primitive_db.parallel import parallel_scan, set_parallel_scans
+from primitive_db.parser import parse_where_condition
+from primitive_db.predicates import compile_condition
+from primitive_db.storage import BinaryStorage
+
+CONDITIONS = (
+    ("узкое", "age = 5 AND is_active = true"),
+    ("широкое", "score < 50000"),
+)
+
+
+def make_row(row_id: int) -> dict:
+    """Генерирует синтетическую строку таблицы."""
+    return {
+        "ID": row_id,
+        "name": f"user{row_id}",
+        "email": f"user{row_id}@example.com",
+        "age": row_id % 90,
+        "score": row_id * 37 % 100_000,
+        "is_active": row_id % 3 != 0,
+    }
+
+
+def scan(table: MappedTable, condition: dict) -> int:
+    """Фильтрует таблицу, возвращает число найденных строк."""
+    rows = parallel_scan(table, condition)
+    if rows is None:
+        rows = filter(compile_condition(condition), table.values())
+    return sum(1 for _ in rows)
+
+
+def best_time(table: MappedTable, condition: dict, repeat: int) -> tuple:
+    """Возвращает (число строк, лучшее время в с) из repeat сканирований."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = scan(table, condition)
+        best = min(best, time.perf_counter() - start)
+    return count, best
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--rows", type=int, default=2_000_000)
+    arg_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        os.makedirs("data")
+        storage = BinaryStorage()
+        storage.rewrite("bench", [make_row(i) for i in range(1, args.rows + 1)])
+        table = MappedTable(storage.file_path("bench"))
+        print(f"Строк: {args.rows}, ядер: {os.cpu_count()}")
+        print(f"{'условие':8} {'процессов':>10} {'найдено':>9} {'время, мс':>10} {'ускорение':>10}")
+
+        for label, text in CONDITIONS:
+            condition = parse_where_condition(text)
+            serial_time = None
+            for workers in args.workers:
+                set_parallel_scans(workers, 0)
+                # Первое сканирование запускает процессы
+                scan(table, condition)
+                count, elapsed = best_time(table, condition, args.repeat)
+                serial_time = serial_time or elapsed
+                print(
+                    f"{label:8} {workers:10} {count:9} {elapsed * 1000:10.1f} "
+                    f"{serial_time / elapsed:10.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Разбор длинных команд: время растет линейно с числом строк VALUES и условий WHERE.
+
+Для каждой команды печатается время разбора целиком и в пересчете на одну
+строку или одно условие; при линейном разборе второе число не растет
+с длиной команды. Для сравнения приведено время shlex.split того же
+текста - с него начинался прежний разбор команд.
+
+Запуск: poetry run python benchmarks/bench_parser.py [--sizes 100 1000 10000]
+"""
+import argparse
+import shlex
+import time
+from typing import Callable, List
+
+from primitive_db.parser import parse_statement
+
+
+def best_time(function: Callable[[str], object], command: str, repeat: int) -> float:
+    """Возвращает лучшее время обработки команды функцией в секундах."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(command)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def build_commands(size: int) -> List[tuple]:
+    """Строит команды из size строк или условий: (название, текст)."""
+    rows = ", ".join(f'("user {i}", {i}, true)' for i in range(size))
+    values = ", ".join(str(i) for i in range(size))
+    terms = " OR ".join(f'(age = {i} AND name != "user {i}")' for i in range(size))
+    return [
+        ("INSERT VALUES", f"INSERT INTO users VALUES {rows}"),
+        ("WHERE IN", f"SELECT FROM users WHERE age IN ({values})"),
+        ("WHERE OR", f"SELECT FROM users WHERE {terms} LIMIT 10"),
+    ]
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    print(
+        f"{'команда':14} {'размер':>7} {'разбор, мс':>11} {'мкс/элемент':>12} "
+        f"{'shlex, мс':>10}"
+    )
+    for size in args.sizes:
+        for name, command in build_commands(size):
+            assert parse_statement(command) is not None
+            parse_time = best_time(parse_statement, command, args.repeat)
+            shlex_time = best_time(shlex.split, command, args.repeat)
+            print(
+                f"{name:14} {size:7} {parse_time * 1000:11.2f} "
+                f"{parse_time / size * 1e6:12.2f} {shlex_time * 1000:10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
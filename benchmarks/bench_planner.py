@@ -0,0 +1,82 @@
+"""Выбор способа поиска строк по статистике: время со статистикой и без нее.
+
+Строится таблица с упорядоченным индексом по score, и условия разной
+ширины выполняются дважды: по метаданным без статистики (подходящий
+индекс используется всегда) и со статистикой, по которой планировщик
+выбирает между индексом и перебором. Последнее условие - диапазон за
+границами значений неиндексированного столбца: со статистикой оно дает
+пустой результат без чтения данных. Перебор по столбцам (SELECT) и по
+строкам (UPDATE, DELETE) измеряется отдельно: у них разные пороги.
+
+Запуск: poetry run python benchmarks/bench_planner.py [--rows N] [--repeat N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from primitive_db import core, utils
+from primitive_db.parser import parse_where_condition
+from primitive_db.planner import plan_scan
+
+# Условия по числу строк таблицы: от 0.1% строк до пустого результата
+CONDITIONS = (
+    lambda rows: f"score < {rows // 1000}",
+    lambda rows: f"score < {rows // 100}",
+    lambda rows: f"score < {rows // 10}",
+    lambda rows: f"score BETWEEN {rows // 5} AND {rows * 7 // 10}",
+    lambda rows: "age > 100",
+)
+
+
+def make_values(row_id: int, rows: int) -> list:
+    """Генерирует значения синтетической строки (без ID)."""
+    return [f"user{row_id}", row_id % 90, row_id * 7919 % rows]
+
+
+def best_time(table_meta: dict, condition: dict, columnar: bool, repeat: int) -> tuple:
+    """Возвращает (число строк, лучшее время в с) из repeat переборов."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = sum(1 for _ in core.iter_matching_rows("t", table_meta, condition, columnar))
+        best = min(best, time.perf_counter() - start)
+    return count, best
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        utils.set_wal_fsync_policy("never")
+        core.create_table("t", {"name": "str", "age": "int", "score": "int"})
+        values = [make_values(row_id, args.rows) for row_id in range(1, args.rows + 1)]
+        core.insert_many("t", values)
+        core.create_index("t", "score", "sorted")
+        core.analyze_tables("t")
+
+        with_stats = utils.load_metadata()["tables"]["t"]
+        without_stats = {key: value for key, value in with_stats.items() if key != "stats"}
+        rows = utils.load_table_rows_by_id("t")
+
+        print(f"Строк: {args.rows}")
+        print(f"{'перебор':8} {'условие':32} {'найдено':>8} {'без стат., мс':>14} "
+              f"{'со стат., мс':>13} {'способ':>9}")
+        for columnar, label in ((True, "столбцы"), (False, "строки")):
+            for make_condition in CONDITIONS:
+                text = make_condition(args.rows)
+                condition = parse_where_condition(text)
+                count, plain = best_time(without_stats, condition, columnar, args.repeat)
+                _, planned = best_time(with_stats, condition, columnar, args.repeat)
+                strategy = plan_scan(with_stats, condition, rows, columnar)
+                print(f"{label:8} {text:32} {count:8} {plain * 1000:14.2f} "
+                      f"{planned * 1000:13.2f} {strategy:>9}")
+        utils.close_database()
+
+
+if __name__ == "__main__":
+    main()
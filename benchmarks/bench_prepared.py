@@ -0,0 +1,84 @@
+"""Повторяющиеся команды: разбор каждый раз, кеш разобранных команд и PREPARE/EXECUTE.
+
+Выполняются точечные SELECT по индексу и INSERT одной строки. В режиме
+"разбор" кеш планов очищается перед каждой командой, в режиме "кеш" один и
+тот же текст повторяется, в режиме "EXECUTE" команда подготовлена заранее,
+а значения каждый раз разные.
+
+Запуск: poetry run python benchmarks/bench_prepared.py [--statements N]
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable, List
+
+from primitive_db import utils
+from primitive_db.engine import execute_command, plan_command
+from primitive_db.plans import statement_cache
+
+
+def run(commands: List[str], before: Callable[[], None] = lambda: None) -> float:
+    """Выполняет команды и возвращает время в секундах."""
+    start = time.perf_counter()
+    for command in commands:
+        before()
+        result = execute_command(command)
+        if not isinstance(result, str):
+            list(result)
+    return time.perf_counter() - start
+
+
+def parse_only(commands: List[str], before: Callable[[], None]) -> float:
+    """Только строит планы команд и возвращает время в секундах."""
+    start = time.perf_counter()
+    for command in commands:
+        before()
+        plan_command(command)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--statements", type=int, default=5000)
+    arg_parser.add_argument("--rows", type=int, default=10000)
+    args = arg_parser.parse_args()
+    n = args.statements
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        utils.set_wal_fsync_policy("never")
+        execute_command("CREATE TABLE t (name str, value int, active bool)")
+        execute_command("CREATE INDEX ON t(value)")
+        values = ", ".join(f'("n{i}", {i}, true)' for i in range(args.rows))
+        execute_command(f"INSERT INTO t VALUES {values}")
+        execute_command("OUTPUT jsonl")
+        execute_command("PREPARE sel AS SELECT FROM t WHERE value = ? AND active = true")
+        execute_command("PREPARE ins AS INSERT INTO t VALUES (?, ?, false)")
+
+        select = 'SELECT FROM t WHERE value = 42 AND active = true'
+        insert = 'INSERT INTO t VALUES ("x", 1, false)'
+        workloads = [
+            ("SELECT", [select] * n, [f"EXECUTE sel ({i % args.rows})" for i in range(n)]),
+            ("INSERT", [insert] * n, [f'EXECUTE ins ("x{i}", {i})' for i in range(n)]),
+        ]
+
+        print(f"Команд каждого вида: {n}")
+        print(f"{'команда':8} {'режим':10} {'разбор, мкс':>12} {'всего, мкс':>11}")
+        for name, repeated, executes in workloads:
+            results = [
+                ("разбор", parse_only(repeated, statement_cache.clear),
+                 run(repeated, statement_cache.clear)),
+                ("кеш", parse_only(repeated, lambda: None), run(repeated)),
+                ("EXECUTE", parse_only(executes, lambda: None), run(executes)),
+            ]
+            for mode, parse_time, total_time in results:
+                print(
+                    f"{name:8} {mode:10} {parse_time / n * 1e6:12.1f} "
+                    f"{total_time / n * 1e6:11.1f}"
+                )
+        utils.close_database()
+
+
+if __name__ == "__main__":
+    main()
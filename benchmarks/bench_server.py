@@ -0,0 +1,156 @@
+"""Нагрузочный тест сервера: пропускная способность и задержки под смешанной нагрузкой.
+
+Сервер запускается отдельным процессом во временной директории, таблица
+заполняется строками, затем несколько клиентов в потоках в течение
+заданного времени выполняют SELECT по индексу, SELECT с полным
+сканированием и INSERT. Печатается число запросов в секунду и процентили
+задержки по типам запросов.
+
+Запуск: poetry run python benchmarks/bench_server.py [--clients N] [--duration S]
+"""
+import argparse
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+import primitive_db
+from primitive_db.client import DatabaseClient
+
+KINDS = ("select_index", "select_scan", "insert")
+
+
+def start_server(workdir: str, port: int, workers: int) -> "subprocess.Popen[bytes]":
+    """Запускает сервер в директории workdir и ждет, пока он начнет принимать соединения."""
+    env = dict(os.environ)
+    # Сервер работает в другой директории, поэтому путь к пакету передаем явно
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(primitive_db.__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [package_root, env.get("PYTHONPATH")])
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "primitive_db.main", "serve",
+         "--port", str(port), "--workers", str(workers)],
+        cwd=workdir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10.0
+    while True:
+        try:
+            DatabaseClient(port=port).close()
+            return server
+        except OSError:
+            if server.poll() is not None or time.monotonic() > deadline:
+                server.kill()
+                raise SystemExit(f"Сервер не запустился на порту {port}") from None
+            time.sleep(0.05)
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Возвращает процентиль отсортированной выборки."""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def client_loop(
+    port: int,
+    rows: int,
+    write_share: float,
+    deadline: float,
+    latencies: Dict[str, List[float]],
+    seed: int,
+) -> None:
+    """Выполняет запросы до истечения времени, собирая задержки по типам."""
+    rng = random.Random(seed)
+    with DatabaseClient(port=port) as client:
+        while time.monotonic() < deadline:
+            draw = rng.random()
+            if draw < write_share:
+                kind = "insert"
+                command = f'INSERT INTO t VALUES ("c{seed}", {rng.randrange(rows)})'
+            elif draw < write_share + (1 - write_share) * 0.9:
+                kind = "select_index"
+                command = f"SELECT FROM t WHERE value = {rng.randrange(rows)}"
+            else:
+                kind = "select_scan"
+                command = f'SELECT FROM t WHERE name = "n{rng.randrange(rows)}"'
+            start = time.perf_counter()
+            client.execute(command)
+            latencies[kind].append(time.perf_counter() - start)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--clients", type=int, default=8)
+    arg_parser.add_argument("--duration", type=float, default=5.0, help="секунд нагрузки")
+    arg_parser.add_argument("--rows", type=int, default=20000, help="строк в таблице")
+    arg_parser.add_argument("--writes", type=float, default=0.1, help="доля INSERT")
+    arg_parser.add_argument("--port", type=int, default=7533)
+    arg_parser.add_argument("--workers", type=int, default=8)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        server = start_server(workdir, args.port, args.workers)
+        try:
+            with DatabaseClient(port=args.port) as client:
+                client.execute("CREATE TABLE t (name str, value int)")
+                client.execute("CREATE INDEX ON t(value)")
+                batch = 1000
+                for start in range(0, args.rows, batch):
+                    values = ", ".join(
+                        f'("n{i}", {i})' for i in range(start, min(start + batch, args.rows))
+                    )
+                    client.execute(f"INSERT INTO t VALUES {values}")
+
+            latencies: Dict[str, List[float]] = {kind: [] for kind in KINDS}
+            per_client = [{kind: [] for kind in KINDS} for _ in range(args.clients)]
+            deadline = time.monotonic() + args.duration
+            threads = [
+                threading.Thread(
+                    target=client_loop,
+                    args=(args.port, args.rows, args.writes, deadline, per_client[i], i),
+                )
+                for i in range(args.clients)
+            ]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+
+    for samples in per_client:
+        for kind in KINDS:
+            latencies[kind].extend(samples[kind])
+    total = sum(len(samples) for samples in latencies.values())
+
+    print(f"Клиентов: {args.clients}, строк: {args.rows}, доля INSERT: {args.writes:.0%}")
+    print(f"Всего: {total} запросов за {elapsed:.2f} с, {total / elapsed:.0f} запросов/с")
+    print(f"{'запрос':14} {'число':>8} {'p50, мс':>9} {'p99, мс':>9}")
+    everything: List[float] = []
+    for kind in KINDS:
+        samples = sorted(latencies[kind])
+        everything.extend(samples)
+        print(
+            f"{kind:14} {len(samples):8} {percentile(samples, 0.5) * 1000:9.2f} "
+            f"{percentile(samples, 0.99) * 1000:9.2f}"
+        )
+    everything.sort()
+    print(
+        f"{'все':14} {len(everything):8} {percentile(everything, 0.5) * 1000:9.2f} "
+        f"{percentile(everything, 0.99) * 1000:9.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
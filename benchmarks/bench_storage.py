@@ -0,0 +1,84 @@
+"""Форматы хранения: размер файла и время загрузки таблицы.
+
+Одна и та же таблица записывается в исходном JSON (массив с отступами),
+в журнальном JSON Lines и в двоичном формате, затем файл загружается
+целиком, как при первом обращении к таблице. Отдельно измеряется дозапись
+одной строки - основная операция журнальных форматов.
+
+Запуск: poetry run python benchmarks/bench_storage.py [--rows N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from primitive_db.storage import BinaryStorage, JsonStorage, LogStorage, TableStorage
+
+
+def make_row(row_id: int) -> dict:
+    """Генерирует синтетическую строку таблицы."""
+    return {
+        "ID": row_id,
+        "name": f"user{row_id}",
+        "email": f"user{row_id}@example.com",
+        "age": row_id % 90,
+        "score": row_id * 37 % 100_000,
+        "is_active": row_id % 3 != 0,
+    }
+
+
+def best_load_time(storage: TableStorage, table: str, repeat: int) -> float:
+    """Возвращает лучшее время загрузки таблицы в секундах."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        storage.load_row_map(table)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    arg_parser.add_argument("--appends", type=int, default=500)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    rows = [make_row(i) for i in range(1, args.rows + 1)]
+    backends = [
+        ("json", JsonStorage()),
+        ("jsonl", LogStorage()),
+        ("binary", BinaryStorage()),
+    ]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        os.makedirs("data")
+
+        print(f"Строк: {args.rows}, столбцов: {len(rows[0])}")
+        print(
+            f"{'формат':8} {'размер, КБ':>11} {'байт/строку':>12} "
+            f"{'загрузка, мс':>13} {'дозапись, мкс':>14}"
+        )
+        for name, storage in backends:
+            table = f"bench_{name}"
+            storage.rewrite(table, rows)
+            size = os.path.getsize(storage.file_path(table))
+            assert storage.load_row_map(table) == {row["ID"]: row for row in rows}
+            load_time = best_load_time(storage, table, args.repeat)
+
+            append_time = float("nan")
+            if name != "json":
+                start = time.perf_counter()
+                for row_id in range(args.rows + 1, args.rows + args.appends + 1):
+                    storage.append_rows(table, [make_row(row_id)])
+                append_time = (time.perf_counter() - start) / args.appends
+
+            print(
+                f"{name:8} {size / 1024:11.0f} {size / args.rows:12.1f} "
+                f"{load_time * 1000:13.1f} {append_time * 1e6:14.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
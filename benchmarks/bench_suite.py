@@ -0,0 +1,227 @@
+"""Набор бенчмарков с результатами в JSON и сравнением с базовой линией.
+
+Для каждого размера таблицы (по умолчанию 1k, 10k и 100k строк) через
+функции core.py строится синтетическая таблица и измеряются: скорость
+массовой и одиночной вставки, задержка SELECT по ID, по диапазону
+индексированного столбца и с перебором таблицы, задержка UPDATE и DELETE
+по ID. Отдельно измеряются SHOW TABLES при большом числе таблиц и холодный
+запуск REPL (новый процесс до выхода по EXIT).
+
+Результаты записываются в JSON: метрика -> значение, единица и
+направление (меньше или больше - лучше). С --compare результаты
+сравниваются с сохраненным файлом; метрика, ухудшившаяся больше порога,
+отмечается как регрессия, и код возврата равен 1. Журнал без fsync, чтобы
+измерялись сами команды, а не диск.
+
+Запуск: poetry run python benchmarks/bench_suite.py [--sizes 1000 10000 100000 1000000]
+        [--output results.json] [--compare baseline.json] [--threshold 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+import primitive_db
+from primitive_db import core, utils
+from primitive_db.decorators import confirmations_enabled
+from primitive_db.parser import parse_where_condition
+
+COLUMNS = {"name": "str", "email": "str", "age": "int", "score": "int", "is_active": "bool"}
+INSERT_BATCH = 10_000
+# Ширина диапазона score в SELECT по диапазону: около 100 строк при любом размере
+RANGE_ROWS = 100
+
+Results = Dict[str, Dict[str, Any]]
+
+
+def make_values(row_id: int, size: int) -> List[Any]:
+    """Генерирует значения синтетической строки (без ID)."""
+    return [
+        f"user{row_id}",
+        f"user{row_id}@example.com",
+        row_id % 90,
+        row_id * 7919 % size,
+        row_id % 3 != 0,
+    ]
+
+
+def latencies(function: Callable[..., Any], arguments: List[tuple]) -> List[float]:
+    """Вызывает функцию с каждым набором аргументов, возвращает время вызовов в с."""
+    times = []
+    for args in arguments:
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def percentile(times: List[float], share: float) -> float:
+    """Возвращает значение, которого не превышает доля share измерений."""
+    ordered = sorted(times)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def add_latency(results: Results, name: str, times: List[float]) -> None:
+    """Записывает p50 и p99 задержки в микросекундах."""
+    results[f"{name}.p50"] = {"value": statistics.median(times) * 1e6, "unit": "мкс", "better": "lower"}
+    results[f"{name}.p99"] = {"value": percentile(times, 0.99) * 1e6, "unit": "мкс", "better": "lower"}
+
+
+def bench_table(results: Results, size: int, operations: int, rng: random.Random) -> None:
+    """Строит таблицу из size строк и измеряет вставку, выборки и изменения."""
+    prefix = f"rows_{size}"
+    core.create_table("t", COLUMNS)
+
+    start = time.perf_counter()
+    for first in range(1, size + 1, INSERT_BATCH):
+        batch = range(first, min(first + INSERT_BATCH, size + 1))
+        core.insert_many("t", [make_values(row_id, size) for row_id in batch])
+    elapsed = time.perf_counter() - start
+    results[f"{prefix}.insert_many"] = {"value": size / elapsed, "unit": "строк/с", "better": "higher"}
+    core.create_index("t", "score", "sorted")
+
+    count = min(operations, size)
+    start = time.perf_counter()
+    for row_id in range(size + 1, size + count + 1):
+        core.insert_into("t", make_values(row_id, size))
+    elapsed = time.perf_counter() - start
+    results[f"{prefix}.insert_into"] = {"value": count / elapsed, "unit": "строк/с", "better": "higher"}
+
+    ids = rng.sample(range(1, size + 1), count)
+    points = [("t", parse_where_condition(f"ID = {row_id}")) for row_id in ids]
+    add_latency(results, f"{prefix}.select_point", latencies(core.select_from, points))
+
+    starts = [rng.randrange(max(size - RANGE_ROWS, 1)) for _ in range(count)]
+    ranges = [
+        ("t", parse_where_condition(f"score BETWEEN {low} AND {low + RANGE_ROWS - 1}"))
+        for low in starts
+    ]
+    add_latency(results, f"{prefix}.select_range", latencies(core.select_from, ranges))
+
+    # Перебор всей таблицы: повторов меньше, он в size раз дороже точечных
+    scans = [("t", parse_where_condition(f"name = 'user{row_id}'")) for row_id in ids[:10]]
+    add_latency(results, f"{prefix}.select_scan", latencies(core.select_from, scans))
+
+    updates = [("t", {"age": row_id % 90 + 100}, parse_where_condition(f"ID = {row_id}")) for row_id in ids]
+    add_latency(results, f"{prefix}.update", latencies(core.update_table, updates))
+
+    deletes = [("t", parse_where_condition(f"ID = {row_id}")) for row_id in ids]
+    add_latency(results, f"{prefix}.delete", latencies(core.delete_from, deletes))
+
+
+def bench_show_tables(results: Results, tables: int, repeat: int) -> None:
+    """Измеряет SHOW TABLES в базе из tables таблиц."""
+    for number in range(tables):
+        core.create_table(f"t{number}", {"name": "str", "value": "int"})
+        core.insert_many(f"t{number}", [["x", 1], ["y", 2]])
+    times = latencies(core.show_tables, [()] * repeat)
+    add_latency(results, f"tables_{tables}.show_tables", times)
+
+
+def bench_cold_start(results: Results, repeat: int) -> None:
+    """Измеряет запуск REPL в новом процессе до выхода по EXIT."""
+    env = dict(os.environ)
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(primitive_db.__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "primitive_db.main"],
+            input="exit\n", capture_output=True, text=True, env=env, check=True,
+        )
+        times.append(time.perf_counter() - start)
+    results["repl.cold_start"] = {"value": statistics.median(times) * 1000, "unit": "мс", "better": "lower"}
+
+
+def compare(results: Results, baseline: Results, threshold: float) -> List[str]:
+    """Печатает сравнение с базовой линией, возвращает имена регрессий."""
+    regressions = []
+    print(f"\n{'метрика':34} {'база':>12} {'сейчас':>12} {'изменение':>10}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None or not base["value"]:
+            continue
+        change = current["value"] / base["value"] - 1
+        worse = change > threshold if current["better"] == "lower" else change < -threshold
+        if worse:
+            regressions.append(name)
+        print(
+            f"{name:34} {base['value']:12.1f} {current['value']:12.1f} {change * 100:+9.1f}%"
+            + ("  РЕГРЕССИЯ" if worse else "")
+        )
+    return regressions
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    arg_parser.add_argument("--operations", type=int, default=200,
+                            help="точечных команд каждого вида на размер таблицы")
+    arg_parser.add_argument("--tables", type=int, default=200, help="таблиц для SHOW TABLES")
+    arg_parser.add_argument("--starts", type=int, default=5, help="запусков REPL")
+    arg_parser.add_argument("--output", help="записать результаты в JSON")
+    arg_parser.add_argument("--compare", metavar="BASELINE", help="сравнить с результатами из JSON")
+    arg_parser.add_argument("--threshold", type=float, default=0.2,
+                            help="допустимое ухудшение, доля (0.2 - 20%%)")
+    args = arg_parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+
+    confirmations_enabled.set(False)
+    rng = random.Random(1)
+    results: Results = {}
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            os.chdir(workdir)
+            utils.set_wal_fsync_policy("never")
+            bench_table(results, size, args.operations, rng)
+            utils.close_database()
+        print(f"Таблица {size} строк: готово")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        utils.set_wal_fsync_policy("never")
+        bench_show_tables(results, args.tables, args.operations)
+        utils.close_database()
+        bench_cold_start(results, args.starts)
+
+    print(f"\n{'метрика':34} {'значение':>12}  единица")
+    for name, result in results.items():
+        print(f"{name:34} {result['value']:12.1f}  {result['unit']}")
+
+    if output:
+        report = {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }
+        with open(output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты записаны в {output}")
+
+    if baseline_path:
+        if not os.path.exists(baseline_path):
+            print(f"\nБазовая линия {baseline_path} не найдена, сравнение пропущено.")
+            return
+        with open(baseline_path) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nРегрессий: {len(regressions)} (порог {args.threshold:.0%})")
+            sys.exit(1)
+        print(f"\nРегрессий нет (порог {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Сценарий из многих INSERT: каждая команда отдельно против одной транзакции.
+
+Запуск: poetry run python benchmarks/bench_transactions.py [--inserts N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from primitive_db import utils
+from primitive_db.engine import execute_command
+
+
+def run_script(commands: list) -> float:
+    """Выполняет команды и возвращает время в секундах."""
+    start = time.perf_counter()
+    for command in commands:
+        execute_command(command)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--inserts", type=int, default=1000)
+    arg_parser.add_argument("--fsync", default="always", choices=["always", "interval", "never"])
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        utils.set_wal_fsync_policy(args.fsync)
+        execute_command("CREATE TABLE auto (name str, age int)")
+        execute_command("CREATE TABLE batch (name str, age int)")
+
+        inserts = [f'INSERT INTO {{}} VALUES ("user{i}", {i % 90})' for i in range(args.inserts)]
+        autocommit = run_script([command.format("auto") for command in inserts])
+        transaction = run_script(
+            ["BEGIN"] + [command.format("batch") for command in inserts] + ["COMMIT"]
+        )
+        utils.close_database()
+
+    print(f"INSERT: {args.inserts}, fsync={args.fsync}")
+    print(f"{'режим':24} {'всего, мс':>10} {'мс на INSERT':>13}")
+    for name, elapsed in [("каждая команда", autocommit), ("BEGIN ... COMMIT", transaction)]:
+        print(f"{name:24} {elapsed * 1000:10.1f} {elapsed / args.inserts * 1000:13.3f}")
+
+
+if __name__ == "__main__":
+    main()
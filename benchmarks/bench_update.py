@@ -0,0 +1,80 @@
+"""Точечные UPDATE и DELETE по ID: время не должно расти с размером таблицы.
+
+Для таблиц разного размера выполняются UPDATE и DELETE одной строки по
+случайному ID. Строка находится по ID без перебора таблицы, в файл
+дописывается только новая версия строки или надгробие, поэтому время
+команды не зависит от числа строк. Затем VACUUM сжимает накопленные
+устаревшие записи. Журнал без fsync, чтобы измерялась сама команда.
+
+Запуск: poetry run python benchmarks/bench_update.py [--sizes 1000 10000 100000 1000000]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import List
+
+from primitive_db import utils
+from primitive_db.decorators import confirmations_enabled
+from primitive_db.engine import execute_command
+
+
+def latencies(commands: List[str]) -> List[float]:
+    """Выполняет команды по одной, возвращает время каждой в секундах."""
+    times = []
+    for command in commands:
+        start = time.perf_counter()
+        execute_command(command)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def percentile(times: List[float], share: float) -> float:
+    """Возвращает значение, которого не превышает доля share измерений."""
+    ordered = sorted(times)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    arg_parser.add_argument("--commands", type=int, default=500)
+    args = arg_parser.parse_args()
+    confirmations_enabled.set(False)
+    rng = random.Random(1)
+
+    print(
+        f"{'строк':>8} {'UPDATE p50, мкс':>16} {'UPDATE p99, мкс':>16} "
+        f"{'DELETE p50, мкс':>16} {'VACUUM, мс':>11}"
+    )
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            os.chdir(workdir)
+            utils.set_wal_fsync_policy("never")
+            with open("rows.csv", "w") as f:
+                f.writelines(f"user{i},{i % 90}\n" for i in range(size))
+            execute_command("CREATE TABLE t (name str, age int)")
+            execute_command("LOAD t FROM 'rows.csv'")
+            # Первая команда открывает таблицу; ее время в замер не входит
+            execute_command("UPDATE t SET age = 0 WHERE ID = 1")
+
+            ids = rng.sample(range(2, size + 1), min(size - 1, args.commands))
+            updates = latencies([f"UPDATE t SET age = {i % 90 + 100} WHERE ID = {i}" for i in ids])
+            deletes = latencies([f"DELETE FROM t WHERE ID = {i}" for i in ids])
+
+            start = time.perf_counter()
+            execute_command("VACUUM t")
+            vacuum_time = time.perf_counter() - start
+            utils.close_database()
+
+        print(
+            f"{size:8} {statistics.median(updates) * 1e6:16.1f} "
+            f"{percentile(updates, 0.99) * 1e6:16.1f} "
+            f"{statistics.median(deletes) * 1e6:16.1f} {vacuum_time * 1000:11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Стоимость одной устойчивой вставки: полная перезапись файла против журнала.
+
+Запуск: poetry run python benchmarks/bench_wal.py [--rows N] [--inserts M]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from primitive_db import utils
+from primitive_db.storage import JsonStorage
+
+
+def make_row(row_id: int) -> dict:
+    """Генерирует синтетическую строку таблицы."""
+    return {"ID": row_id, "name": f"user{row_id}", "age": row_id % 90, "is_active": True}
+
+
+def bench_rewrite(rows: int, inserts: int) -> float:
+    """Прежний способ: каждая вставка перезаписывает весь файл с fsync."""
+    storage = JsonStorage()
+    data = [make_row(i) for i in range(1, rows + 1)]
+    start = time.perf_counter()
+    for row_id in range(rows + 1, rows + inserts + 1):
+        data.append(make_row(row_id))
+        storage.rewrite("bench_rewrite", data)
+    return time.perf_counter() - start
+
+
+def bench_wal(policy: str, rows: int, inserts: int) -> float:
+    """Вставка через журнал: набор из метаданных и строки, затем дозапись в таблицу."""
+    utils.set_wal_fsync_policy(policy)
+    table = f"bench_{policy}"
+    metadata = utils.load_metadata()
+    metadata["tables"][table] = {"columns": {"ID": "int"}, "next_id": rows + 1}
+    utils.save_table_data(table, [make_row(i) for i in range(1, rows + 1)])
+    utils.checkpoint()
+
+    start = time.perf_counter()
+    for _ in range(inserts):
+        row_id = utils.reserve_ids(table, metadata["tables"][table])
+        with utils.atomic_write():
+            utils.save_metadata(metadata)
+            utils.append_table_rows(table, [make_row(row_id)])
+    utils.close_database()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--rows", type=int, default=20_000)
+    arg_parser.add_argument("--inserts", type=int, default=200)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        os.makedirs("data")
+        utils.save_metadata({"tables": {}})
+
+        print(f"Строк в таблице: {args.rows}, вставок: {args.inserts}")
+        print(f"{'способ':32} {'мс на вставку':>14}")
+        results = {"перезапись файла + fsync": bench_rewrite(args.rows, args.inserts)}
+        for policy in ("always", "interval", "never"):
+            results[f"журнал, fsync={policy}"] = bench_wal(policy, args.rows, args.inserts)
+        for name, elapsed in results.items():
+            print(f"{name:32} {elapsed / args.inserts * 1000:14.3f}")
+
+
+if __name__ == "__main__":
+    main()
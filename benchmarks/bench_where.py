@@ -0,0 +1,91 @@
+"""Стоимость проверки условия WHERE на одну строку: до и после компиляции.
+
+Запуск: poetry run python benchmarks/bench_where.py [--rows N]
+"""
+import argparse
+import time
+from typing import Any, Callable, Dict, List
+
+from primitive_db.parser import parse_where_condition
+from primitive_db.predicates import compile_condition
+
+
+def legacy_evaluate(row: Dict[str, Any], condition: Dict[str, Any]) -> bool:
+    """Прежняя реализация evaluate_where_condition (цепочка if/elif на строку)."""
+    if not condition:
+        return True
+
+    col = condition.get("column")
+    op = condition.get("operator")
+    value = condition.get("value")
+
+    if col not in row:
+        return False
+
+    row_value = row[col]
+
+    try:
+        if op == "=":
+            return row_value == value
+        elif op == "!=":
+            return row_value != value
+        elif op == ">":
+            return row_value > value
+        elif op == "<":
+            return row_value < value
+        elif op == ">=":
+            return row_value >= value
+        elif op == "<=":
+            return row_value <= value
+    except TypeError:
+        return False
+
+    return False
+
+
+def make_rows(count: int) -> List[Dict[str, Any]]:
+    """Генерирует синтетические строки таблицы."""
+    return [
+        {"ID": i, "name": f"user{i}", "age": i % 90, "is_active": i % 2 == 0}
+        for i in range(1, count + 1)
+    ]
+
+
+def per_row_ns(rows: List[Dict[str, Any]], check: Callable[[Dict[str, Any]], bool]) -> float:
+    """Возвращает лучшее из трех время проверки одной строки в наносекундах."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter_ns()
+        for row in rows:
+            check(row)
+        best = min(best, time.perf_counter_ns() - start)
+    return best / len(rows)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--rows", type=int, default=200_000)
+    args = arg_parser.parse_args()
+
+    rows = make_rows(args.rows)
+
+    print(f"Строк: {args.rows}")
+    print(f"{'условие':45} {'до, нс':>10} {'после, нс':>10}")
+
+    for where in ["age = 30", "age >= 45", "name != user7"]:
+        condition = parse_where_condition(where)
+        before = per_row_ns(rows, lambda row, c=condition: legacy_evaluate(row, c))
+        after = per_row_ns(rows, compile_condition(condition))
+        print(f"{where:45} {before:10.1f} {after:10.1f}")
+
+    # Составные условия прежний парсер не поддерживал
+    for where in [
+        "age BETWEEN 20 AND 40 AND is_active = true",
+        "age IN (1, 2, 3) OR name LIKE user1%",
+    ]:
+        after = per_row_ns(rows, compile_condition(parse_where_condition(where)))
+        print(f"{where:45} {'-':>10} {after:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+AGGREGATE_FUNCTIONS = {"COUNT", "SUM", "AVG", "MIN", "MAX"}
+NUMERIC_FUNCTIONS = {"SUM", "AVG"}
+
+# Элемент списка SELECT: (функция или None для столбца группировки, аргумент)
+SelectItem = Tuple[Optional[str], str]
+
+
+def item_label(item: SelectItem) -> str:
+    """Возвращает заголовок столбца результата для элемента SELECT."""
+    function, argument = item
+    return f"{function}({argument})" if function else argument
+
+
+def _make_updater(function: str, column: str) -> Any:
+    """Возвращает функцию обновления аккумулятора по строке.
+
+    Аккумулятор - список [значение] или [сумма, количество] для AVG,
+    функция изменяет его на месте.
+    """
+    if function == "COUNT" and column == "*":
+        def update(acc: List[Any], row: Dict[str, Any]) -> None:
+            acc[0] += 1
+    elif function == "COUNT":
+        def update(acc: List[Any], row: Dict[str, Any]) -> None:
+            if row.get(column) is not None:
+                acc[0] += 1
+    elif function == "SUM":
+        def update(acc: List[Any], row: Dict[str, Any]) -> None:
+            value = row.get(column)
+            if value is not None:
+                acc[0] = value if acc[0] is None else acc[0] + value
+    elif function == "AVG":
+        def update(acc: List[Any], row: Dict[str, Any]) -> None:
+            value = row.get(column)
+            if value is not None:
+                acc[0] += value
+                acc[1] += 1
+    elif function == "MIN":
+        def update(acc: List[Any], row: Dict[str, Any]) -> None:
+            value = row.get(column)
+            if value is not None and (acc[0] is None or value < acc[0]):
+                acc[0] = value
+    elif function == "MAX":
+        def update(acc: List[Any], row: Dict[str, Any]) -> None:
+            value = row.get(column)
+            if value is not None and (acc[0] is None or value > acc[0]):
+                acc[0] = value
+    else:
+        raise ValueError(f"Unknown aggregate function '{function}'")
+    return update
+
+
+def _initial_accumulator(function: str) -> List[Any]:
+    """Возвращает начальное значение аккумулятора."""
+    if function == "COUNT":
+        return [0]
+    if function == "AVG":
+        return [0, 0]
+    return [None]
+
+
+def _final_value(function: str, acc: List[Any]) -> Any:
+    """Вычисляет итоговое значение агрегата."""
+    if function == "AVG":
+        return acc[0] / acc[1] if acc[1] else None
+    return acc[0]
+
+
+def aggregate_rows(
+    items: List[SelectItem],
+    rows: Iterable[Dict[str, Any]],
+    group_by: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Вычисляет агрегаты за один проход с группировкой по хеш-таблице.
+
+    Строки не накапливаются: для каждой группы хранятся только аккумуляторы.
+    """
+    aggregates = [
+        (position, function, _make_updater(function, argument))
+        for position, (function, argument) in enumerate(items)
+        if function
+    ]
+    groups: Dict[Any, List[List[Any]]] = {}
+
+    def new_group() -> List[List[Any]]:
+        return [_initial_accumulator(function) for _, function, _ in aggregates]
+
+    if group_by is None:
+        accumulators = groups[None] = new_group()
+        updaters = [(accumulators[i], update) for i, (_, _, update) in enumerate(aggregates)]
+        for row in rows:
+            for acc, update in updaters:
+                update(acc, row)
+    else:
+        for row in rows:
+            key = row.get(group_by)
+            accumulators = groups.get(key)
+            if accumulators is None:
+                accumulators = groups[key] = new_group()
+            for acc, (_, _, update) in zip(accumulators, aggregates):
+                update(acc, row)
+
+    labels = [item_label(item) for item in items]
+    result = []
+    for key, accumulators in groups.items():
+        values = {}
+        for (position, function, _), acc in zip(aggregates, accumulators):
+            values[labels[position]] = _final_value(function, acc)
+        for position, (function, _) in enumerate(items):
+            if not function:
+                values[labels[position]] = key
+        result.append({label: values[label] for label in labels})
+    return result
@@ -0,0 +1,174 @@
+import sys
+import time
+from typing import Iterable, List, Optional, TextIO, Union
+
+from .constants import BATCH_GROUP_SIZE
+from .core import delete_from, insert_into, insert_many, load_from_file, update_table
+from .decorators import confirmations_enabled
+from .engine import execute_plan, plan_command
+from .parser import split_statements
+from .utils import (
+    begin_transaction,
+    close_database,
+    commit_transaction,
+    in_transaction,
+    recover_database,
+    rollback_transaction,
+)
+
+# Изменяющие команды, которые объединяются в группы; первый аргумент - таблица
+GROUPED_WRITES = {insert_into, insert_many, update_table, delete_from, load_from_file}
+
+
+class Statement:
+    """Разобранная команда сценария."""
+
+    __slots__ = ("line_number", "text", "plan")
+
+    def __init__(self, line_number: int, text: str) -> None:
+        self.line_number = line_number
+        self.text = text
+        self.plan = plan_command(text)
+
+    def write_target(self) -> Optional[str]:
+        """Возвращает таблицу, которую изменяет команда, или None."""
+        if isinstance(self.plan, str) or self.plan.function not in GROUPED_WRITES:
+            return None
+        return self.plan.args[0]
+
+
+def plan_groups(statements: List[Statement]) -> List[List[Statement]]:
+    """Объединяет подряд идущие изменения одной таблицы в группы.
+
+    Группа выполняется одной транзакцией, то есть одной записью в журнал
+    и в файл таблицы. Остальные команды образуют группы из одной команды.
+    """
+    groups: List[List[Statement]] = []
+    group_table: Optional[str] = None
+    for statement in statements:
+        table = statement.write_target()
+        if (
+            table is not None
+            and table == group_table
+            and len(groups[-1]) < BATCH_GROUP_SIZE
+        ):
+            groups[-1].append(statement)
+        else:
+            groups.append([statement])
+            group_table = table
+    return groups
+
+
+class ScriptRunner:
+    """Выполняет команды сценария и считает выполненные команды и ошибки."""
+
+    def __init__(self, quiet: bool, out: TextIO, err: TextIO) -> None:
+        self.quiet = quiet
+        self.out = out
+        self.err = err
+        self.executed = 0
+        self.errors = 0
+
+    def report(self, statement: Statement, result: Union[str, Iterable[str]]) -> None:
+        """Печатает результат команды; ошибки - в поток ошибок с номером строки."""
+        if isinstance(result, str):
+            if result.startswith(("Error", "Unexpected error")):
+                self.errors += 1
+                print(f"Line {statement.line_number}: {result}", file=self.err)
+            elif result and not self.quiet:
+                print(result, file=self.out)
+            return
+
+        for chunk in result:
+            if not self.quiet:
+                print(chunk, file=self.out)
+
+    def run_statement(self, statement: Statement) -> bool:
+        """Выполняет одну команду, возвращает False для EXIT."""
+        result = execute_plan(statement.plan)
+        self.executed += 1
+        if result == "EXIT":
+            return False
+        self.report(statement, result)
+        return True
+
+    def run_group(self, group: List[Statement]) -> bool:
+        """Выполняет группу изменений одной таблицы одной транзакцией."""
+        if len(group) == 1 or in_transaction():
+            for statement in group:
+                if not self.run_statement(statement):
+                    return False
+            return True
+
+        begin_transaction()
+        try:
+            for statement in group:
+                self.run_statement(statement)
+        except BaseException:
+            rollback_transaction()
+            raise
+
+        try:
+            commit_transaction()
+        except Exception as e:
+            self.errors += 1
+            print(
+                f"Lines {group[0].line_number}-{group[-1].line_number}: "
+                f"Error: Failed to commit batch: {str(e)}",
+                file=self.err,
+            )
+        return True
+
+
+def run_script(
+    script: str,
+    quiet: bool = False,
+    out: TextIO = sys.stdout,
+    err: TextIO = sys.stderr,
+) -> int:
+    """Выполняет сценарий команд без интерактивного ввода, возвращает число ошибок.
+
+    Все команды разбираются заранее. Подтверждения удаления отключаются,
+    подряд идущие изменения одной таблицы записываются одной транзакцией.
+    В конце печатается сводка.
+    """
+    start_time = time.perf_counter()
+    statements = [Statement(line_number, text) for line_number, text in split_statements(script)]
+
+    confirmations_token = confirmations_enabled.set(False)
+    runner = ScriptRunner(quiet, out, err)
+
+    recovered = recover_database()
+    if recovered:
+        print(f"Восстановлено из журнала операций: {recovered}", file=out)
+
+    try:
+        for group in plan_groups(statements):
+            if not runner.run_group(group):
+                break
+    finally:
+        if in_transaction():
+            rollback_transaction()
+            runner.errors += 1
+            print("Error: Transaction was not committed, rolled back.", file=err)
+        close_database()
+        confirmations_enabled.reset(confirmations_token)
+
+    elapsed = time.perf_counter() - start_time
+    rate = runner.executed / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Выполнено команд: {runner.executed}, ошибок: {runner.errors}, "
+        f"время: {elapsed:.3f} с, {rate:.0f} команд/с",
+        file=out,
+    )
+    return runner.errors
+
+
+def run_script_file(path: str, quiet: bool = False) -> int:
+    """Выполняет сценарий из файла или из стандартного ввода (path = "-")."""
+    if path == "-":
+        script = sys.stdin.read()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            script = f.read()
+    return run_script(script, quiet)
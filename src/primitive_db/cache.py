@@ -0,0 +1,110 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+Stamp = Tuple[int, int, int]
+
+MISSING = object()
+
+
+def file_stamp(path: str) -> Stamp:
+    """Возвращает отпечаток файла: (время изменения в нс, размер, inode)."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return (0, -1, 0)
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def estimate_size(value: Any, sample_size: int = 32) -> int:
+    """Грубо оценивает объем памяти коллекции строк по выборке."""
+    if isinstance(value, dict):
+        sample = list(islice(value.values(), sample_size))
+    elif isinstance(value, (list, tuple)):
+        sample = list(value[:sample_size])
+    else:
+        return sys.getsizeof(value)
+
+    if not sample:
+        return sys.getsizeof(value)
+
+    sample_bytes = 0
+    for item in sample:
+        sample_bytes += sys.getsizeof(item)
+        if isinstance(item, dict):
+            sample_bytes += sum(sys.getsizeof(v) for v in item.values())
+    return sys.getsizeof(value) + sample_bytes * len(value) // len(sample)
+
+
+class LRUCache:
+    """LRU-кеш с проверкой отпечатка файла и ограничением по объему памяти.
+
+    Методы защищены блокировкой: кеш общий для потоков сервера.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.lock = threading.RLock()
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[Hashable, list]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, stamp: Stamp) -> Any:
+        """Возвращает значение, если оно есть и отпечаток совпадает, иначе MISSING."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != stamp:
+                self.misses += 1
+                return MISSING
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, stamp: Stamp, value: Any, cost: int) -> None:
+        """Сохраняет значение и вытесняет давно не использованные записи."""
+        with self.lock:
+            self.invalidate(key)
+            if cost > self.max_bytes:
+                return
+            self.entries[key] = [stamp, value, cost]
+            self.total_bytes += cost
+            while self.total_bytes > self.max_bytes:
+                _, (_, _, evicted_cost) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_cost
+
+    def update(
+        self,
+        key: Hashable,
+        expected_stamp: Stamp,
+        new_stamp: Stamp,
+        apply: Callable[[Any], None],
+        cost: Optional[Callable[[Any], int]] = None,
+    ) -> None:
+        """Применяет запись к кешу (write-through) или сбрасывает устаревшее значение."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return
+            if entry[0] != expected_stamp:
+                self.invalidate(key)
+                return
+            apply(entry[1])
+            new_cost = cost(entry[1]) if cost else entry[2]
+            self.put(key, new_stamp, entry[1], new_cost)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Удаляет запись из кеша."""
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.total_bytes -= entry[2]
+
+    def clear(self) -> None:
+        """Очищает кеш."""
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
@@ -0,0 +1,50 @@
+import socket
+from typing import Iterator, Optional
+
+from .constants import SERVER_HOST, SERVER_PORT
+
+
+class DatabaseClient:
+    """Клиент сервера базы данных: отправляет команду, возвращает текст ответа."""
+
+    def __init__(
+        self,
+        host: str = SERVER_HOST,
+        port: int = SERVER_PORT,
+        timeout: Optional[float] = None,
+    ) -> None:
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+
+    def execute(self, command: str) -> str:
+        """Выполняет команду на сервере и возвращает ответ целиком."""
+        return "\n".join(self.iter_execute(command))
+
+    def iter_execute(self, command: str) -> Iterator[str]:
+        """Выполняет команду и возвращает фрагменты ответа по мере получения."""
+        if "\n" in command:
+            raise ValueError("Command must be a single line")
+        self.sock.sendall(command.encode("utf-8") + b"\n")
+        return self._iter_frames()
+
+    def _iter_frames(self) -> Iterator[str]:
+        while True:
+            header = self.reader.readline()
+            if not header:
+                raise ConnectionError("Connection closed by server")
+            size = int(header)
+            if size == 0:
+                return
+            yield self.reader.read(size).decode("utf-8")
+
+    def close(self) -> None:
+        """Закрывает соединение."""
+        self.reader.close()
+        self.sock.close()
+
+    def __enter__(self) -> "DatabaseClient":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
@@ -0,0 +1,319 @@
+import json
+import struct
+import sys
+from array import array
+from functools import lru_cache
+from itertools import accumulate, chain, repeat
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# Двоичный файл таблицы:
+#   MAGIC, длина схемы (<I), схема - JSON [[столбец, тип], ...]
+#   далее страницы: заголовок (<IBI: длина данных, вид, число строк),
+#   данные и длина данных (<I) еще раз, по которой проверяется целостность
+#   конца файла
+# Данные страницы строк хранятся по столбцам в порядке схемы:
+#   int  - значения подряд, 8 байт little-endian
+#   bool - биты, младший бит первого байта - первая строка
+#   str  - смещения концов строк в байтах (<I каждое), затем текст UTF-8
+# Любое значение читается по смещению столбца без разбора соседних строк.
+# Страница надгробий содержит только ID удаленных строк (как столбец int)
+MAGIC = b"PDBT\x02"
+SCHEMA_LENGTH = struct.Struct("<I")
+PAGE_HEADER = struct.Struct("<IBI")
+PAGE_TRAILER = struct.Struct("<I")
+INT_VALUE = struct.Struct("<q")
+STR_END = struct.Struct("<I")
+
+ROWS_PAGE = 0
+TOMBSTONE_PAGE = 1
+
+Schema = List[Tuple[str, str]]
+# Данные файла: bytes или отображение файла в память (mmap)
+Buffer = Union[bytes, Any]
+
+_SWAP_BYTES = sys.byteorder == "big"
+_UINT32 = "I" if array("I").itemsize == 4 else "L"
+
+# Байт -> восемь значений bool, младший бит первым
+_BITS = [tuple(bool(byte >> bit & 1) for bit in range(8)) for byte in range(256)]
+
+# Тип значения -> тип столбца (bool проверяется раньше int)
+_VALUE_TYPES = ((bool, "bool"), (int, "int"), (str, "str"))
+
+
+class CorruptFileError(ValueError):
+    """Файл таблицы поврежден или имеет неизвестный формат."""
+
+
+def _to_little_endian(values: array) -> bytes:
+    if _SWAP_BYTES:
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if _SWAP_BYTES:
+        values.byteswap()
+    return values
+
+
+def _encode_ints(values: List[int]) -> bytes:
+    return _to_little_endian(array("q", values))
+
+
+def _decode_ints(data: Buffer, position: int, count: int) -> Any:
+    return _from_little_endian("q", data[position:position + 8 * count])
+
+
+def _ints_size(data: Buffer, position: int, count: int) -> int:
+    return 8 * count
+
+
+def _read_int(data: Buffer, position: int, count: int, index: int) -> int:
+    return INT_VALUE.unpack_from(data, position + 8 * index)[0]
+
+
+def _encode_bools(values: List[bool]) -> bytes:
+    packed = bytearray((len(values) + 7) // 8)
+    for i, value in enumerate(values):
+        if value:
+            packed[i >> 3] |= 1 << (i & 7)
+    return bytes(packed)
+
+
+def _decode_bools(data: Buffer, position: int, count: int) -> Any:
+    end = position + (count + 7) // 8
+    values = list(chain.from_iterable(map(_BITS.__getitem__, data[position:end])))
+    del values[count:]
+    return values
+
+
+def _bools_size(data: Buffer, position: int, count: int) -> int:
+    return (count + 7) // 8
+
+
+def _read_bool(data: Buffer, position: int, count: int, index: int) -> bool:
+    return bool(data[position + (index >> 3)] >> (index & 7) & 1)
+
+
+def _encode_strs(values: List[str]) -> bytes:
+    text = "".join(values)
+    if text.isascii():
+        lengths: Any = map(len, values)
+        encoded = text.encode("ascii")
+    else:
+        pieces = [value.encode("utf-8", "surrogatepass") for value in values]
+        lengths = map(len, pieces)
+        encoded = b"".join(pieces)
+    return _to_little_endian(array(_UINT32, accumulate(lengths))) + encoded
+
+
+def _decode_strs(data: Buffer, position: int, count: int) -> Any:
+    text_position = position + 4 * count
+    ends = _from_little_endian(_UINT32, data[position:text_position])
+    text = data[text_position:text_position + (ends[-1] if count else 0)]
+    # Строки вырезаются из общего текста по смещениям; текст ASCII
+    # декодируется целиком, так как смещения в байтах совпадают с символьными
+    pieces = map(slice, chain((0,), ends), ends)
+    if text.isascii():
+        return list(map(text.decode("ascii").__getitem__, pieces))
+    return [text[piece].decode("utf-8", "surrogatepass") for piece in pieces]
+
+
+def _strs_size(data: Buffer, position: int, count: int) -> int:
+    if not count:
+        return 0
+    return 4 * count + STR_END.unpack_from(data, position + 4 * (count - 1))[0]
+
+
+def _read_str(data: Buffer, position: int, count: int, index: int) -> str:
+    start = STR_END.unpack_from(data, position + 4 * (index - 1))[0] if index else 0
+    end = STR_END.unpack_from(data, position + 4 * index)[0]
+    text_position = position + 4 * count
+    return data[text_position + start:text_position + end].decode("utf-8", "surrogatepass")
+
+
+ENCODERS: Dict[str, Callable[[List[Any]], bytes]] = {
+    "int": _encode_ints,
+    "bool": _encode_bools,
+    "str": _encode_strs,
+}
+
+# Тип столбца -> (декодер столбца, размер столбца, чтение одного значения);
+# все функции принимают данные, смещение столбца и число строк страницы
+DECODERS: Dict[str, Callable[[Buffer, int, int], Any]] = {
+    "int": _decode_ints,
+    "bool": _decode_bools,
+    "str": _decode_strs,
+}
+
+COLUMN_SIZES: Dict[str, Callable[[Buffer, int, int], int]] = {
+    "int": _ints_size,
+    "bool": _bools_size,
+    "str": _strs_size,
+}
+
+VALUE_READERS: Dict[str, Callable[[Buffer, int, int, int], Any]] = {
+    "int": _read_int,
+    "bool": _read_bool,
+    "str": _read_str,
+}
+
+
+def schema_from_row(row: Dict[str, Any]) -> Schema:
+    """Определяет схему по проверенной строке: типы значений совпадают с типами столбцов."""
+    schema = []
+    for name, value in row.items():
+        for value_type, column_type in _VALUE_TYPES:
+            if isinstance(value, value_type):
+                schema.append((name, column_type))
+                break
+        else:
+            raise ValueError(f"Unsupported value type {type(value).__name__} in column '{name}'")
+    return schema
+
+
+def schema_from_columns(columns: Dict[str, str]) -> Schema:
+    """Строит схему по типам столбцов таблицы (с ID) в порядке их объявления."""
+    return list(columns.items())
+
+
+def encode_header(schema: Schema) -> bytes:
+    """Кодирует заголовок файла со схемой таблицы."""
+    schema_bytes = json.dumps([list(column) for column in schema]).encode("utf-8")
+    return MAGIC + SCHEMA_LENGTH.pack(len(schema_bytes)) + schema_bytes
+
+
+def decode_header(data: Buffer) -> Tuple[Schema, int]:
+    """Читает заголовок файла, возвращает схему и смещение первой страницы."""
+    start = len(MAGIC) + SCHEMA_LENGTH.size
+    if len(data) < start or data[:len(MAGIC)] != MAGIC:
+        raise CorruptFileError("Not a binary table file or unsupported format version")
+    (size,) = SCHEMA_LENGTH.unpack_from(data, len(MAGIC))
+    if start + size > len(data):
+        raise CorruptFileError("Truncated table file header")
+    return _parse_schema(bytes(data[start:start + size])), start + size
+
+
+@lru_cache(maxsize=256)
+def _parse_schema(schema_bytes: bytes) -> Schema:
+    # Схема читается при каждой дозаписи, а меняется только с таблицей
+    return [(name, column_type) for name, column_type in json.loads(schema_bytes)]
+
+
+def read_header(f: BinaryIO) -> Tuple[Schema, int]:
+    """Читает заголовок открытого файла таблицы."""
+    f.seek(0)
+    prefix = f.read(len(MAGIC) + SCHEMA_LENGTH.size)
+    if len(prefix) == len(MAGIC) + SCHEMA_LENGTH.size and prefix.startswith(MAGIC):
+        (size,) = SCHEMA_LENGTH.unpack_from(prefix, len(MAGIC))
+        prefix += f.read(size)
+    return decode_header(prefix)
+
+
+def _frame(kind: int, count: int, payload: bytes) -> bytes:
+    return (
+        PAGE_HEADER.pack(len(payload), kind, count)
+        + payload
+        + PAGE_TRAILER.pack(len(payload))
+    )
+
+
+def encode_rows_page(schema: Schema, rows: List[Dict[str, Any]]) -> bytes:
+    """Кодирует страницу строк: значения каждого столбца подряд, без имен."""
+    try:
+        payload = b"".join(
+            ENCODERS[column_type]([row[name] for row in rows])
+            for name, column_type in schema
+        )
+    except (KeyError, TypeError, OverflowError) as e:
+        raise ValueError(f"Row does not match table schema: {e}") from e
+    return _frame(ROWS_PAGE, len(rows), payload)
+
+
+def encode_tombstone_page(ids: List[int]) -> bytes:
+    """Кодирует страницу надгробий удаленных строк."""
+    return _frame(TOMBSTONE_PAGE, len(ids), _encode_ints(ids))
+
+
+def column_offsets(schema: Schema, data: Buffer, position: int, count: int) -> List[int]:
+    """Возвращает смещения столбцов страницы строк, данные которой начинаются в position."""
+    offsets = []
+    for _, column_type in schema:
+        offsets.append(position)
+        position += COLUMN_SIZES[column_type](data, position, count)
+    return offsets
+
+
+def decode_rows(
+    schema: Schema,
+    data: Buffer,
+    offsets: List[int],
+    count: int,
+) -> List[Dict[str, Any]]:
+    """Декодирует все строки страницы по смещениям ее столбцов."""
+    columns = [
+        DECODERS[column_type](data, offset, count)
+        for (_, column_type), offset in zip(schema, offsets)
+    ]
+    names = [name for name, _ in schema]
+    return list(map(dict, map(zip, repeat(names), zip(*columns))))
+
+
+def decode_row(
+    schema: Schema,
+    data: Buffer,
+    offsets: List[int],
+    count: int,
+    index: int,
+) -> Dict[str, Any]:
+    """Декодирует одну строку страницы, не трогая остальные."""
+    return {
+        name: VALUE_READERS[column_type](data, offset, count, index)
+        for (name, column_type), offset in zip(schema, offsets)
+    }
+
+
+def decode_ids(data: Buffer, position: int, count: int) -> Sequence[int]:
+    """Возвращает столбец int (ID) страницы; на little-endian - без копирования."""
+    if _SWAP_BYTES:
+        return _decode_ints(data, position, count)
+    return memoryview(data)[position:position + 8 * count].cast("q")
+
+
+def page_end(data: bytes, position: int) -> Optional[int]:
+    """Возвращает конец целой страницы, начинающейся в position, или None."""
+    if position + PAGE_HEADER.size > len(data):
+        return None
+    size, _, _ = PAGE_HEADER.unpack_from(data, position)
+    end = position + PAGE_HEADER.size + size + PAGE_TRAILER.size
+    if end > len(data) or PAGE_TRAILER.unpack_from(data, end - PAGE_TRAILER.size)[0] != size:
+        return None
+    return end
+
+
+def valid_length(data: bytes, position: int) -> int:
+    """Возвращает конец последней целой страницы начиная с position."""
+    end = page_end(data, position)
+    while end is not None:
+        position = end
+        end = page_end(data, position)
+    return position
+
+
+def tail_is_complete(f: BinaryIO, size: int, header_end: int) -> bool:
+    """Проверяет по длине в конце файла, что последняя страница записана целиком."""
+    if size == header_end:
+        return True
+    start = size - PAGE_TRAILER.size
+    if start - PAGE_HEADER.size < header_end:
+        return False
+    f.seek(start)
+    (page_size,) = PAGE_TRAILER.unpack(f.read(PAGE_TRAILER.size))
+    start -= page_size + PAGE_HEADER.size
+    if start < header_end:
+        return False
+    f.seek(start)
+    return PAGE_HEADER.unpack(f.read(PAGE_HEADER.size))[0] == page_size
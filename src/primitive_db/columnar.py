@@ -0,0 +1,330 @@
+import operator
+from array import array
+from bisect import bisect_right
+from itertools import compress, repeat
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .predicates import COMPARISON_OPERATORS, like_to_regex
+from .utils import get_table_state
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - NumPy необязателен
+    numpy = None
+
+NUMPY_OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+}
+
+_NOT_TABLE = bytes.maketrans(b"\x00\x01", b"\x01\x00")
+
+
+class IntColumn:
+    """Столбец int: значения подряд в array('q')."""
+
+    def __init__(self) -> None:
+        self.values = array("q")
+
+    def append(self, value: int) -> None:
+        self.values.append(value)
+
+    def get(self, position: int) -> int:
+        return self.values[position]
+
+    def iter_values(self) -> Iterable[Any]:
+        return self.values
+
+    def numpy_values(self) -> Any:
+        return numpy.frombuffer(self.values, dtype=numpy.int64)
+
+    def accepts(self, value: Any) -> bool:
+        return isinstance(value, (int, float))
+
+    def nbytes(self) -> int:
+        return self.values.itemsize * len(self.values)
+
+
+class BoolColumn:
+    """Столбец bool: по байту 0/1 на значение в bytearray."""
+
+    def __init__(self) -> None:
+        self.values = bytearray()
+
+    def append(self, value: bool) -> None:
+        self.values.append(1 if value else 0)
+
+    def get(self, position: int) -> bool:
+        return bool(self.values[position])
+
+    def iter_values(self) -> Iterable[Any]:
+        return self.values
+
+    def numpy_values(self) -> Any:
+        return numpy.frombuffer(bytes(self.values), dtype=numpy.uint8)
+
+    def accepts(self, value: Any) -> bool:
+        return isinstance(value, (int, float))
+
+    def nbytes(self) -> int:
+        return len(self.values)
+
+
+class StrColumn:
+    """Столбец str: UTF-8 байты подряд и массив смещений начала строк."""
+
+    def __init__(self) -> None:
+        self.offsets = array("q", [0])
+        self.data = bytearray()
+
+    def append(self, value: str) -> None:
+        self.data += value.encode("utf-8")
+        self.offsets.append(len(self.data))
+
+    def get(self, position: int) -> str:
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return self.data[start:end].decode("utf-8")
+
+    def iter_values(self) -> Iterator[bytes]:
+        """Перебирает значения в виде байтов UTF-8 (порядок байтов = порядок строк)."""
+        data = bytes(self.data)
+        offsets = self.offsets
+        return map(data.__getitem__, map(slice, offsets, offsets[1:]))
+
+    def equal_mask(self, value: str) -> bytearray:
+        """Маска равенства через поиск подстроки по всему буферу.
+
+        Совпадение засчитывается, только если найденный фрагмент начинается
+        и заканчивается на границах значений.
+        """
+        needle = value.encode("utf-8")
+        offsets = self.offsets
+        size = len(offsets) - 1
+        mask = bytearray(size)
+        if not needle:
+            for position in compress(range(size), map(operator.eq, offsets, offsets[1:])):
+                mask[position] = 1
+            return mask
+
+        data = bytes(self.data)
+        start = data.find(needle)
+        while start != -1:
+            position = bisect_right(offsets, start) - 1
+            if (
+                position < size
+                and offsets[position] == start
+                and offsets[position + 1] == start + len(needle)
+            ):
+                mask[position] = 1
+            start = data.find(needle, start + 1)
+        return mask
+
+    def iter_strings(self) -> Iterator[str]:
+        return (value.decode("utf-8") for value in self.iter_values())
+
+    def numpy_values(self) -> Any:
+        return None
+
+    def accepts(self, value: Any) -> bool:
+        return isinstance(value, str)
+
+    def nbytes(self) -> int:
+        return len(self.data) + self.offsets.itemsize * len(self.offsets)
+
+
+COLUMN_CLASSES = {"int": IntColumn, "bool": BoolColumn, "str": StrColumn}
+
+
+class ColumnarTable:
+    """Столбцовое представление таблицы для аналитических сканирований.
+
+    Условия WHERE вычисляются по столбцам целиком: результат сравнения - маска
+    (bytes с 0/1 или булев массив NumPy), составные условия объединяют маски.
+    """
+
+    def __init__(self, column_types: Dict[str, str]) -> None:
+        self.column_types = dict(column_types)
+        self.columns = {
+            col: COLUMN_CLASSES[col_type]() for col, col_type in column_types.items()
+        }
+        self.size = 0
+
+    @classmethod
+    def from_rows(
+        cls,
+        column_types: Dict[str, str],
+        rows: Iterable[Dict[str, Any]],
+    ) -> Optional["ColumnarTable"]:
+        """Строит представление или возвращает None, если значения не помещаются."""
+        table = cls(column_types)
+        try:
+            for row in rows:
+                table.append(row)
+        except (KeyError, TypeError, OverflowError, AttributeError):
+            return None
+        return table
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, row: Dict[str, Any]) -> None:
+        """Добавляет строку в конец всех столбцов."""
+        for col, column in self.columns.items():
+            column.append(row[col])
+        self.size += 1
+
+    def row(self, position: int) -> Dict[str, Any]:
+        """Восстанавливает строку по позиции."""
+        return {col: column.get(position) for col, column in self.columns.items()}
+
+    def nbytes(self) -> int:
+        """Возвращает объем данных всех столбцов в байтах."""
+        return sum(column.nbytes() for column in self.columns.values())
+
+    def supports(self, condition: Dict[str, Any]) -> bool:
+        """Проверяет, можно ли вычислить условие по столбцам."""
+        op = condition.get("operator")
+        if op in ("AND", "OR"):
+            return all(self.supports(part) for part in condition["conditions"])
+        if op == "NOT":
+            return self.supports(condition["condition"])
+        if condition.get("column") not in self.columns:
+            return False
+        if op == "LIKE":
+            return isinstance(self.columns[condition["column"]], StrColumn)
+        return op in COMPARISON_OPERATORS or op in ("IN", "BETWEEN")
+
+    def filter_positions(self, condition: Dict[str, Any]) -> List[int]:
+        """Возвращает позиции строк, удовлетворяющих условию, по порядку."""
+        mask = self._mask(condition)
+        if numpy is not None and isinstance(mask, numpy.ndarray):
+            return numpy.flatnonzero(mask).tolist()
+        return list(compress(range(self.size), mask))
+
+    def _mask(self, condition: Dict[str, Any]) -> Any:
+        op = condition["operator"]
+
+        if op == "AND":
+            masks = [self._mask(part) for part in condition["conditions"]]
+            result = masks[0]
+            for mask in masks[1:]:
+                result = _combine(operator.and_, result, mask)
+            return result
+        if op == "OR":
+            masks = [self._mask(part) for part in condition["conditions"]]
+            result = masks[0]
+            for mask in masks[1:]:
+                result = _combine(operator.or_, result, mask)
+            return result
+        if op == "NOT":
+            return _invert(self._mask(condition["condition"]))
+
+        column = self.columns[condition["column"]]
+        value = condition["value"]
+
+        if op == "IN":
+            members = [item for item in value if column.accepts(item)]
+            if numpy is not None and column.numpy_values() is not None:
+                try:
+                    return numpy.isin(column.numpy_values(), members)
+                except (OverflowError, TypeError):
+                    pass
+            if isinstance(column, StrColumn):
+                members = [item.encode("utf-8") for item in members]
+            lookup = frozenset(members).__contains__
+            return bytes(map(lookup, column.iter_values()))
+
+        if op == "BETWEEN":
+            low, high = value
+            return _combine(
+                operator.and_,
+                self._compare(column, ">=", low),
+                self._compare(column, "<=", high),
+            )
+
+        if op == "LIKE":
+            fullmatch = like_to_regex(str(value)).fullmatch
+            return bytes(
+                fullmatch(item) is not None for item in column.iter_strings()
+            )
+
+        return self._compare(column, op, value)
+
+    def _compare(self, column: Any, op: str, value: Any) -> Any:
+        """Сравнивает весь столбец с константой."""
+        if not column.accepts(value):
+            # Как и построчная проверка: = ложно, != истинно, сравнение ложно
+            return bytes([1 if op == "!=" else 0]) * self.size
+
+        if numpy is not None:
+            values = column.numpy_values()
+            if values is not None:
+                try:
+                    return NUMPY_OPERATORS[op](values, value)
+                except (OverflowError, TypeError):
+                    pass
+
+        if isinstance(column, BoolColumn) and op in ("=", "!=") and value in (0, 1):
+            # Столбец bool уже является маской
+            mask = bytes(column.values)
+            return mask if (op == "=") == bool(value) else _invert(mask)
+
+        if isinstance(column, StrColumn):
+            if op == "=":
+                return column.equal_mask(value)
+            if op == "!=":
+                return _invert(column.equal_mask(value))
+            value = value.encode("utf-8")
+        compare = COMPARISON_OPERATORS[op]
+        return bytes(map(compare, column.iter_values(), repeat(value)))
+
+
+def _combine(combine: Any, first: Any, second: Any) -> Any:
+    """Объединяет две маски поэлементно.
+
+    Байтовые маски содержат только 0 и 1, поэтому их можно объединить как
+    большие целые числа одной побитовой операцией.
+    """
+    if numpy is not None and (
+        isinstance(first, numpy.ndarray) or isinstance(second, numpy.ndarray)
+    ):
+        first = _as_numpy_mask(first)
+        second = _as_numpy_mask(second)
+        return combine(first, second)
+    result = combine(int.from_bytes(first, "little"), int.from_bytes(second, "little"))
+    return result.to_bytes(len(first), "little")
+
+
+def _invert(mask: Any) -> Any:
+    """Инвертирует маску."""
+    if numpy is not None and isinstance(mask, numpy.ndarray):
+        return ~mask
+    return bytes(mask).translate(_NOT_TABLE)
+
+
+def _as_numpy_mask(mask: Any) -> Any:
+    """Приводит маску к булеву массиву NumPy."""
+    if isinstance(mask, numpy.ndarray):
+        return mask
+    return numpy.frombuffer(mask, dtype=numpy.uint8).astype(bool)
+
+
+def get_table_columnar(
+    table_name: str,
+    column_types: Dict[str, str],
+) -> Optional[ColumnarTable]:
+    """Возвращает столбцовое представление таблицы, строя его при необходимости.
+
+    Представление хранится вместе с закешированными строками: вставки
+    дописываются в него, обновления и удаления его сбрасывают.
+    """
+    state = get_table_state(table_name)
+    columnar = state.columnar
+    if columnar is None or columnar.column_types != column_types:
+        columnar = ColumnarTable.from_rows(column_types, state.rows.values())
+        state.columnar = columnar
+    return columnar
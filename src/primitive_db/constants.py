@@ -1,6 +1,35 @@
 META_FILE = "db_meta.json"
 DATA_DIR = "data"
 VALID_TYPES = {"int", "str", "bool"}
+STORAGE_FORMAT = "binary"
+STORAGE_FORMATS = ("binary", "jsonl")
+BINARY_PAGE_ROWS = 4096
+MAPPED_CACHE_PAGES = 64
+VACUUM_MIN_DEAD = 1000
+VACUUM_DEAD_RATIO = 0.5
+INT_MIN = -(2 ** 63)
+INT_MAX = 2 ** 63 - 1
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+LOAD_BATCH_SIZE = 10000
+SELECT_PAGE_SIZE = 100
+SORT_MEMORY_BYTES = 64 * 1024 * 1024
+COLUMNAR_SCANS = True
+COLUMNAR_MIN_ROWS = 10000
+INDEX_MAX_SELECTIVITY = 0.05
+COLUMNAR_INDEX_MAX_SELECTIVITY = 0.002
+PARALLEL_SCAN_WORKERS = 0
+PARALLEL_SCAN_MIN_ROWS = 1_000_000
+LOCK_DIR = "locks"
+WAL_FILE = "db_wal.log"
+WAL_FSYNC = "interval"
+WAL_FSYNC_INTERVAL_MS = 50
+WAL_CHECKPOINT_BYTES = 4 * 1024 * 1024
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 7433
+SERVER_WORKERS = 8
+SERVER_MAX_LINE = 16 * 1024 * 1024
+BATCH_GROUP_SIZE = 1000
+PLAN_CACHE_SIZE = 1024
 DEFAULT_PROMPT = ">>> Введите команду: "
 COMMAND_HISTORY_FILE = ".command_history"
 
@@ -9,11 +38,26 @@ HELP_MESSAGE = """
 
 Функции:
 <command> insert into <имя_таблицы> values (<значение1>, <значение2>, ...) - создать запись
+<command> insert into <имя_таблицы> values (...), (...), ... - создать несколько записей
+<command> load <имя_таблицы> from '<файл.csv|файл.jsonl>' - загрузить записи из файла
 <command> select from <имя_таблицы> where <столбец> = <значение> - прочитать записи по условию
 <command> select from <имя_таблицы> - прочитать все записи
+<command> select from <имя_таблицы> ... limit <n> offset <m> - прочитать часть записей
+<command> select from <имя_таблицы> ... order by <столбец> [asc|desc], ... - упорядочить записи
+<command> select from <таблица1> [left] join <таблица2> on <таблица1.столбец> = <таблица2.столбец> ... - соединить таблицы
+<command> select count(*), sum(<столбец>), ... from <имя_таблицы> [where ...] [group by <столбец>] - агрегаты
+<command> output <table|pages|tsv|jsonl> [размер_страницы] - режим вывода select
 <command> update <имя_таблицы> set <столбец1> = <новое_значение1> where <столбец_условия> = <значение_условия> - обновить запись
 <command> delete from <имя_таблицы> where <столбец> = <значение> - удалить запись
 <command> info <имя_таблицы> - вывести информацию о таблице
+<command> compact <имя_таблицы> - сжать файл таблицы
+<command> vacuum [<имя_таблицы>] - сжать таблицы с устаревшими записями
+<command> begin / commit / rollback - начать, зафиксировать или отменить транзакцию
+<command> prepare <имя> as <команда с ?> / execute <имя> (<значение1>, ...) - подготовленные команды
+<command> stats [json] - статистика кешей и время команд (p50, p95, p99)
+<command> analyze [<имя_таблицы>] - пересчитать статистику столбцов
+<command> explain <select|update|delete ...> - показать план поиска строк
+<command> explain analyze <команда> - выполнить команду и показать время ее фаз
 <command> create_table <имя_таблицы> <столбец1:тип> <столбец2:тип> .. - создать таблицу
 <command> list_tables - показать список всех таблиц
 <command> drop_table <имя_таблицы> - удалить таблицу
@@ -0,0 +1,44 @@
+import sys
+from typing import List
+
+from .utils import (
+    close_database,
+    convert_table_storage,
+    load_metadata,
+    recover_database,
+)
+
+
+def run_convert(storage_format: str, tables: List[str]) -> int:
+    """Переводит таблицы (по умолчанию все) в указанный формат, возвращает число ошибок.
+
+    Перед преобразованием проигрывается журнал, чтобы файлы таблиц
+    содержали все зафиксированные изменения.
+    """
+    recovered = recover_database()
+    if recovered:
+        print(f"Восстановлено из журнала операций: {recovered}")
+
+    known_tables = load_metadata()["tables"]
+    errors = 0
+    try:
+        for table_name in tables or list(known_tables):
+            if table_name not in known_tables:
+                errors += 1
+                print(f"Error: Table '{table_name}' does not exist.", file=sys.stderr)
+                continue
+            try:
+                source_format, size_before, size_after = convert_table_storage(
+                    table_name, storage_format
+                )
+            except (OSError, ValueError) as e:
+                errors += 1
+                print(f"Error: Failed to convert table '{table_name}': {str(e)}", file=sys.stderr)
+                continue
+            print(
+                f"Таблица {table_name}: {source_format} -> {storage_format}, "
+                f"размер {size_before} -> {size_after} байт"
+            )
+    finally:
+        close_database()
+    return errors
@@ -1,20 +1,78 @@
-from typing import Any, Dict, List
+import time
+from itertools import chain, islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from prettytable import PrettyTable
 
-from .constants import VALID_TYPES
-from .decorators import confirm_action, handle_db_errors, log_time
+from .aggregates import NUMERIC_FUNCTIONS, SelectItem, aggregate_rows, item_label
+from .columnar import get_table_columnar
+from .constants import (
+    COLUMNAR_SCANS,
+    INT_MAX,
+    INT_MIN,
+    LOAD_BATCH_SIZE,
+    SELECT_PAGE_SIZE,
+    VALID_TYPES,
+)
+from .decorators import confirm_action, handle_db_errors, write_locked
+from .formatters import render_rows
+from .indexes import INDEX_KINDS, get_table_indexes, lookup_index
+from .joins import (
+    INDEX_JOIN,
+    JoinSide,
+    hash_join,
+    index_join,
+    lookup_kind,
+    plan_join,
+    row_combiner,
+    split_qualified,
+    split_where,
+)
+from .metrics import phase, profile_scan
+from .parallel import parallel_scan
+from .planner import (
+    ALL_ROWS,
+    COLUMNAR,
+    EMPTY,
+    INDEX,
+    PARALLEL,
+    add_to_stats,
+    analyze_rows,
+    describe_scan,
+    estimate_rows,
+    init_table_stats,
+    plan_scan,
+    remove_from_stats,
+)
+from .predicates import compile_condition, condition_columns
+from .sorting import OrderItem, describe_sort, sort_key, sort_rows
 from .utils import (
-    get_next_id,
+    adjust_row_count,
+    append_table_rows,
+    atomic_write,
+    begin_transaction,
+    commit_transaction,
+    compact_table_data,
+    delete_table_rows,
+    drop_table_data,
+    in_transaction,
+    iter_import_file,
+    iter_table_rows,
     load_metadata,
-    load_table_data,
+    load_table_rows_by_id,
+    peek_next_id,
+    peek_row_count,
+    reserve_ids,
+    rollback_transaction,
     save_metadata,
     save_table_data,
+    table_dead_records,
     table_exists,
 )
 
 
 @handle_db_errors
+@write_locked
 def create_table(table_name: str, columns: Dict[str, str]) -> str:
     """Создает новую таблицу."""
     metadata = load_metadata()
@@ -29,15 +87,19 @@ def create_table(table_name: str, columns: Dict[str, str]) -> str:
     columns_with_id = {"ID": "int"}
     columns_with_id.update(columns)
 
-    metadata["tables"][table_name] = {"columns": columns_with_id}
-    save_metadata(metadata)
-    save_table_data(table_name, [])
+    table_meta = {"columns": columns_with_id, "next_id": 1, "row_count": 0}
+    init_table_stats(table_meta)
+    metadata["tables"][table_name] = table_meta
+    with atomic_write():
+        save_metadata(metadata)
+        save_table_data(table_name, [])
 
     return f"Table '{table_name}' created successfully."
 
 
 @handle_db_errors
 @confirm_action("table deletion")
+@write_locked
 def drop_table(table_name: str) -> str:
     """Удаляет таблицу."""
     metadata = load_metadata()
@@ -46,28 +108,21 @@ def drop_table(table_name: str) -> str:
         return f"Error: Table '{table_name}' does not exist."
 
     del metadata["tables"][table_name]
-    save_metadata(metadata)
-
-    import os
-
-    from .utils import get_table_file_path
-
-    try:
-        os.remove(get_table_file_path(table_name))
-    except FileNotFoundError:
-        pass
+    with atomic_write():
+        save_metadata(metadata)
+        drop_table_data(table_name)
 
     return f"Table '{table_name}' dropped successfully."
 
 
 @handle_db_errors
-@log_time
+@write_locked
 def insert_into(table_name: str, values: List[Any]) -> str:
     """Вставляет данные в таблицу."""
-    if not table_exists(table_name):
+    metadata = load_metadata()
+    if table_name not in metadata["tables"]:
         return f"Error: Table '{table_name}' does not exist."
 
-    metadata = load_metadata()
     table_meta = metadata["tables"][table_name]
     columns = list(table_meta["columns"].keys())
 
@@ -75,9 +130,7 @@ def insert_into(table_name: str, values: List[Any]) -> str:
     if len(values) != expected_values_count:
         return f"Error: Expected {expected_values_count} values, got {len(values)}."
 
-    data = load_table_data(table_name)
-    new_row = {"ID": get_next_id(data)}
-
+    new_row = {}
     data_columns = columns[1:]
 
     for i, col in enumerate(data_columns):
@@ -90,142 +143,538 @@ def insert_into(table_name: str, values: List[Any]) -> str:
         except ValueError as e:
             return str(e)
 
-    data.append(new_row)
-    save_table_data(table_name, data)
+    new_row = {"ID": reserve_ids(table_name, table_meta), **new_row}
+    adjust_row_count(table_name, table_meta, 1)
+    add_to_stats(table_meta, [new_row])
+    with atomic_write():
+        save_metadata(metadata)
+        append_table_rows(table_name, [new_row])
 
     return f"Запись с ID={new_row['ID']} успешно добавлена в таблицу \"{table_name}\"."
 
 
+def validate_rows(
+    table_meta: Dict[str, Any],
+    values_rows: Iterable[List[Any]],
+    first_row_number: int = 1,
+) -> List[Dict[str, Any]]:
+    """Проверяет и преобразует пачку строк значений (без ID)."""
+    columns = [(col, typ) for col, typ in table_meta["columns"].items() if col != "ID"]
+    expected_values_count = len(columns)
+    rows = []
+
+    for row_number, values in enumerate(values_rows, first_row_number):
+        if len(values) != expected_values_count:
+            raise ValueError(
+                f"Row {row_number}: expected {expected_values_count} values, got {len(values)}."
+            )
+        try:
+            rows.append({
+                col: validate_and_convert_value(value, col_type, col)
+                for (col, col_type), value in zip(columns, values)
+            })
+        except ValueError as e:
+            raise ValueError(f"Row {row_number}: {e}") from e
+
+    return rows
+
+
+def store_new_rows(
+    table_name: str,
+    metadata: Dict[str, Any],
+    rows: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """Выдает строкам ID и записывает их одной операцией хранилища."""
+    table_meta = metadata["tables"][table_name]
+    first_id = reserve_ids(table_name, table_meta, len(rows))
+    new_rows = [{"ID": row_id, **row} for row_id, row in enumerate(rows, first_id)]
+    adjust_row_count(table_name, table_meta, len(new_rows))
+    add_to_stats(table_meta, new_rows)
+    with atomic_write():
+        save_metadata(metadata)
+        append_table_rows(table_name, new_rows)
+    return new_rows
+
+
+def format_bulk_report(action: str, table_name: str, count: int, elapsed: float) -> str:
+    """Формирует отчет о массовой вставке со скоростью записи."""
+    rate = count / elapsed if elapsed > 0 else float(count)
+    return (
+        f"{count} записей {action} в таблицу \"{table_name}\" "
+        f"за {elapsed:.3f} с ({rate:.0f} записей/с)."
+    )
+
+
+@handle_db_errors
+@write_locked
+def insert_many(table_name: str, values_rows: List[List[Any]]) -> str:
+    """Вставляет несколько строк одной записью в хранилище."""
+    start_time = time.perf_counter()
+    metadata = load_metadata()
+    if table_name not in metadata["tables"]:
+        return f"Error: Table '{table_name}' does not exist."
+
+    try:
+        rows = validate_rows(metadata["tables"][table_name], values_rows)
+    except ValueError as e:
+        return f"Error: {e}"
+
+    new_rows = store_new_rows(table_name, metadata, rows)
+    elapsed = time.perf_counter() - start_time
+    return format_bulk_report("успешно добавлено", table_name, len(new_rows), elapsed)
+
+
+@handle_db_errors
+@write_locked
+def load_from_file(table_name: str, file_path: str) -> str:
+    """Загружает строки из CSV или JSONL файла.
+
+    Файл читается потоково, строки проверяются пачками по LOAD_BATCH_SIZE,
+    а в хранилище записываются одной операцией только если весь файл корректен.
+    """
+    start_time = time.perf_counter()
+    metadata = load_metadata()
+    if table_name not in metadata["tables"]:
+        return f"Error: Table '{table_name}' does not exist."
+
+    table_meta = metadata["tables"][table_name]
+    data_columns = [col for col in table_meta["columns"] if col != "ID"]
+    rows: List[Dict[str, Any]] = []
+
+    try:
+        records = iter_import_file(file_path, data_columns)
+        while True:
+            batch = list(islice(records, LOAD_BATCH_SIZE))
+            if not batch:
+                break
+            rows.extend(validate_rows(table_meta, batch, len(rows) + 1))
+    except FileNotFoundError:
+        return f"Error: File '{file_path}' not found."
+    except ValueError as e:
+        return f"Error: {e}"
+
+    if not rows:
+        return f"Error: File '{file_path}' contains no records."
+
+    store_new_rows(table_name, metadata, rows)
+    elapsed = time.perf_counter() - start_time
+    return format_bulk_report("загружено", table_name, len(rows), elapsed)
+
+
 @handle_db_errors
-@log_time
 def select_from(
     table_name: str,
     where_condition: Dict[str, Any] = None,
-) -> str:
-    """Выбирает данные из таблицы."""
-    if not table_exists(table_name):
+    order_by: Optional[List[OrderItem]] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    output_mode: str = "table",
+    page_size: int = SELECT_PAGE_SIZE,
+) -> Union[str, Iterator[str]]:
+    """Выбирает данные из таблицы.
+
+    В режиме "table" возвращает одну таблицу PrettyTable. В режимах "pages",
+    "tsv" и "jsonl" возвращает генератор фрагментов вывода: строки читаются
+    из хранилища лениво, и первый фрагмент доступен сразу. С ORDER BY
+    первый фрагмент доступен после сортировки (см. sorting.sort_rows).
+    """
+    metadata = load_metadata()
+    if table_name not in metadata["tables"]:
         return f"Error: Table '{table_name}' does not exist."
 
-    data = load_table_data(table_name)
+    table_meta = metadata["tables"][table_name]
+    columns = list(table_meta["columns"].keys())
+    for column, _ in order_by or ():
+        if column not in table_meta["columns"]:
+            return f"Error: Column '{column}' does not exist in table '{table_name}'."
+
+    rows = iter_matching_rows(
+        table_name, table_meta, where_condition, columnar=COLUMNAR_SCANS
+    )
+    if order_by:
+        keep = None if limit is None else offset + limit
+        rows = sort_rows(rows, sort_key(order_by, table_meta["columns"]), keep)
+    if offset or limit is not None:
+        rows = islice(rows, offset, None if limit is None else offset + limit)
+
+    first_row = next(rows, None)
+    if first_row is None:
+        return "No records found."
+    rows = chain([first_row], rows)
 
-    if where_condition:
-        filtered_data = []
-        for row in data:
-            if evaluate_where_condition(row, where_condition):
-                filtered_data.append(row)
-        data = filtered_data
+    return render_rows(columns, rows, output_mode, page_size)
 
-    if not data:
-        return "No records found."
 
-    table = PrettyTable()
+@handle_db_errors
+def aggregate_from(
+    table_name: str,
+    items: List[SelectItem],
+    where_condition: Dict[str, Any] = None,
+    group_by: Optional[str] = None,
+    order_by: Optional[List[OrderItem]] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    output_mode: str = "table",
+    page_size: int = SELECT_PAGE_SIZE,
+) -> Union[str, Iterator[str]]:
+    """Вычисляет COUNT, SUM, AVG, MIN, MAX с необязательной группировкой.
+
+    COUNT(*) без WHERE и GROUP BY берется из метаданных таблицы за O(1).
+    """
     metadata = load_metadata()
-    columns = list(metadata["tables"][table_name]["columns"].keys())
-    table.field_names = columns
+    if table_name not in metadata["tables"]:
+        return f"Error: Table '{table_name}' does not exist."
 
-    for row in data:
-        table.add_row([row.get(col, "") for col in columns])
+    table_meta = metadata["tables"][table_name]
+    column_types = table_meta["columns"]
+
+    if group_by is not None and group_by not in column_types:
+        return f"Error: Column '{group_by}' does not exist in table '{table_name}'."
+
+    for function, argument in items:
+        if function is None:
+            if argument != group_by:
+                return f"Error: Column '{argument}' must appear in GROUP BY."
+        elif argument == "*":
+            if function != "COUNT":
+                return f"Error: {function}(*) is not supported."
+        elif argument not in column_types:
+            return f"Error: Column '{argument}' does not exist in table '{table_name}'."
+        elif function in NUMERIC_FUNCTIONS and column_types[argument] == "str":
+            return f"Error: {function} requires a numeric column, '{argument}' is str."
+
+    columns = [item_label(item) for item in items]
+    for column, _ in order_by or ():
+        if column not in columns:
+            return f"Error: ORDER BY column '{column}' must appear in SELECT."
+
+    if counts_from_metadata(items, where_condition, group_by):
+        row_count = peek_row_count(table_name, table_meta)
+        result = [dict.fromkeys(columns, row_count)]
+    else:
+        rows = iter_matching_rows(
+            table_name, table_meta, where_condition, columnar=COLUMNAR_SCANS
+        )
+        result = aggregate_rows(items, rows, group_by)
+
+    if order_by:
+        keep = None if limit is None else offset + limit
+        result = list(sort_rows(result, sort_key(order_by, column_types), keep))
+    if offset or limit is not None:
+        result = result[offset:None if limit is None else offset + limit]
+
+    if not result:
+        return "No records found."
 
-    return table.get_string()
+    return render_rows(columns, result, output_mode, page_size)
 
 
-def evaluate_where_condition(row: Dict[str, Any], condition: Dict[str, Any]) -> bool:
-    """Вычисляет условие WHERE для строки."""
-    if not condition:
-        return True
+def counts_from_metadata(
+    items: List[SelectItem],
+    where_condition: Dict[str, Any],
+    group_by: Optional[str],
+) -> bool:
+    """Проверяет, берется ли результат агрегатов из счетчика строк в метаданных."""
+    return not where_condition and group_by is None and all(
+        item == ("COUNT", "*") for item in items
+    )
+
+
+@handle_db_errors
+def join_tables(
+    left_table: str,
+    right_table: str,
+    kind: str,
+    on: Tuple[str, str],
+    where_condition: Dict[str, Any] = None,
+    order_by: Optional[List[OrderItem]] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    output_mode: str = "table",
+    page_size: int = SELECT_PAGE_SIZE,
+) -> Union[str, Iterator[str]]:
+    """Соединяет строки двух таблиц по равенству столбцов (INNER или LEFT JOIN).
+
+    Столбцы результата называются таблица.столбец, сначала левой таблицы.
+    Способ соединения выбирает joins.plan_join, части WHERE, относящиеся
+    к одной таблице, проверяются при ее чтении.
+    """
+    sides = join_sides(left_table, right_table, kind, on, where_condition, order_by)
+    if isinstance(sides, str):
+        return sides
+    left, right, residual = sides
+
+    rows = iter_joined_rows(kind, left, right)
+    if residual:
+        rows = filter(compile_condition(residual), rows)
+    if order_by:
+        keep = None if limit is None else offset + limit
+        column_types = {**left.column_types(), **right.column_types()}
+        rows = sort_rows(rows, sort_key(order_by, column_types), keep)
+    if offset or limit is not None:
+        rows = islice(rows, offset, None if limit is None else offset + limit)
+
+    first_row = next(rows, None)
+    if first_row is None:
+        return "No records found."
+    rows = chain([first_row], rows)
 
-    col = condition.get("column")
-    op = condition.get("operator")
-    value = condition.get("value")
+    return render_rows(left.names() + right.names(), rows, output_mode, page_size)
 
-    if col not in row:
-        return False
 
-    row_value = row[col]
+def join_sides(
+    left_table: str,
+    right_table: str,
+    kind: str,
+    on: Tuple[str, str],
+    where_condition: Dict[str, Any],
+    order_by: Optional[List[OrderItem]],
+) -> Union[str, Tuple[JoinSide, JoinSide, Dict[str, Any]]]:
+    """Проверяет таблицы и столбцы соединения, делит WHERE между таблицами.
 
-    try:
-        if op == "=":
-            return row_value == value
-        elif op == "!=":
-            return row_value != value
-        elif op == ">":
-            return row_value > value
-        elif op == "<":
-            return row_value < value
-        elif op == ">=":
-            return row_value >= value
-        elif op == "<=":
-            return row_value <= value
-    except TypeError:
-        return False
-
-    return False
+    Возвращает (левая таблица, правая, остаток WHERE для строк соединения)
+    или сообщение об ошибке.
+    """
+    metadata = load_metadata()
+    for table_name in (left_table, right_table):
+        if table_name not in metadata["tables"]:
+            return f"Error: Table '{table_name}' does not exist."
+    if left_table == right_table:
+        return f"Error: Cannot join table '{left_table}' with itself."
+
+    column_types = {}
+    for table_name in (left_table, right_table):
+        for column, column_type in metadata["tables"][table_name]["columns"].items():
+            column_types[f"{table_name}.{column}"] = column_type
+    used = [*on, *condition_columns(where_condition), *(column for column, _ in order_by or ())]
+    for column in used:
+        if column not in column_types:
+            return f"Error: Column '{column}' does not exist in joined tables (use table.column)."
+
+    left_on, right_on = on
+    if split_qualified(left_on)[0] == right_table:
+        left_on, right_on = right_on, left_on
+    if split_qualified(left_on)[0] != left_table or split_qualified(right_on)[0] != right_table:
+        return f"Error: JOIN condition must compare columns of '{left_table}' and '{right_table}'."
+    if column_types[left_on] != column_types[right_on]:
+        return (
+            f"Error: Cannot join {column_types[left_on]} column '{left_on}' "
+            f"with {column_types[right_on]} column '{right_on}'."
+        )
+
+    left_condition, right_condition, residual = split_where(
+        where_condition, left_table, right_table, push_right=kind == "INNER"
+    )
+    sides = []
+    for table_name, column, condition in (
+        (left_table, left_on, left_condition),
+        (right_table, right_on, right_condition),
+    ):
+        table_meta = metadata["tables"][table_name]
+        total = peek_row_count(table_name, table_meta)
+        estimate = estimate_rows(table_meta, condition, total)
+        sides.append(JoinSide(
+            table_name, table_meta, split_qualified(column)[1], condition, total,
+            total if estimate is None else estimate,
+        ))
+    return sides[0], sides[1], residual
+
+
+def iter_matching_rows(
+    table_name: str,
+    table_meta: Dict[str, Any],
+    where_condition: Dict[str, Any] = None,
+    columnar: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """Лениво перебирает строки по условию WHERE способом, выбранным planner.plan_scan.
+
+    Двоичные таблицы от PARALLEL_SCAN_MIN_ROWS строк фильтруются в
+    нескольких процессах (см. parallel.py). При columnar=True остальные
+    большие таблицы без подходящего индекса фильтруются по столбцам
+    целиком (см. columnar.py). Результат в любом случае имеет тот же вид.
+    """
+    rows_by_id = load_table_rows_by_id(table_name)
+    strategy = plan_scan(table_meta, where_condition, rows_by_id, columnar)
+    if strategy == ALL_ROWS:
+        return profile_scan(iter(rows_by_id.values()), len(rows_by_id))
+    if strategy == EMPTY:
+        return iter(())
+
+    if strategy == INDEX:
+        ids = lookup_index(table_name, table_meta.get("indexes"), where_condition)
+        if ids is not None:
+            rows = filter(None, map(rows_by_id.get, sorted(ids)))
+            return profile_scan(filter(compile_condition(where_condition), rows), len(ids))
+
+    rows = None
+    if strategy == PARALLEL:
+        rows = parallel_scan(rows_by_id, where_condition)
+    elif strategy == COLUMNAR:
+        with phase("data"):
+            table = get_table_columnar(table_name, table_meta["columns"])
+        if table is not None and table.supports(where_condition):
+            with phase("filter"):
+                positions = table.filter_positions(where_condition)
+            rows = map(table.row, positions)
+    if rows is None:
+        rows = filter(compile_condition(where_condition), iter(rows_by_id.values()))
+    return profile_scan(rows, len(rows_by_id))
+
+
+def iter_joined_rows(kind: str, left: JoinSide, right: JoinSide) -> Iterator[Dict[str, Any]]:
+    """Лениво перебирает строки соединения способом, выбранным joins.plan_join."""
+    strategy, outer, inner = plan_join(kind, left, right)
+    outer_is_left = outer is left
+    combine = row_combiner(left, right, outer_is_left)
+    outer_rows = iter_matching_rows(
+        outer.table, outer.meta, outer.condition, columnar=COLUMNAR_SCANS
+    )
+    if strategy == INDEX_JOIN:
+        return index_join(
+            outer_rows, outer.column, index_finder(inner), combine,
+            outer_unmatched=kind == "LEFT",
+        )
+
+    inner_rows = iter_matching_rows(
+        inner.table, inner.meta, inner.condition, columnar=COLUMNAR_SCANS
+    )
+    return hash_join(
+        outer_rows, inner_rows, outer.column, inner.column, combine,
+        outer_unmatched=kind == "LEFT" and outer_is_left,
+        inner_unmatched=kind == "LEFT" and not outer_is_left,
+    )
+
+
+def index_finder(side: JoinSide) -> Callable[[Any], Iterable[Dict[str, Any]]]:
+    """Возвращает поиск строк таблицы по значению столбца ON: по ID или по индексу."""
+    rows_by_id = load_table_rows_by_id(side.table)
+    matches = compile_condition(side.condition)
+
+    if lookup_kind(side) == "ID":
+        def find_by_id(value: Any) -> Iterable[Dict[str, Any]]:
+            row = rows_by_id.get(value)
+            return (row,) if row is not None and matches(row) else ()
+        return find_by_id
+
+    index = get_table_indexes(side.table, side.meta.get("indexes"))[side.column]
+
+    def find_by_index(value: Any) -> Iterable[Dict[str, Any]]:
+        rows = filter(None, map(rows_by_id.get, sorted(index.lookup("=", value))))
+        return filter(matches, rows)
+    return find_by_index
+
+
+def find_matching_rows(
+    table_name: str,
+    table_meta: Dict[str, Any],
+    where_condition: Dict[str, Any] = None,
+) -> List[Dict[str, Any]]:
+    """Находит строки по условию WHERE, используя индекс, если он подходит."""
+    with phase("filter"):
+        return list(iter_matching_rows(table_name, table_meta, where_condition))
+
+
+def evaluate_where_condition(row: Dict[str, Any], condition: Dict[str, Any]) -> bool:
+    """Вычисляет условие WHERE для строки.
+
+    Для проверки многих строк выгоднее один раз вызвать compile_condition.
+    """
+    return compile_condition(condition)(row)
 
 
 @handle_db_errors
+@write_locked
 def update_table(
     table_name: str,
     updates: Dict[str, Any],
     where_condition: Dict[str, Any] = None,
 ) -> str:
     """Обновляет данные в таблице."""
-    if not table_exists(table_name):
+    metadata = load_metadata()
+    if table_name not in metadata["tables"]:
         return f"Error: Table '{table_name}' does not exist."
 
-    metadata = load_metadata()
     table_meta = metadata["tables"][table_name]
-    data = load_table_data(table_name)
-    updated_count = 0
-    updated_ids = []
-
-    for row in data:
-        if evaluate_where_condition(row, where_condition):
-            for col, value in updates.items():
-                col_type = table_meta["columns"][col]
-                try:
-                    validated_value = validate_and_convert_value(value, col_type, col)
-                    row[col] = validated_value
-                except ValueError as e:
-                    return str(e)
-            updated_count += 1
-            updated_ids.append(row["ID"])
+    # Строки хранятся по ID, и новая версия строки с другим ID не заменила
+    # бы прежнюю
+    if "ID" in updates:
+        return "Error: Column 'ID' cannot be updated."
+
+    validated_updates = {}
+    for col, value in updates.items():
+        col_type = table_meta["columns"][col]
+        try:
+            validated_updates[col] = validate_and_convert_value(value, col_type, col)
+        except ValueError as e:
+            return str(e)
+
+    matched_rows = find_matching_rows(table_name, table_meta, where_condition)
+    replaced_rows = []
+    updated_rows = []
+
+    for row in matched_rows:
+        new_row = dict(row)
+        new_row.update(validated_updates)
+        # Строки, значения которых не меняются, не дописываются в файл
+        if new_row != row:
+            replaced_rows.append(row)
+            updated_rows.append(new_row)
+
+    updated_count = len(matched_rows)
 
     if updated_count > 0:
-        save_table_data(table_name, data)
-        if len(updated_ids) == 1:
-            return f"Запись с ID={updated_ids[0]} в таблице \"{table_name}\" успешно обновлена."
+        if updated_rows:
+            save_rows_with_stats(table_name, metadata, replaced_rows, updated_rows, validated_updates)
+        if updated_count == 1:
+            return f"Запись с ID={matched_rows[0]['ID']} в таблице \"{table_name}\" успешно обновлена."
         else:
             return f"{updated_count} записей в таблице \"{table_name}\" успешно обновлено."
 
     return "No records matched the condition."
 
 
+def save_rows_with_stats(
+    table_name: str,
+    metadata: Dict[str, Any],
+    old_rows: List[Dict[str, Any]],
+    new_rows: List[Dict[str, Any]],
+    columns: Iterable[str],
+) -> None:
+    """Дописывает новые версии строк; метаданные сохраняются, если изменилась статистика."""
+    table_meta = metadata["tables"][table_name]
+    stats = table_meta.get("stats")
+    before = {column: dict(values) for column, values in stats.items()} if stats is not None else None
+    remove_from_stats(table_meta, old_rows, columns)
+    add_to_stats(table_meta, new_rows, columns)
+    if stats == before:
+        append_table_rows(table_name, new_rows)
+        return
+    with atomic_write():
+        save_metadata(metadata)
+        append_table_rows(table_name, new_rows)
+
+
 @handle_db_errors
 @confirm_action("record deletion")
+@write_locked
 def delete_from(table_name: str, where_condition: Dict[str, Any] = None) -> str:
     """Удаляет данные из таблицы."""
-    if not table_exists(table_name):
+    metadata = load_metadata()
+    if table_name not in metadata["tables"]:
         return f"Error: Table '{table_name}' does not exist."
 
-    data = load_table_data(table_name)
-
-    deleted_ids = []
-    if where_condition:
-        new_data = []
-        for row in data:
-            if evaluate_where_condition(row, where_condition):
-                deleted_ids.append(row["ID"])
-            else:
-                new_data.append(row)
-        data = new_data
-    else:
-        deleted_ids = [row["ID"] for row in data]
-        data = []
+    table_meta = metadata["tables"][table_name]
+    deleted_rows = find_matching_rows(table_name, table_meta, where_condition)
+    deleted_ids = [row["ID"] for row in deleted_rows]
 
     deleted_count = len(deleted_ids)
 
     if deleted_count > 0:
-        save_table_data(table_name, data)
+        adjust_row_count(table_name, table_meta, -deleted_count)
+        remove_from_stats(table_meta, deleted_rows)
+        with atomic_write():
+            save_metadata(metadata)
+            delete_table_rows(table_name, deleted_ids)
         if deleted_count == 1:
             return f"Запись с ID={deleted_ids[0]} успешно удалена из таблицы \"{table_name}\"."
         else:
@@ -235,14 +684,239 @@ def delete_from(table_name: str, where_condition: Dict[str, Any] = None) -> str:
 
 
 @handle_db_errors
-def info_table(table_name: str) -> str:
-    """Выводит информацию о таблице."""
+@write_locked
+def create_index(table_name: str, column: str, kind: str = "hash") -> str:
+    """Создает индекс по столбцу таблицы."""
+    metadata = load_metadata()
+
+    if table_name not in metadata["tables"]:
+        return f"Error: Table '{table_name}' does not exist."
+
+    table_meta = metadata["tables"][table_name]
+    if column not in table_meta["columns"]:
+        return f"Error: Column '{column}' does not exist in table '{table_name}'."
+
+    if kind not in INDEX_KINDS:
+        return f"Error: Invalid index type '{kind}'. Use: {', '.join(sorted(INDEX_KINDS))}."
+
+    indexes = table_meta.setdefault("indexes", {})
+    if column in indexes:
+        return f"Error: Index on '{table_name}({column})' already exists."
+
+    indexes[column] = kind
+    save_metadata(metadata)
+
+    return f"Index ({kind}) on '{table_name}({column})' created successfully."
+
+
+@handle_db_errors
+@write_locked
+def drop_index(table_name: str, column: str) -> str:
+    """Удаляет индекс по столбцу таблицы."""
+    metadata = load_metadata()
+
+    if table_name not in metadata["tables"]:
+        return f"Error: Table '{table_name}' does not exist."
+
+    indexes = metadata["tables"][table_name].get("indexes", {})
+    if column not in indexes:
+        return f"Error: Index on '{table_name}({column})' does not exist."
+
+    del indexes[column]
+    save_metadata(metadata)
+
+    return f"Index on '{table_name}({column})' dropped successfully."
+
+
+@handle_db_errors
+@write_locked
+def compact_table(table_name: str) -> str:
+    """Перезаписывает файл таблицы, оставляя только живые строки."""
     if not table_exists(table_name):
         return f"Error: Table '{table_name}' does not exist."
 
+    if in_transaction():
+        return "Error: COMPACT is not allowed inside a transaction."
+
+    live_count, removed_count = compact_table_data(table_name)
+    return (
+        f"Таблица \"{table_name}\" сжата: {live_count} записей, "
+        f"удалено устаревших версий: {removed_count}."
+    )
+
+
+@handle_db_errors
+@write_locked
+def vacuum_tables(table_name: Optional[str] = None) -> str:
+    """Сжимает указанную таблицу или все таблицы с устаревшими записями."""
+    if in_transaction():
+        return "Error: VACUUM is not allowed inside a transaction."
+
+    if table_name is not None:
+        if not table_exists(table_name):
+            return f"Error: Table '{table_name}' does not exist."
+        table_names = [table_name]
+    else:
+        table_names = [
+            name for name in load_metadata()["tables"] if table_dead_records(name) > 0
+        ]
+
+    if not table_names:
+        return "Устаревших записей нет."
+
+    lines = []
+    for name in table_names:
+        live_count, removed_count = compact_table_data(name)
+        lines.append(
+            f"Таблица \"{name}\": {live_count} записей, "
+            f"удалено устаревших версий: {removed_count}."
+        )
+    return "\n".join(lines)
+
+
+@handle_db_errors
+@write_locked
+def analyze_tables(table_name: Optional[str] = None) -> str:
+    """Пересчитывает статистику столбцов указанной таблицы или всех таблиц."""
+    metadata = load_metadata()
+    if table_name is not None:
+        if table_name not in metadata["tables"]:
+            return f"Error: Table '{table_name}' does not exist."
+        table_names = [table_name]
+    else:
+        table_names = list(metadata["tables"])
+
+    if not table_names:
+        return "No tables in database."
+
+    lines = []
+    for name in table_names:
+        count = analyze_rows(metadata["tables"][name], iter_table_rows(name))
+        lines.append(f"Статистика таблицы \"{name}\" обновлена: {count} записей.")
+    save_metadata(metadata)
+    return "\n".join(lines)
+
+
+@handle_db_errors
+def explain_scan(
+    keyword: str,
+    table_name: str,
+    where_condition: Dict[str, Any],
+    from_metadata: bool = False,
+    order_by: Optional[List[OrderItem]] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> str:
+    """Описывает, как команда найдет и упорядочит строки таблицы, не выполняя ее."""
+    metadata = load_metadata()
+    if table_name not in metadata["tables"]:
+        return f"Error: Table '{table_name}' does not exist."
+
+    table_meta = metadata["tables"][table_name]
+    lines = [f"План {keyword} для таблицы \"{table_name}\""]
+    if from_metadata:
+        lines.append("Способ: число записей из метаданных, данные не читаются")
+        return "\n".join(lines)
+
+    rows_by_id = load_table_rows_by_id(table_name)
+    columnar = COLUMNAR_SCANS and keyword == "SELECT"
+    strategy = plan_scan(table_meta, where_condition, rows_by_id, columnar)
+    estimate = estimate_rows(table_meta, where_condition, len(rows_by_id))
+    lines.append(f"Способ: {describe_scan(strategy, table_meta, where_condition)}")
+    lines.append(f"Записей в таблице: {len(rows_by_id)}")
+    if estimate is None:
+        lines.append("Ожидается записей: неизвестно (нет статистики, выполните ANALYZE)")
+    else:
+        lines.append(f"Ожидается записей: ~{estimate:.0f}")
+    if order_by:
+        keep = None if limit is None else offset + limit
+        lines.append(f"Сортировка: {describe_sort(order_by, keep)}")
+    return "\n".join(lines)
+
+
+@handle_db_errors
+def explain_join(
+    left_table: str,
+    right_table: str,
+    kind: str,
+    on: Tuple[str, str],
+    where_condition: Dict[str, Any],
+    order_by: Optional[List[OrderItem]] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> str:
+    """Описывает, как будет выполнено соединение таблиц, не выполняя его."""
+    sides = join_sides(left_table, right_table, kind, on, where_condition, order_by)
+    if isinstance(sides, str):
+        return sides
+    left, right, residual = sides
+
+    strategy, outer, inner = plan_join(kind, left, right)
+    lines = [f"План SELECT: {kind} JOIN таблиц \"{left_table}\" и \"{right_table}\""]
+    if strategy == INDEX_JOIN:
+        lines.append("Способ: вложенные циклы по индексу")
+    else:
+        lines.append(f"Способ: хеш-соединение, хеш-таблица по \"{inner.table}\"")
+
+    for role, side in (("Внешняя", outer), ("Внутренняя", inner)):
+        if strategy == INDEX_JOIN and side is inner:
+            kind_name = lookup_kind(side)
+            lookup = "по ID" if kind_name == "ID" else f"по индексу {side.column} ({kind_name})"
+            lines.append(f"{role} таблица \"{side.table}\": поиск пар {lookup}")
+            continue
+        rows_by_id = load_table_rows_by_id(side.table)
+        strategy_name = plan_scan(side.meta, side.condition, rows_by_id, COLUMNAR_SCANS)
+        lines.append(
+            f"{role} таблица \"{side.table}\": "
+            f"{describe_scan(strategy_name, side.meta, side.condition)}, "
+            f"ожидается записей: ~{side.rows:.0f}"
+        )
+    if residual:
+        columns = ", ".join(dict.fromkeys(condition_columns(residual)))
+        lines.append(f"Условие после соединения: {columns}")
+    if order_by:
+        keep = None if limit is None else offset + limit
+        lines.append(f"Сортировка: {describe_sort(order_by, keep)}")
+    return "\n".join(lines)
+
+
+def begin() -> str:
+    """Открывает транзакцию."""
+    if in_transaction():
+        return "Error: Transaction already in progress."
+
+    begin_transaction()
+    return "Транзакция начата."
+
+
+@handle_db_errors
+def commit() -> str:
+    """Фиксирует транзакцию: одна запись в журнал и по одной записи на таблицу."""
+    if not in_transaction():
+        return "Error: No transaction in progress."
+
+    tables_count = commit_transaction()
+    return f"Транзакция зафиксирована, изменено таблиц: {tables_count}."
+
+
+def rollback() -> str:
+    """Отменяет транзакцию без обращения к диску."""
+    if not in_transaction():
+        return "Error: No transaction in progress."
+
+    rollback_transaction()
+    return "Транзакция отменена."
+
+
+@handle_db_errors
+def info_table(table_name: str) -> str:
+    """Выводит информацию о таблице."""
     metadata = load_metadata()
+    if table_name not in metadata["tables"]:
+        return f"Error: Table '{table_name}' does not exist."
+
     table_meta = metadata["tables"][table_name]
-    data = load_table_data(table_name)
+    records_count = peek_row_count(table_name, table_meta)
 
     columns_info = ", ".join([
         f"{col}:{typ}" for col, typ in table_meta["columns"].items()
@@ -251,16 +925,30 @@ def info_table(table_name: str) -> str:
     result = [
         f"Таблица: {table_name}",
         f"Столбцы: {columns_info}",
-        f"Количество записей: {len(data)}"
+        f"Количество записей: {records_count}",
+        f"Следующий ID: {peek_next_id(table_name, table_meta)}",
     ]
 
+    indexes = table_meta.get("indexes")
+    if indexes:
+        indexes_info = ", ".join(f"{col}:{kind}" for col, kind in indexes.items())
+        result.append(f"Индексы: {indexes_info}")
+
     return "\n".join(result)
 
 
+def check_int_range(number: int, column_name: str) -> int:
+    """Проверяет, что целое помещается в 64 бита."""
+    if not INT_MIN <= number <= INT_MAX:
+        raise ValueError(f"Integer {number} is out of 64-bit range for column '{column_name}'.")
+    return number
+
+
 def validate_and_convert_value(value: Any, expected_type: str, column_name: str) -> Any:
     """Проверяет и преобразует значение к ожидаемому типу."""
-    if expected_type == "int" and isinstance(value, int):
-        return value
+    # bool - подкласс int: True в столбце int преобразуется в 1 ниже
+    if expected_type == "int" and isinstance(value, int) and not isinstance(value, bool):
+        return check_int_range(value, column_name)
     elif expected_type == "str" and isinstance(value, str):
         return value
     elif expected_type == "bool" and isinstance(value, bool):
@@ -269,7 +957,7 @@ def validate_and_convert_value(value: Any, expected_type: str, column_name: str)
     try:
         if expected_type == "int":
             if isinstance(value, str):
-                return int(value)
+                number = int(value)
             elif isinstance(value, bool):
                 return int(value)
             else:
@@ -294,6 +982,10 @@ def validate_and_convert_value(value: Any, expected_type: str, column_name: str)
     except (ValueError, TypeError) as e:
         raise ValueError(f"Error converting value '{value}' to {expected_type} for column '{column_name}': {str(e)}") from e
 
+    # Диапазон разобранной строки проверяется вне try, чтобы сообщение
+    # совпадало с проверкой целого выше
+    if expected_type == "int":
+        return check_int_range(number, column_name)
     return value
 
 
@@ -309,9 +1001,8 @@ def show_tables() -> str:
     table.field_names = ["Table Name", "Columns Count", "Records Count"]
 
     for table_name, table_meta in metadata["tables"].items():
-        data = load_table_data(table_name)
         columns_count = len(table_meta["columns"])
-        records_count = len(data)
+        records_count = peek_row_count(table_name, table_meta)
         table.add_row([table_name, columns_count, records_count])
 
     return table.get_string()
@@ -1,6 +1,13 @@
-import time
+from contextvars import ContextVar
 from functools import wraps
-from typing import Any, Callable
+from typing import Any, Callable, Optional
+
+from .cache import MISSING, LRUCache, Stamp
+from .constants import CACHE_MAX_BYTES
+from .locks import writer_lock
+
+# Per-session switch for interactive confirmations
+confirmations_enabled: ContextVar[bool] = ContextVar("confirmations_enabled", default=True)
 
 
 def handle_db_errors(func: Callable) -> Callable:
@@ -19,6 +26,8 @@ def confirm_action(action: str) -> Callable:
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not confirmations_enabled.get():
+                return func(*args, **kwargs)
             confirmation = input(f"Confirm {action} (y/N): ")
             if confirmation.lower() != "y":
                 return "Action cancelled."
@@ -27,42 +36,44 @@ def confirm_action(action: str) -> Callable:
     return decorator
 
 
-def log_time(func: Callable) -> Callable:
-    """Log the execution time of a function."""
+def write_locked(func: Callable) -> Callable:
+    """Run a mutating command under the database writer lock.
+
+    The lock covers the whole read-modify-write of metadata and rows, so
+    concurrent processes sharing DATA_DIR cannot lose each other's updates.
+    """
     @wraps(func)
     def wrapper(*args: Any, **kwargs: Any) -> Any:
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
-        print(f"Execution time: {end_time - start_time:.4f} seconds")
-        return result
+        with writer_lock():
+            return func(*args, **kwargs)
     return wrapper
 
 
-def cache_results(max_size: int = 128) -> Callable:
-    """Cache decorator with max size limit."""
+def cache_results(
+    stamp: Callable[..., Stamp],
+    max_bytes: int = CACHE_MAX_BYTES,
+    cost: Optional[Callable[[Any], int]] = None,
+) -> Callable:
+    """Cache decorator validated by a file stamp, with LRU eviction by memory budget.
+
+    ``stamp`` receives the same positional arguments as the decorated function
+    and returns the (mtime, size) stamp of the file the result was parsed from.
+    The underlying ``LRUCache`` is exposed as ``wrapper.cache`` for write-through.
+    """
     def decorator(func: Callable) -> Callable:
-        cache = {}
-        keys = []
+        cache = LRUCache(max_bytes)
 
         @wraps(func)
-        def wrapper(*args: Any, **kwargs: Any) -> Any:
-            key = str(args) + str(kwargs)
-
-            if key in cache:
-                return cache[key]
-
-            result = func(*args, **kwargs)
-
-            if len(keys) >= max_size:
-                oldest_key = keys.pop(0)
-                del cache[oldest_key]
-
-            cache[key] = result
-            keys.append(key)
-
+        def wrapper(*args: Any) -> Any:
+            current_stamp = stamp(*args)
+            result = cache.get(args, current_stamp)
+            if result is MISSING:
+                result = func(*args)
+                size = cost(result) if cost else max(current_stamp[1], 0)
+                cache.put(args, current_stamp, result, size)
             return result
+
+        wrapper.cache = cache
+        wrapper.stamp = stamp
         return wrapper
     return decorator
-
-cacher = cache_results()
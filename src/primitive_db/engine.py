@@ -1,178 +1,335 @@
-import shlex
-from typing import List, Tuple
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
-from .constants import DEFAULT_PROMPT
+from .aggregates import SelectItem
+from .constants import DEFAULT_PROMPT, SELECT_PAGE_SIZE
 from .core import (
+    aggregate_from,
+    analyze_tables,
+    begin,
+    commit,
+    compact_table,
+    counts_from_metadata,
+    create_index,
     create_table,
     delete_from,
+    drop_index,
     drop_table,
+    explain_join,
+    explain_scan,
     info_table,
     insert_into,
+    insert_many,
+    join_tables,
+    load_from_file,
+    rollback,
     select_from,
     update_table,
+    vacuum_tables,
 )
 from .decorators import handle_db_errors
-from .parser import (
-    parse_create_table,
-    parse_set_clause,
-    parse_values_clause,
-    parse_where_condition,
+from .metrics import (
+    EXECUTE,
+    PARSE,
+    QueryProfile,
+    active_profile,
+    complete,
+    export_json,
+    format_profile,
+    phase,
+    stats_summary,
 )
+from .parser import ParseError, parse_statement
+from .plans import (
+    Plan,
+    PreparedStatement,
+    bind_parameters,
+    cache_summary,
+    cached_plan,
+    get_prepared,
+    prepared_count,
+    set_prepared,
+    statement_cache,
+)
+from .sorting import OrderItem
+from .statements import (
+    Analyze,
+    Command,
+    Compact,
+    CreateIndex,
+    CreateTable,
+    Deallocate,
+    Delete,
+    DropIndex,
+    DropTable,
+    Execute,
+    Explain,
+    Info,
+    Insert,
+    Load,
+    Output,
+    Prepare,
+    Select,
+    SelectJoin,
+    Statement,
+    Stats,
+    Update,
+    Vacuum,
+)
+from .utils import close_database, in_transaction, load_table_state, recover_database
 
-
-def parse_command(command: str) -> Tuple[str, List[str]]:
-    """Парсит команду и возвращает основную команду и части."""
-    try:
-        parts = shlex.split(command.strip())
-        if not parts:
-            return "", []
-
-        main_command = parts[0].upper()
-        return main_command, parts
-    except Exception:
-        return "ERROR", []
+# Режим вывода SELECT и размер страницы для текущего сеанса
+output_settings: ContextVar[Tuple[str, int]] = ContextVar(
+    "output_settings", default=("table", SELECT_PAGE_SIZE)
+)
 
 
 @handle_db_errors
-def execute_command(command: str) -> str:
+def execute_command(command: str) -> Union[str, Iterable[str]]:
     """Выполняет команду базы данных."""
-    main_command, parts = parse_command(command)
+    profile = QueryProfile()
+    profile.switch(PARSE)
+    return run_plan(plan_command(command), profile)
 
-    if not main_command:
-        return ""
 
-    command_handlers = {
-        "CREATE": handle_create_table,
-        "DROP": handle_drop_table,
-        "INSERT": handle_insert,
-        "SELECT": handle_select,
-        "UPDATE": handle_update,
-        "DELETE": handle_delete,
-        "INFO": handle_info,
-        "EXIT": lambda _: "EXIT",
-        "HELP": lambda _: get_help(),
-    }
+def plan_command(command: str) -> Union[str, Plan]:
+    """Возвращает план команды.
 
-    handler = command_handlers.get(main_command)
-    if handler:
-        return handler(parts)
-    else:
-        return f"Error: Unknown command '{main_command}'"
+    Разобранные команды кешируются по нормализованному тексту, поэтому
+    повторяющиеся команды не разбираются заново. EXECUTE в кеш не
+    попадает: значения параметров каждый раз разные.
+    """
+    if command.lstrip()[:7].upper() == "EXECUTE":
+        return plan_text(command)
+    return cached_plan(command, plan_text)
 
 
-def handle_create_table(parts: List[str]) -> str:
-    """Обрабатывает команду CREATE TABLE."""
-    if len(parts) < 4:
-        return "Error: Invalid CREATE TABLE syntax. Use: CREATE TABLE table_name (column1 type1, ...)"
-
+def plan_text(command: str) -> Union[str, Plan]:
+    """Разбирает текст команды в план или возвращает сообщение об ошибке."""
     try:
-        table_name, columns = parse_create_table(parts)
-        return create_table(table_name, columns)
-    except Exception as e:
+        statement = parse_statement(command)
+    except ParseError as e:
         return f"Error: {str(e)}"
+    if statement is None:
+        return ""
+    return build_plan(statement)
 
 
-def handle_drop_table(parts: List[str]) -> str:
-    """Обрабатывает команду DROP TABLE."""
-    if len(parts) < 3 or parts[1].upper() != 'TABLE':
-        return "Error: Invalid DROP TABLE syntax. Use: DROP TABLE table_name"
-
-    table_name = parts[2]
-    return drop_table(table_name)
-
-
-def handle_insert(parts: List[str]) -> str:
-    """Обрабатывает команду INSERT INTO."""
-    if len(parts) < 4 or parts[1].upper() != 'INTO':
-        return "Error: Invalid INSERT syntax. Use: INSERT INTO table_name VALUES (...)"
-
-    table_name = parts[2]
-
-    # Находим часть VALUES
-    command_str = ' '.join(parts)
-    values_index = command_str.upper().find('VALUES')
-    if values_index == -1:
-        return "Error: VALUES clause not found"
-
-    values_str = command_str[values_index + 6:].strip()
+@handle_db_errors
+def execute_plan(plan: Union[str, Plan]) -> Union[str, Iterable[str]]:
+    """Выполняет заранее разобранную команду."""
+    return run_plan(plan)
+
+
+def run_plan(
+    plan: Union[str, Plan],
+    profile: Optional[QueryProfile] = None,
+) -> Union[str, Iterable[str]]:
+    """Выполняет план команды; строка - готовый ответ (ошибка разбора).
+
+    Время фаз команды собирается в профиль и попадает в статистику STATS
+    по виду команды; время ленивого ответа учитывается по мере выдачи.
+    """
+    if isinstance(plan, str):
+        return plan
+    if profile is None:
+        profile = QueryProfile()
+    token = active_profile.set(profile)
+    profile.switch(EXECUTE)
     try:
-        values = parse_values_clause(values_str)
-        return insert_into(table_name, values)
-    except Exception as e:
-        return f"Error: {str(e)}"
-
-
-def handle_select(parts: List[str]) -> str:
-    """Обрабатывает команду SELECT FROM."""
-    if len(parts) < 3 or parts[1].upper() != 'FROM':
-        return "Error: Invalid SELECT syntax. Use: SELECT FROM table_name [WHERE condition]"
-
-    table_name = parts[2]
-
-    # Обрабатываем WHERE условие если есть
-    where_condition = {}
-    command_str = ' '.join(parts)
-    where_index = command_str.upper().find('WHERE')
-    if where_index != -1:
-        where_clause = command_str[where_index + 5:].strip()
-        where_condition = parse_where_condition(where_clause)
-
-    return select_from(table_name, where_condition)
-
-
-def handle_update(parts: List[str]) -> str:
-    """Обрабатывает команду UPDATE."""
-    if len(parts) < 4 or parts[2].upper() != 'SET':
-        return "Error: Invalid UPDATE syntax. Use: UPDATE table_name SET column=value [WHERE condition]"
-
-    table_name = parts[1]
-
-    # Находим SET и WHERE части
-    command_str = ' '.join(parts)
-    set_index = command_str.upper().find('SET')
-    where_index = command_str.upper().find('WHERE')
-
-    set_clause = command_str[set_index + 3:where_index].strip() if where_index != -1 else command_str[set_index + 3:].strip()
+        result = plan.run()
+    finally:
+        profile.switch(None)
+        active_profile.reset(token)
+    return complete(plan_keyword(plan), profile, result)
+
+
+def build_plan(statement: Statement) -> Plan:
+    """Строит план выполнения разобранной команды."""
+    plan_builders: Dict[type, Callable[[Any], tuple]] = {
+        CreateTable: lambda s: (create_table, s.table, s.columns),
+        DropTable: lambda s: (drop_table, s.table),
+        CreateIndex: lambda s: (create_index, s.table, s.column, s.kind),
+        DropIndex: lambda s: (drop_index, s.table, s.column),
+        Insert: lambda s: (
+            (insert_into, s.table, s.rows[0]) if len(s.rows) == 1
+            else (insert_many, s.table, s.rows)
+        ),
+        Load: lambda s: (load_from_file, s.table, s.path),
+        Select: lambda s: (
+            run_select, s.table, s.items, s.where, s.group_by, s.order_by, s.limit, s.offset
+        ),
+        SelectJoin: lambda s: (
+            run_join, s.left, s.right, s.kind, s.on, s.where, s.order_by, s.limit, s.offset
+        ),
+        Update: lambda s: (update_table, s.table, s.assignments, s.where),
+        Delete: lambda s: (delete_from, s.table, s.where),
+        Info: lambda s: (info_table, s.table),
+        Compact: lambda s: (compact_table, s.table),
+        Vacuum: lambda s: (vacuum_tables, s.table),
+        Analyze: lambda s: (analyze_tables, s.table),
+        Output: lambda s: (set_output, s.mode, s.page_size),
+        Prepare: lambda s: (
+            prepare_statement, s.name,
+            PreparedStatement(build_plan(s.statement), s.parameters),
+        ),
+        Execute: lambda s: (execute_prepared, s.name, s.values),
+        Deallocate: lambda s: (deallocate_statement, s.name),
+        Explain: lambda s: (
+            (explain_analyze, build_plan(s.statement)) if s.analyze
+            else (explain_statement, s.statement)
+        ),
+        Stats: lambda s: (get_stats, s.json_format),
+        Command: lambda s: (COMMAND_FUNCTIONS[s.keyword],),
+    }
+    return Plan(statement.keyword, *plan_builders[type(statement)](statement))
+
+
+def plan_keyword(plan: Plan) -> str:
+    """Возвращает вид команды плана; для EXECUTE - вид подготовленной команды."""
+    if plan.function is execute_prepared:
+        prepared = get_prepared(plan.args[0])
+        if prepared is not None:
+            return prepared.plan.keyword
+    return plan.keyword
+
+
+def run_select(
+    table_name: str,
+    items: Optional[List[SelectItem]],
+    where_condition: Dict[str, Any],
+    group_by: Optional[str],
+    order_by: Optional[List[OrderItem]],
+    limit: Optional[int],
+    offset: int,
+) -> Union[str, Iterable[str]]:
+    """Выполняет SELECT в текущем режиме вывода сеанса."""
+    output_mode, page_size = output_settings.get()
+    if items is None:
+        return select_from(
+            table_name, where_condition, order_by, limit, offset, output_mode, page_size
+        )
+    return aggregate_from(
+        table_name, items, where_condition, group_by, order_by, limit, offset,
+        output_mode, page_size,
+    )
+
+
+def run_join(
+    left_table: str,
+    right_table: str,
+    kind: str,
+    on: Tuple[str, str],
+    where_condition: Dict[str, Any],
+    order_by: Optional[List[OrderItem]],
+    limit: Optional[int],
+    offset: int,
+) -> Union[str, Iterable[str]]:
+    """Выполняет SELECT с JOIN в текущем режиме вывода сеанса."""
+    output_mode, page_size = output_settings.get()
+    return join_tables(
+        left_table, right_table, kind, on, where_condition, order_by, limit, offset,
+        output_mode, page_size,
+    )
+
+
+def set_output(output_mode: Optional[str], page_size: Optional[int]) -> str:
+    """Меняет режим вывода сеанса (None - оставить прежнее значение)."""
+    current_mode, current_page_size = output_settings.get()
+    output_mode = output_mode or current_mode
+    page_size = page_size or current_page_size
+    output_settings.set((output_mode, page_size))
+    return f"Режим вывода: {output_mode}, размер страницы: {page_size}"
+
+
+def prepare_statement(name: str, prepared: PreparedStatement) -> str:
+    """Сохраняет подготовленную команду в сеансе."""
+    set_prepared(name, prepared)
+    return f"Команда '{name}' подготовлена, параметров: {prepared.parameters}."
+
+
+def execute_prepared(name: str, values: List[Any]) -> Union[str, Iterable[str]]:
+    """Выполняет подготовленную команду с указанными значениями параметров."""
+    prepared = get_prepared(name)
+    if prepared is None:
+        return f"Error: Prepared statement '{name}' does not exist."
 
     try:
-        updates = parse_set_clause(set_clause)
-    except Exception as e:
-        return f"Error parsing SET clause: {str(e)}"
-
-    # Обрабатываем WHERE условие если есть
-    where_condition = {}
-    if where_index != -1:
-        where_clause = command_str[where_index + 5:].strip()
-        where_condition = parse_where_condition(where_clause)
-
-    return update_table(table_name, updates, where_condition)
-
-
-def handle_delete(parts: List[str]) -> str:
-    """Обрабатывает команду DELETE FROM."""
-    if len(parts) < 3 or parts[1].upper() != 'FROM':
-        return "Error: Invalid DELETE syntax. Use: DELETE FROM table_name [WHERE condition]"
-
-    table_name = parts[2]
-
-    # Обрабатываем WHERE условие если есть
-    where_condition = {}
-    command_str = ' '.join(parts)
-    where_index = command_str.upper().find('WHERE')
-    if where_index != -1:
-        where_clause = command_str[where_index + 5:].strip()
-        where_condition = parse_where_condition(where_clause)
-
-    return delete_from(table_name, where_condition)
-
-
-def handle_info(parts: List[str]) -> str:
-    """Обрабатывает команду INFO."""
-    if len(parts) < 2:
-        return "Error: Invalid INFO syntax. Use: INFO table_name"
-
-    table_name = parts[1]
-    return info_table(table_name)
+        plan = bind_parameters(prepared, values)
+    except ValueError as e:
+        return f"Error: {str(e)}."
+    return plan.run()
+
+
+def deallocate_statement(name: str) -> str:
+    """Удаляет подготовленную команду сеанса."""
+    if get_prepared(name) is None:
+        return f"Error: Prepared statement '{name}' does not exist."
+
+    set_prepared(name, None)
+    return f"Команда '{name}' удалена."
+
+
+def explain_statement(statement: Statement) -> str:
+    """Описывает способ поиска строк SELECT, UPDATE или DELETE, не выполняя команду."""
+    if isinstance(statement, SelectJoin):
+        return explain_join(
+            statement.left, statement.right, statement.kind, statement.on, statement.where,
+            statement.order_by, statement.limit, statement.offset,
+        )
+    if not isinstance(statement, Select):
+        return explain_scan(statement.keyword, statement.table, statement.where)
+
+    from_metadata = statement.items is not None and counts_from_metadata(
+        statement.items, statement.where, statement.group_by
+    )
+    return explain_scan(
+        statement.keyword, statement.table, statement.where, from_metadata,
+        statement.order_by, statement.limit, statement.offset,
+    )
+
+
+def explain_analyze(plan: Plan) -> str:
+    """Выполняет команду с подробным профилем и описывает время ее фаз.
+
+    Команда выполняется по-настоящему (изменения сохраняются), ответ
+    вычисляется целиком, но не выводится. Время разбора берется у EXPLAIN.
+    """
+    outer = active_profile.get()
+    profile = QueryProfile(detailed=True)
+    if outer is not None:
+        profile.phases[PARSE] = outer.phases[PARSE]
+    token = active_profile.set(profile)
+    profile.switch(EXECUTE)
+    try:
+        result = plan.run()
+        if isinstance(result, str):
+            if result.startswith("Error:"):
+                return result
+        else:
+            with phase("format"):
+                for _ in result:
+                    pass
+    finally:
+        profile.switch(None)
+        active_profile.reset(token)
+    return format_profile(plan_keyword(plan), profile)
+
+
+def get_stats(json_format: bool = False) -> str:
+    """Возвращает статистику кешей, подготовленных команд и времени команд.
+
+    STATS JSON возвращает только время команд, одним объектом JSON.
+    """
+    if json_format:
+        return export_json()
+    return "\n".join([
+        cache_summary("Кеш разобранных команд", statement_cache),
+        cache_summary("Кеш таблиц", load_table_state.cache),
+        f"Подготовленных команд в сеансе: {prepared_count()}",
+        "Время команд:",
+        *stats_summary(),
+    ])
 
 
 def get_help() -> str:
@@ -187,11 +344,40 @@ CREATE TABLE имя_таблицы (столбе1 тип1, столбе2 тип2
 DROP TABLE имя_таблицы
     - Удаляет таблицу и все ее данные
 
-INSERT INTO имя_таблицы VALUES (значение1, значение2, ...)
-    - Вставляет новую запись в таблицу (ID генерируется автоматически)
+CREATE INDEX ON имя_таблицы(столбец) [USING hash|sorted]
+    - Создает индекс: hash для = и !=, sorted для =, <, <=, >, >=
+
+DROP INDEX ON имя_таблицы(столбец)
+    - Удаляет индекс
+
+INSERT INTO имя_таблицы VALUES (значение1, значение2, ...)[, (...), ...]
+    - Вставляет одну или несколько записей (ID генерируется автоматически)
 
-SELECT FROM имя_таблицы [WHERE условие]
+LOAD имя_таблицы FROM 'файл.csv' | 'файл.jsonl'
+    - Загружает записи из файла одной операцией записи
+
+SELECT FROM имя_таблицы [WHERE условие] [ORDER BY столбец [ASC|DESC], ...]
+       [LIMIT n] [OFFSET m]
     - Выбирает данные из таблицы
+    - Условие: сравнения =, !=, <>, <, <=, >, >=, IN (...), BETWEEN a AND b,
+      LIKE 'шаблон%', объединенные AND, OR, NOT и скобками
+    - ORDER BY с LIMIT отбирает первые записи кучей; большой результат
+      без LIMIT сортируется слиянием через временные файлы
+
+SELECT FROM таблица1 [INNER|LEFT] JOIN таблица2 ON таблица1.столбец = таблица2.столбец
+       [WHERE условие] [ORDER BY ...] [LIMIT n] [OFFSET m]
+    - Соединяет таблицы по равенству столбцов; столбцы результата и
+      столбцы в условиях указываются как таблица.столбец
+    - По индексу (или ID) столбца соединения пары ищутся для каждой строки,
+      иначе хеш-таблица строится по меньшей таблице
+
+SELECT COUNT(*), SUM(столбец), AVG(столбец), MIN(столбец), MAX(столбец)
+       FROM имя_таблицы [WHERE условие] [GROUP BY столбец] [ORDER BY ...]
+    - Агрегаты за один проход; COUNT(*) без условия берется из метаданных
+
+OUTPUT table|pages|tsv|jsonl [размер_страницы]
+    - Режим вывода SELECT: одна таблица, таблицы по страницам
+      или потоковый вывод строк в TSV/JSONL
 
 UPDATE имя_таблицы SET столбец1=новое_значение1 [WHERE условие]
     - Обновляет данные в таблице
@@ -202,6 +388,38 @@ DELETE FROM имя_таблицы [WHERE условие]
 INFO имя_таблицы
     - Показывает информацию о таблице
 
+COMPACT имя_таблицы
+    - Перезаписывает файл таблицы, удаляя устаревшие версии строк
+
+VACUUM [имя_таблицы]
+    - Сжимает таблицу или все таблицы, где есть устаревшие записи
+
+ANALYZE [имя_таблицы]
+    - Пересчитывает статистику столбцов (границы, число различных
+      и пустых значений); при записи она обновляется сама
+
+BEGIN / COMMIT / ROLLBACK
+    - Транзакция: изменения накапливаются в памяти, COMMIT записывает
+      их одной операцией на таблицу, ROLLBACK отменяет без записи на диск
+
+PREPARE имя AS команда
+EXECUTE имя [(значение1, значение2, ...)]
+DEALLOCATE имя
+    - Подготовленная команда: разбирается один раз, знаки ? на месте
+      значений заменяются значениями из EXECUTE по порядку
+
+STATS [JSON]
+    - Статистика кешей и время команд по видам: число, p50, p95, p99;
+      JSON - время команд для систем мониторинга
+
+EXPLAIN SELECT ... | UPDATE ... | DELETE ...
+    - Показывает способ поиска строк (индекс, перебор, пустой результат
+      по статистике) и ожидаемое число строк, не выполняя команду
+
+EXPLAIN ANALYZE команда
+    - Выполняет команду и показывает время фаз (разбор, метаданные,
+      данные, фильтрация, вывод, запись) и число просмотренных строк
+
 HELP
     - Показывает эту справку
 
@@ -212,13 +430,27 @@ EXIT
   CREATE TABLE users (name str, age int, is_active bool)
   INSERT INTO users VALUES ("Sergei", 28, true)
   SELECT FROM users WHERE age = 28
+  SELECT FROM users WHERE age BETWEEN 20 AND 30 AND NOT name LIKE "S%"
+  SELECT is_active, COUNT(*), AVG(age) FROM users GROUP BY is_active
   UPDATE users SET age = 29 WHERE name = "Sergei"
   DELETE FROM users WHERE ID = 1
+  CREATE INDEX ON users(age) USING sorted
+  PREPARE by_age AS SELECT FROM users WHERE age > ?
+  EXECUTE by_age (25)
   INFO users
 """
     return help_text.strip()
 
 
+COMMAND_FUNCTIONS: Dict[str, Callable[[], Any]] = {
+    "BEGIN": begin,
+    "COMMIT": commit,
+    "ROLLBACK": rollback,
+    "HELP": get_help,
+    "EXIT": lambda: "EXIT",
+}
+
+
 def display_welcome_message() -> None:
     """Выводит приветственное сообщение."""
     print("***Операции с данными***")
@@ -235,32 +467,51 @@ def display_welcome_message() -> None:
     print()
 
 
+def print_result(result: Union[str, Iterable[str]]) -> None:
+    """Печатает результат команды, потоковые результаты - по мере получения."""
+    if isinstance(result, str):
+        print(result)
+        return
+
+    for chunk in result:
+        print(chunk, flush=True)
+
+
 def run_database() -> None:
     """Основной цикл базы данных."""
+    recovered = recover_database()
+    if recovered:
+        print(f"Восстановлено из журнала операций: {recovered}")
+
     display_welcome_message()
 
-    while True:
-        try:
-            user_input = input(DEFAULT_PROMPT).strip()
+    try:
+        while True:
+            try:
+                user_input = input(DEFAULT_PROMPT).strip()
+
+                if not user_input:
+                    continue
 
-            if not user_input:
-                continue
+                result = execute_command(user_input)
 
-            result = execute_command(user_input)
+                if result == "EXIT":
+                    print("Goodbye!")
+                    break
+                elif result:
+                    print_result(result)
 
-            if result == "EXIT":
-                print("Goodbye!")
+            except KeyboardInterrupt:
+                print("\nUse 'EXIT' to quit")
+            except EOFError:
+                print("\nGoodbye!")
                 break
-            elif result:
-                print(result)
-
-        except KeyboardInterrupt:
-            print("\nUse 'EXIT' to quit")
-        except EOFError:
-            print("\nGoodbye!")
-            break
-        except Exception as e:
-            print(f"Unexpected error: {str(e)}")
+            except Exception as e:
+                print(f"Unexpected error: {str(e)}")
+    finally:
+        if in_transaction():
+            print(rollback())
+        close_database()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+import json
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Union
+
+from prettytable import PrettyTable
+
+from .metrics import phase
+
+OUTPUT_MODES = {"table", "pages", "tsv", "jsonl"}
+
+
+def format_table(columns: List[str], rows: Iterable[Dict[str, Any]]) -> str:
+    """Выводит все строки одной таблицей PrettyTable."""
+    table = PrettyTable()
+    table.field_names = columns
+
+    for row in rows:
+        table.add_row([row.get(col, "") for col in columns])
+
+    return table.get_string()
+
+
+def iter_pages(
+    columns: List[str],
+    rows: Iterable[Dict[str, Any]],
+    page_size: int,
+) -> Iterator[str]:
+    """Выводит строки таблицами PrettyTable по page_size строк."""
+    rows = iter(rows)
+    page_number = 0
+    while True:
+        page = list(islice(rows, page_size))
+        if not page:
+            break
+        page_number += 1
+        yield f"Страница {page_number}:\n{format_table(columns, page)}"
+
+
+def _tsv_field(value: Any) -> str:
+    """Экранирует значение для вывода в TSV."""
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+def iter_tsv(columns: List[str], rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Выводит строку заголовка и строки в формате TSV по мере получения."""
+    yield "\t".join(columns)
+    for row in rows:
+        yield "\t".join(_tsv_field(row.get(col, "")) for col in columns)
+
+
+def iter_jsonl(columns: List[str], rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Выводит строки как JSON-объекты, по одному на строку."""
+    for row in rows:
+        yield json.dumps({col: row.get(col) for col in columns}, ensure_ascii=False)
+
+
+def render_rows(
+    columns: List[str],
+    rows: Iterable[Dict[str, Any]],
+    output_mode: str = "table",
+    page_size: int = 100,
+) -> Union[str, Iterator[str]]:
+    """Выводит строки в выбранном режиме: строкой или генератором фрагментов.
+
+    Фрагменты генераторов относит к фазе format код, который их перебирает;
+    таблица строится здесь же, поэтому ее время учитывается сразу.
+    """
+    if output_mode == "pages":
+        return iter_pages(columns, rows, page_size)
+    elif output_mode == "tsv":
+        return iter_tsv(columns, rows)
+    elif output_mode == "jsonl":
+        return iter_jsonl(columns, rows)
+
+    with phase("format"):
+        return format_table(columns, rows)
@@ -0,0 +1,216 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .utils import get_table_state
+
+INDEX_KINDS = {"hash", "sorted"}
+DEFAULT_INDEX_KIND = "hash"
+
+
+class HashIndex:
+    """Хеш-индекс: значение столбца -> множество ID. Обслуживает = и !=."""
+
+    kind = "hash"
+    operators = {"=", "!="}
+
+    def __init__(self, column: str) -> None:
+        self.column = column
+        self.entries: Dict[Any, Set[int]] = {}
+        self.all_ids: Set[int] = set()
+
+    def add(self, row: Dict[str, Any]) -> None:
+        self.entries.setdefault(row.get(self.column), set()).add(row["ID"])
+        self.all_ids.add(row["ID"])
+
+    def remove(self, row: Dict[str, Any]) -> None:
+        value = row.get(self.column)
+        ids = self.entries.get(value)
+        if ids is not None:
+            ids.discard(row["ID"])
+            if not ids:
+                del self.entries[value]
+        self.all_ids.discard(row["ID"])
+
+    def lookup(self, operator: str, value: Any) -> Set[int]:
+        try:
+            matched = self.entries.get(value, set())
+        except TypeError:
+            matched = set()
+        if operator == "=":
+            return set(matched)
+        return self.all_ids - matched
+
+
+class SortedIndex:
+    """Упорядоченный индекс на основе bisect. Обслуживает =, <, <=, >, >=."""
+
+    kind = "sorted"
+    operators = {"=", "<", "<=", ">", ">="}
+
+    def __init__(self, column: str) -> None:
+        self.column = column
+        self.keys: List[Any] = []
+        self.ids: List[int] = []
+
+    def add(self, row: Dict[str, Any]) -> None:
+        entry = (row.get(self.column), row["ID"])
+        position = self._position(entry)
+        self.keys.insert(position, entry[0])
+        self.ids.insert(position, entry[1])
+
+    def _position(self, entry: Tuple[Any, int]) -> int:
+        """Ищет позицию для пары (значение, ID) с сохранением порядка."""
+        value, row_id = entry
+        low = bisect_left(self.keys, value)
+        high = bisect_right(self.keys, value, low)
+        return bisect_left(self.ids, row_id, low, high)
+
+    def remove(self, row: Dict[str, Any]) -> None:
+        position = self._position((row.get(self.column), row["ID"]))
+        if position < len(self.ids) and self.ids[position] == row["ID"]:
+            del self.keys[position]
+            del self.ids[position]
+
+    def lookup(self, operator: str, value: Any) -> Set[int]:
+        try:
+            if operator == "=":
+                start = bisect_left(self.keys, value)
+                end = bisect_right(self.keys, value, start)
+            elif operator == "<":
+                start, end = 0, bisect_left(self.keys, value)
+            elif operator == "<=":
+                start, end = 0, bisect_right(self.keys, value)
+            elif operator == ">":
+                start, end = bisect_right(self.keys, value), len(self.keys)
+            else:
+                start, end = bisect_left(self.keys, value), len(self.keys)
+        except TypeError:
+            return set()
+        return set(self.ids[start:end])
+
+    def lookup_range(self, low: Any, high: Any) -> Set[int]:
+        """Возвращает ID строк со значениями в диапазоне [low, high]."""
+        try:
+            start = bisect_left(self.keys, low)
+            end = bisect_right(self.keys, high, start)
+        except TypeError:
+            return set()
+        return set(self.ids[start:end])
+
+
+INDEX_CLASSES = {"hash": HashIndex, "sorted": SortedIndex}
+
+
+def build_index(column: str, kind: str, rows: Iterable[Dict[str, Any]]) -> Any:
+    """Строит индекс указанного типа по строкам таблицы."""
+    index = INDEX_CLASSES[kind](column)
+    if kind == "sorted":
+        pairs = sorted((row.get(column), row["ID"]) for row in rows)
+        index.keys = [value for value, _ in pairs]
+        index.ids = [row_id for _, row_id in pairs]
+    else:
+        for row in rows:
+            index.add(row)
+    return index
+
+
+def get_table_indexes(table_name: str, index_defs: Dict[str, str]) -> Dict[str, Any]:
+    """Возвращает индексы таблицы, достраивая недостающие.
+
+    Индексы хранятся вместе с закешированными строками таблицы и
+    обновляются при записи вместе с ними.
+    """
+    state = get_table_state(table_name)
+    indexes = state.indexes
+    index_defs = index_defs or {}
+
+    for column in list(indexes):
+        if index_defs.get(column) != indexes[column].kind:
+            del indexes[column]
+
+    for column, kind in index_defs.items():
+        if column not in indexes:
+            indexes[column] = build_index(column, kind, state.rows.values())
+
+    return indexes
+
+
+def lookup_index(
+    table_name: str,
+    index_defs: Dict[str, str],
+    condition: Dict[str, Any],
+) -> Optional[Set[int]]:
+    """Возвращает ID строк-кандидатов по индексу или None, если индекс неприменим.
+
+    Для AND достаточно индекса по одному из условий, для OR - по каждому.
+    Условия ID = и ID IN не требуют индекса: строки таблицы и так хранятся
+    по ID. Кандидаты затем проверяются полным условием.
+    """
+    if not condition:
+        return None
+
+    op = condition["operator"]
+
+    if op == "AND":
+        candidates = None
+        for part in condition["conditions"]:
+            ids = lookup_index(table_name, index_defs, part)
+            if ids is not None and (candidates is None or len(ids) < len(candidates)):
+                candidates = ids
+        return candidates
+
+    if op == "OR":
+        candidates = set()
+        for part in condition["conditions"]:
+            ids = lookup_index(table_name, index_defs, part)
+            if ids is None:
+                return None
+            candidates |= ids
+        return candidates
+
+    if op == "NOT":
+        return None
+
+    kind = index_kind(index_defs, condition)
+    if kind is None:
+        return None
+
+    value = condition["value"]
+    if kind == "ID":
+        return set(value if op == "IN" else [value])
+
+    index = get_table_indexes(table_name, index_defs)[condition["column"]]
+    if op == "IN":
+        candidates = set()
+        for item in value:
+            candidates |= index.lookup("=", item)
+        return candidates
+
+    if op == "BETWEEN":
+        return index.lookup_range(value[0], value[1])
+
+    return index.lookup(op, value)
+
+
+def index_kind(index_defs: Dict[str, str], condition: Dict[str, Any]) -> Optional[str]:
+    """Возвращает способ поиска строк по сравнению без перебора таблицы.
+
+    "ID" - строки берутся прямо по ID, тип индекса - по индексу столбца,
+    None - сравнение требует перебора.
+    """
+    column = condition["column"]
+    op = condition["operator"]
+    value = condition["value"]
+    if column == "ID" and op in ("=", "IN"):
+        ids = value if op == "IN" else [value]
+        if all(type(item) is int for item in ids):
+            return "ID"
+
+    kind = (index_defs or {}).get(column)
+    if kind is None:
+        return None
+
+    supported = INDEX_CLASSES[kind].operators
+    if op in supported or op == "IN" and "=" in supported or op == "BETWEEN" and kind == "sorted":
+        return kind
+    return None
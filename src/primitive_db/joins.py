@@ -0,0 +1,247 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .constants import INDEX_MAX_SELECTIVITY
+from .planner import rows_per_value
+from .predicates import condition_columns
+
+# Способы соединения: хеш-таблица по одной из таблиц или поиск пар
+# по индексу для каждой строки другой таблицы
+HASH_JOIN = "hash"
+INDEX_JOIN = "index"
+
+Row = Dict[str, Any]
+Combine = Callable[[Optional[Row], Optional[Row]], Row]
+
+
+class JoinSide:
+    """Таблица соединения: столбец ON и часть WHERE, проверяемая при ее чтении.
+
+    total - число строк таблицы, rows - ожидаемое число строк после
+    условия: по статистике, а без нее - total.
+    """
+
+    __slots__ = ("table", "meta", "column", "condition", "total", "rows")
+
+    def __init__(
+        self,
+        table: str,
+        meta: Dict[str, Any],
+        column: str,
+        condition: Dict[str, Any],
+        total: int,
+        rows: float,
+    ) -> None:
+        self.table = table
+        self.meta = meta
+        self.column = column
+        self.condition = condition
+        self.total = total
+        self.rows = rows
+
+    def column_types(self) -> Dict[str, str]:
+        """Возвращает типы столбцов по их именам в результате: таблица.столбец."""
+        return {
+            f"{self.table}.{column}": column_type
+            for column, column_type in self.meta["columns"].items()
+        }
+
+    def names(self) -> List[str]:
+        return list(self.column_types())
+
+
+def split_qualified(name: str) -> Tuple[str, str]:
+    """Делит имя таблица.столбец на таблицу и столбец ("" - таблица не указана)."""
+    table, _, column = name.rpartition(".")
+    return table, column
+
+
+def unqualify(condition: Dict[str, Any]) -> Dict[str, Any]:
+    """Копирует условие, убирая имя таблицы из имен столбцов."""
+    op = condition["operator"]
+    if op in ("AND", "OR"):
+        return {"operator": op, "conditions": [unqualify(part) for part in condition["conditions"]]}
+    if op == "NOT":
+        return {"operator": op, "condition": unqualify(condition["condition"])}
+    return {**condition, "column": split_qualified(condition["column"])[1]}
+
+
+def _conjunction(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if not parts:
+        return {}
+    if len(parts) == 1:
+        return parts[0]
+    return {"operator": "AND", "conditions": parts}
+
+
+def split_where(
+    condition: Dict[str, Any],
+    left_table: str,
+    right_table: str,
+    push_right: bool,
+) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """Делит WHERE на условия левой и правой таблиц и остаток для строк соединения.
+
+    Условие таблицы проверяется при ее чтении (с индексами и планировщиком),
+    поэтому переносятся части верхнего AND со столбцами одной таблицы. В
+    LEFT JOIN (push_right=False) условия правой таблицы остаются в остатке:
+    строка левой таблицы без пары проверяется с NULL в правых столбцах.
+    """
+    if not condition:
+        return {}, {}, {}
+    parts = condition["conditions"] if condition["operator"] == "AND" else [condition]
+
+    left, right, residual = [], [], []
+    for part in parts:
+        tables = {split_qualified(column)[0] for column in condition_columns(part)}
+        if tables == {left_table}:
+            left.append(unqualify(part))
+        elif tables == {right_table} and push_right:
+            right.append(unqualify(part))
+        else:
+            residual.append(part)
+    return _conjunction(left), _conjunction(right), _conjunction(residual)
+
+
+def lookup_kind(side: JoinSide) -> Optional[str]:
+    """Возвращает, как искать строки таблицы по значению столбца ON.
+
+    "ID" - строки и так хранятся по ID, тип индекса - по индексу столбца,
+    None - только перебором.
+    """
+    if side.column == "ID":
+        return "ID"
+    return (side.meta.get("indexes") or {}).get(side.column)
+
+
+def _index_pairs_cheaper(outer: JoinSide, inner: JoinSide) -> bool:
+    """Проверяет, дешевле ли искать пары по индексу, чем строить хеш-таблицу.
+
+    Каждая пара по индексу читается отдельно, поэтому, как и при поиске
+    по индексу в одной таблице, ожидаемых пар должно быть не больше
+    INDEX_MAX_SELECTIVITY строк внутренней таблицы. Без статистики по
+    столбцу ON индекс используется всегда.
+    """
+    per_value = rows_per_value(inner.meta, inner.column, inner.total)
+    if per_value is None:
+        return True
+    return outer.rows * per_value <= max(inner.total, 1) * INDEX_MAX_SELECTIVITY
+
+
+def plan_join(kind: str, left: JoinSide, right: JoinSide) -> Tuple[str, JoinSide, JoinSide]:
+    """Выбирает способ соединения: (способ, внешняя таблица, внутренняя).
+
+    Внешняя таблица перебирается, во внутренней ищутся пары ее строк. Если
+    по столбцу ON внутренней таблицы есть индекс (или это ID) и пар
+    ожидается немного, пары ищутся по нему для каждой строки, и внутренняя
+    таблица не читается целиком; из двух таких таблиц внешней становится
+    меньшая. Иначе хеш-таблица строится по меньшей таблице, а большая
+    проходит через нее потоком. В LEFT JOIN пары по индексу ищутся только
+    в правой таблице: строки левой выдаются и без пары.
+    """
+    indexed = [
+        side for side in (right, left)
+        if lookup_kind(side) is not None and (kind == "INNER" or side is right)
+        and _index_pairs_cheaper(left if side is right else right, side)
+    ]
+    if indexed:
+        inner = max(indexed, key=lambda side: side.rows)
+        return INDEX_JOIN, left if inner is right else right, inner
+    if right.rows <= left.rows:
+        return HASH_JOIN, left, right
+    return HASH_JOIN, right, left
+
+
+def row_combiner(left: JoinSide, right: JoinSide, outer_is_left: bool) -> Combine:
+    """Возвращает функцию, склеивающую (внешнюю, внутреннюю) строки в строку результата.
+
+    Столбцы левой таблицы идут первыми при любом порядке обхода; вместо
+    строки без пары (None) подставляются NULL.
+    """
+    left_columns = list(left.meta["columns"])
+    right_columns = list(right.meta["columns"])
+    left_names = left.names()
+    right_names = right.names()
+    left_nulls = dict.fromkeys(left_names)
+    right_nulls = dict.fromkeys(right_names)
+
+    def combine(left_row: Optional[Row], right_row: Optional[Row]) -> Row:
+        if left_row is None:
+            row = dict(left_nulls)
+        else:
+            row = dict(zip(left_names, map(left_row.get, left_columns)))
+        if right_row is None:
+            row.update(right_nulls)
+        else:
+            row.update(zip(right_names, map(right_row.get, right_columns)))
+        return row
+
+    if outer_is_left:
+        return combine
+    return lambda outer, inner: combine(inner, outer)
+
+
+def hash_join(
+    outer_rows: Iterable[Row],
+    inner_rows: Iterable[Row],
+    outer_column: str,
+    inner_column: str,
+    combine: Combine,
+    outer_unmatched: bool = False,
+    inner_unmatched: bool = False,
+) -> Iterator[Row]:
+    """Хеш-соединение: хеш-таблица по внутренним строкам, внешние проходят потоком.
+
+    В памяти только внутренние строки. outer_unmatched и inner_unmatched -
+    выдавать строки без пары (LEFT JOIN); внутренние без пары выдаются
+    после всех пар. NULL ничему не равен: строки с NULL в столбце ON пар
+    не имеют.
+    """
+    table: Dict[Any, List[Row]] = {}
+    null_rows = []
+    for row in inner_rows:
+        value = row.get(inner_column)
+        if value is None:
+            if inner_unmatched:
+                null_rows.append(row)
+        else:
+            table.setdefault(value, []).append(row)
+
+    matched = set()
+    for row in outer_rows:
+        value = row.get(outer_column)
+        bucket = table.get(value)
+        if bucket is None:
+            if outer_unmatched:
+                yield combine(row, None)
+            continue
+        if inner_unmatched:
+            matched.add(value)
+        for inner in bucket:
+            yield combine(row, inner)
+
+    if inner_unmatched:
+        for value, bucket in table.items():
+            if value not in matched:
+                for inner in bucket:
+                    yield combine(None, inner)
+        for inner in null_rows:
+            yield combine(None, inner)
+
+
+def index_join(
+    outer_rows: Iterable[Row],
+    outer_column: str,
+    find_inner: Callable[[Any], Iterable[Row]],
+    combine: Combine,
+    outer_unmatched: bool = False,
+) -> Iterator[Row]:
+    """Соединение вложенными циклами по индексу: find_inner(значение) - пары строки."""
+    for row in outer_rows:
+        value = row.get(outer_column)
+        found = False
+        if value is not None:
+            for inner in find_inner(value):
+                found = True
+                yield combine(row, inner)
+        if not found and outer_unmatched:
+            yield combine(row, None)
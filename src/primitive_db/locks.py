@@ -0,0 +1,152 @@
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .constants import DATA_DIR, LOCK_DIR
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - блокировки fcntl только для POSIX
+    fcntl = None
+
+WRITER_LOCK = "db_meta"
+
+
+class HeldLock:
+    """Удерживаемая блокировка: дескриптор файла, режим и глубина вложенности."""
+
+    __slots__ = ("fd", "exclusive", "depth")
+
+    def __init__(self, fd: int, exclusive: bool) -> None:
+        self.fd = fd
+        self.exclusive = exclusive
+        self.depth = 0
+
+
+# Блокировки текущего контекста (сеанса): имя -> удерживаемая блокировка
+_held_locks: ContextVar[Optional[Dict[str, HeldLock]]] = ContextVar(
+    "held_locks", default=None
+)
+
+# Вызываются при первом захвате блокировки записи в контексте
+_writer_hooks: List[Callable[[HeldLock], None]] = []
+
+
+def _current_locks() -> Dict[str, HeldLock]:
+    held = _held_locks.get()
+    if held is None:
+        held = {}
+        _held_locks.set(held)
+    return held
+
+
+def lock_path(name: str) -> str:
+    """Возвращает путь к файлу блокировки."""
+    return os.path.join(DATA_DIR, LOCK_DIR, f"{name}.lock")
+
+
+def _flock(fd: int, exclusive: bool) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+
+def acquire_lock(name: str, exclusive: bool) -> HeldLock:
+    """Захватывает рекомендательную блокировку fcntl.flock.
+
+    Разделяемые блокировки совместимы друг с другом, исключительная - ни с
+    какой другой. Повторный захват в том же контексте только увеличивает
+    глубину; запрос исключительной при удерживаемой разделяемой повышает ее.
+    """
+    held = _current_locks()
+    lock = held.get(name)
+    if lock is None:
+        path = lock_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            _flock(fd, exclusive)
+        except BaseException:
+            os.close(fd)
+            raise
+        lock = held[name] = HeldLock(fd, exclusive)
+    elif exclusive and not lock.exclusive:
+        _flock(lock.fd, True)
+        lock.exclusive = True
+    lock.depth += 1
+    return lock
+
+
+def release_lock(name: str) -> None:
+    """Освобождает блокировку после последнего вложенного захвата."""
+    held = _current_locks()
+    lock = held[name]
+    lock.depth -= 1
+    if lock.depth == 0:
+        del held[name]
+        if not held:
+            # Контексты, созданные позже, не должны унаследовать этот словарь
+            _held_locks.set(None)
+        # Закрытие дескриптора снимает flock
+        os.close(lock.fd)
+
+
+@contextmanager
+def file_lock(name: str, exclusive: bool) -> Iterator[HeldLock]:
+    """Удерживает блокировку на время блока."""
+    lock = acquire_lock(name, exclusive)
+    try:
+        yield lock
+    finally:
+        release_lock(name)
+
+
+def on_writer_lock(hook: Callable[[HeldLock], None]) -> Callable[[HeldLock], None]:
+    """Регистрирует действие при захвате блокировки записи."""
+    _writer_hooks.append(hook)
+    return hook
+
+
+def acquire_writer_lock() -> HeldLock:
+    """Захватывает блокировку записи базы: изменяющие команды выполняются по одной."""
+    lock = acquire_lock(WRITER_LOCK, exclusive=True)
+    if lock.depth == 1:
+        try:
+            for hook in _writer_hooks:
+                hook(lock)
+        except BaseException:
+            release_lock(WRITER_LOCK)
+            raise
+    return lock
+
+
+def release_writer_lock() -> None:
+    """Освобождает блокировку записи базы."""
+    release_lock(WRITER_LOCK)
+
+
+@contextmanager
+def writer_lock() -> Iterator[HeldLock]:
+    """Удерживает блокировку записи базы на время блока."""
+    lock = acquire_writer_lock()
+    try:
+        yield lock
+    finally:
+        release_writer_lock()
+
+
+def holds_writer_lock() -> bool:
+    """Проверяет, удерживает ли текущий контекст блокировку записи."""
+    return WRITER_LOCK in (_held_locks.get() or {})
+
+
+def read_lock_note(lock: HeldLock) -> str:
+    """Читает служебную отметку, хранящуюся в файле блокировки."""
+    return os.pread(lock.fd, 64, 0).decode("ascii", "replace").strip()
+
+
+def write_lock_note(lock: HeldLock, note: str) -> None:
+    """Записывает служебную отметку в файл блокировки."""
+    data = f"{note}\n".encode("ascii")
+    os.pwrite(lock.fd, data, 0)
+    os.ftruncate(lock.fd, len(data))
@@ -1,9 +1,62 @@
+import argparse
+import sys
+
+from .constants import (
+    PARALLEL_SCAN_MIN_ROWS,
+    PARALLEL_SCAN_WORKERS,
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_WORKERS,
+    STORAGE_FORMAT,
+    STORAGE_FORMATS,
+)
 from .engine import run_database
+from .parallel import set_parallel_scans
 
 
 def main() -> None:
     """Основная функция."""
-    run_database()
+    arg_parser = argparse.ArgumentParser(prog="database", description="Примитивная база данных")
+    arg_parser.add_argument("-f", "--file", metavar="SCRIPT",
+                            help="выполнить команды из файла ('-' - из стандартного ввода)")
+    arg_parser.add_argument("-q", "--quiet", action="store_true",
+                            help="в режиме сценария печатать только ошибки и сводку")
+    arg_parser.add_argument("--scan-workers", type=int, default=PARALLEL_SCAN_WORKERS, metavar="N",
+                            help="процессов для сканирования больших таблиц (0 - по числу ядер, 1 - без параллелизма)")
+    arg_parser.add_argument("--parallel-min-rows", type=int, default=PARALLEL_SCAN_MIN_ROWS, metavar="N",
+                            help="сканировать параллельно таблицы от N строк")
+    subparsers = arg_parser.add_subparsers(dest="mode")
+
+    serve_parser = subparsers.add_parser("serve", help="запустить TCP-сервер")
+    serve_parser.add_argument("--host", default=SERVER_HOST)
+    serve_parser.add_argument("--port", type=int, default=SERVER_PORT)
+    serve_parser.add_argument("--workers", type=int, default=SERVER_WORKERS,
+                              help="потоков для выполнения команд")
+
+    convert_parser = subparsers.add_parser("convert", help="перевести таблицы в другой формат хранения")
+    convert_parser.add_argument("--to", dest="storage_format", choices=STORAGE_FORMATS,
+                                default=STORAGE_FORMAT)
+    convert_parser.add_argument("tables", nargs="*", help="таблицы (по умолчанию все)")
+
+    args = arg_parser.parse_args()
+    set_parallel_scans(args.scan_workers, args.parallel_min_rows)
+
+    if args.mode == "serve":
+        from .server import run_server
+
+        run_server(args.host, args.port, args.workers)
+    elif args.mode == "convert":
+        from .convert import run_convert
+
+        errors = run_convert(args.storage_format, args.tables)
+        sys.exit(1 if errors else 0)
+    elif args.file is not None:
+        from .batch import run_script_file
+
+        errors = run_script_file(args.file, args.quiet)
+        sys.exit(1 if errors else 0)
+    else:
+        run_database()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,375 @@
+import mmap
+import os
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from itertools import islice
+from operator import lt
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from .cache import MISSING, estimate_size
+from .codec import (
+    PAGE_HEADER,
+    ROWS_PAGE,
+    Buffer,
+    Schema,
+    column_offsets,
+    decode_header,
+    decode_ids,
+    decode_row,
+    decode_rows,
+    page_end,
+)
+from .constants import MAPPED_CACHE_PAGES
+
+# Положение записи строки в файле: (номер страницы, позиция в странице)
+Location = Tuple[int, int]
+
+# Столбец ID страниц меньше этого числа строк копируется, а не отображается:
+# такие страницы дописываются по одной на команду, и пересоздавать ссылки
+# на них после каждого переотображения файла дороже копии
+VIEW_MIN_ROWS = 256
+
+
+class PageEntry:
+    """Запись каталога страниц: смещения столбцов страницы и диапазон ее ID."""
+
+    __slots__ = ("kind", "count", "offsets", "ids_offset", "min_id", "max_id", "ordered", "shadowed")
+
+    def __init__(self, kind: int, count: int, offsets: List[int], ids_offset: int) -> None:
+        self.kind = kind
+        self.count = count
+        self.offsets = offsets
+        self.ids_offset = ids_offset
+        self.min_id = 0
+        self.max_id = -1
+        # ID страницы идут по возрастанию: позиция ищется бинарным поиском
+        self.ordered = True
+        # На странице есть ID, у которых в файле несколько записей
+        self.shadowed = False
+
+
+class MappedTable(Mapping[int, Dict[str, Any]]):
+    """Строки двоичного файла таблицы, отображенного в память (mmap).
+
+    При открытии читаются только заголовки страниц и столбцы ID, из них
+    строится каталог страниц. Строки декодируются по требованию: поиск по
+    ID читает одну строку, перебор идет страница за страницей. Последние
+    декодированные страницы хранятся в кеше на MAPPED_CACHE_PAGES страниц,
+    поэтому память ограничена им, а не размером таблицы.
+
+    Для ID с несколькими записями в файле (новые версии строк, надгробия)
+    запоминается положение последней записи. Перебор выдает строки в том же
+    порядке, что и словарь, собранный проигрыванием страниц.
+    Объект соответствует файлу на момент открытия или последнего refresh();
+    записи через __setitem__ и pop видны поиску по ID до следующего refresh().
+    """
+
+    def __init__(self, path: str, cache_pages: int = MAPPED_CACHE_PAGES) -> None:
+        self.path = path
+        self.cache_pages = cache_pages
+        self.lock = threading.Lock()
+        self._reset(None)
+        self.refresh()
+
+    def _reset(self, inode: Optional[int]) -> None:
+        self.inode = inode
+        self.data: Buffer = b""
+        self.schema: Schema = []
+        self.id_column = 0
+        self.end = 0
+        self.pages: List[PageEntry] = []
+        # Столбец ID каждой страницы; у страниц без порядка - словарь ID -> позиция
+        self.ids: List[Any] = []
+        # Номера страниц, столбец ID которых ссылается на отображение файла
+        self.viewed_pages: List[int] = []
+        self.directory_bytes = 0
+        # Страницы новых строк, ID которых больше всех прежних: начала и номера
+        self.fresh_starts: List[int] = []
+        self.fresh_pages: List[int] = []
+        # Остальные страницы строк (обновления, строки вперемешку)
+        self.other_pages: List[int] = []
+        self.max_id: Optional[int] = None
+        # ID с несколькими записями -> последняя запись, None - строка удалена
+        self.latest: Dict[int, Optional[Location]] = {}
+        # Живые ID из latest -> запись, на месте которой строка выдается при
+        # переборе: первая после последнего удаления, как при проигрывании
+        self.anchors: Dict[int, Location] = {}
+        self.live = 0
+        self.records = 0
+        self.pending: Dict[int, Optional[Dict[str, Any]]] = {}
+        self.decoded: "OrderedDict[int, List[Dict[str, Any]]]" = OrderedDict()
+
+    def refresh(self) -> None:
+        """Дочитывает страницы, дописанные в файл после открытия.
+
+        Если файл заменен целиком (перезапись, сжатие), каталог строится заново.
+        """
+        self.pending.clear()
+        try:
+            with open(self.path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                if stat.st_ino != self.inode or stat.st_size < self.end:
+                    self._reset(stat.st_ino)
+                if stat.st_size == 0 or stat.st_size == self.end:
+                    return
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            self._reset(None)
+            return
+
+        self.data = data
+        if not self.end:
+            self.schema, self.end = decode_header(data)
+            self.id_column = [name for name, _ in self.schema].index("ID")
+        else:
+            # Столбцы ID прочитанных страниц переводим на новое отображение
+            for page_no in self.viewed_pages:
+                entry = self.pages[page_no]
+                self.ids[page_no] = decode_ids(data, entry.ids_offset, entry.count)
+
+        position = self.end
+        end = page_end(data, position)
+        while end is not None:
+            self._add_page(position)
+            position = end
+            end = page_end(data, position)
+        self.end = position
+
+    def _add_page(self, position: int) -> None:
+        _, kind, count = PAGE_HEADER.unpack_from(self.data, position)
+        start = position + PAGE_HEADER.size
+        if kind == ROWS_PAGE:
+            offsets = column_offsets(self.schema, self.data, start, count)
+            entry = PageEntry(kind, count, offsets, offsets[self.id_column])
+        else:
+            entry = PageEntry(kind, count, [], start)
+        ids: Any = decode_ids(self.data, entry.ids_offset, count)
+        if count < VIEW_MIN_ROWS:
+            ids = array("q", ids)
+        page_no = len(self.pages)
+        self.records += count
+        if count:
+            entry.min_id = min(ids)
+            entry.max_id = max(ids)
+            entry.ordered = all(map(lt, ids, islice(ids, 1, None)))
+
+        if kind != ROWS_PAGE:
+            for row_id in ids:
+                self._supersede(row_id, None)
+        elif entry.ordered and (self.max_id is None or entry.min_id > self.max_id):
+            # Только новые строки: их ID ни разу не встречались
+            if count:
+                self.fresh_starts.append(entry.min_id)
+                self.fresh_pages.append(page_no)
+                self.live += count
+        else:
+            for index, row_id in enumerate(ids):
+                if self._supersede(row_id, (page_no, index)):
+                    entry.shadowed = True
+            if not entry.ordered:
+                ids = dict(zip(ids, range(count)))
+            self.other_pages.append(page_no)
+        if kind == ROWS_PAGE and count:
+            self.max_id = entry.max_id if self.max_id is None else max(self.max_id, entry.max_id)
+
+        if isinstance(ids, memoryview):
+            self.viewed_pages.append(page_no)
+        else:
+            self.directory_bytes += sys.getsizeof(ids)
+        self.directory_bytes += sys.getsizeof(entry) + sys.getsizeof(entry.offsets)
+        self.pages.append(entry)
+        self.ids.append(ids)
+
+    def _supersede(self, row_id: int, location: Optional[Location]) -> bool:
+        """Учитывает новую запись ID; возвращает True, если у ID были записи раньше."""
+        previous = self.latest.get(row_id, MISSING)
+        if previous is MISSING:
+            previous = self._find(row_id)
+            if previous is None:
+                # Первая запись ID: новая строка или надгробие несуществующей
+                if location is not None:
+                    self.live += 1
+                return False
+            self.pages[previous[0]].shadowed = True
+            self.anchors[row_id] = previous
+        if location is None:
+            if previous is not None:
+                self.live -= 1
+            self.anchors.pop(row_id, None)
+        elif previous is None:
+            self.live += 1
+            self.anchors[row_id] = location
+        self.latest[row_id] = location
+        return True
+
+    def _position(self, page_no: int, row_id: int) -> Optional[int]:
+        entry = self.pages[page_no]
+        if not entry.min_id <= row_id <= entry.max_id:
+            return None
+        ids = self.ids[page_no]
+        if isinstance(ids, dict):
+            return ids.get(row_id)
+        index = bisect_left(ids, row_id)
+        return index if index < entry.count and ids[index] == row_id else None
+
+    def _find(self, row_id: int) -> Optional[Location]:
+        """Ищет запись ID, у которого она единственная (см. latest)."""
+        index = bisect_right(self.fresh_starts, row_id) - 1
+        if index >= 0:
+            page_no = self.fresh_pages[index]
+            position = self._position(page_no, row_id)
+            if position is not None:
+                return page_no, position
+        for page_no in reversed(self.other_pages):
+            position = self._position(page_no, row_id)
+            if position is not None:
+                return page_no, position
+        return None
+
+    def _locate(self, row_id: Any) -> Optional[Location]:
+        if not isinstance(row_id, int):
+            return None
+        location = self.latest.get(row_id, MISSING)
+        if location is MISSING:
+            return self._find(row_id)
+        return location
+
+    def _page_rows(self, page_no: int) -> List[Dict[str, Any]]:
+        with self.lock:
+            rows = self.decoded.get(page_no)
+            if rows is not None:
+                self.decoded.move_to_end(page_no)
+                return rows
+        entry = self.pages[page_no]
+        rows = decode_rows(self.schema, self.data, entry.offsets, entry.count)
+        with self.lock:
+            self.decoded[page_no] = rows
+            while len(self.decoded) > self.cache_pages:
+                self.decoded.popitem(last=False)
+        return rows
+
+    def _row_at(self, location: Location) -> Dict[str, Any]:
+        page_no, index = location
+        with self.lock:
+            rows = self.decoded.get(page_no)
+        if rows is not None:
+            return rows[index]
+        entry = self.pages[page_no]
+        return decode_row(self.schema, self.data, entry.offsets, entry.count, index)
+
+    def _visible(self, page_no: int) -> Iterator[Tuple[int, int, Optional[Location]]]:
+        """Перебирает видимые записи страницы с замененными ID.
+
+        Выдает (позиция, ID, последняя запись ID или None, если запись
+        единственная); строка с несколькими записями выдается на месте якоря.
+        """
+        for index, row_id in enumerate(self.ids[page_no]):
+            location = self.latest.get(row_id, MISSING)
+            if location is MISSING:
+                yield index, row_id, None
+            elif self.anchors.get(row_id) == (page_no, index):
+                yield index, row_id, location
+
+    def values(self) -> Iterator[Dict[str, Any]]:  # type: ignore[override]
+        """Лениво перебирает живые строки, декодируя страницу за страницей."""
+        for page_no in range(len(self.pages)):
+            entry = self.pages[page_no]
+            if entry.kind != ROWS_PAGE or not entry.count:
+                continue
+            rows = self._page_rows(page_no)
+            if not entry.shadowed:
+                yield from rows
+                continue
+            for index, _, location in self._visible(page_no):
+                yield rows[index] if location is None else self._row_at(location)
+
+    def row_pages(self) -> List[Tuple[int, List[int], int]]:
+        """Возвращает (номер, смещения столбцов, число строк) непустых страниц строк."""
+        return [
+            (page_no, entry.offsets, entry.count)
+            for page_no, entry in enumerate(self.pages)
+            if entry.kind == ROWS_PAGE and entry.count
+        ]
+
+    def visible_matches(
+        self,
+        page_no: int,
+        hits: List[Tuple[int, Dict[str, Any]]],
+        matches: Callable[[Dict[str, Any]], bool],
+    ) -> Iterator[Dict[str, Any]]:
+        """Отбирает видимые строки страницы из ее записей, прошедших фильтр.
+
+        hits - пары (позиция, строка) в порядке страницы. Строка, замененная
+        более поздней записью, проверяется заново в последней версии, поэтому
+        результат совпадает с filter(matches, values()) на этой странице.
+        """
+        if not self.pages[page_no].shadowed:
+            for _, row in hits:
+                yield row
+            return
+        found = dict(hits)
+        for index, _, location in self._visible(page_no):
+            if location is None:
+                row = found.get(index)
+                if row is not None:
+                    yield row
+            else:
+                row = self._row_at(location)
+                if matches(row):
+                    yield row
+
+    def items(self) -> Iterator[Tuple[int, Dict[str, Any]]]:  # type: ignore[override]
+        """Лениво перебирает пары (ID, строка)."""
+        return ((row["ID"], row) for row in self.values())
+
+    def __iter__(self) -> Iterator[int]:
+        for page_no in range(len(self.pages)):
+            entry = self.pages[page_no]
+            if entry.kind != ROWS_PAGE:
+                continue
+            if not entry.shadowed:
+                yield from self.ids[page_no]
+                continue
+            for _, row_id, _ in self._visible(page_no):
+                yield row_id
+
+    def __len__(self) -> int:
+        return self.live
+
+    def __getitem__(self, row_id: Any) -> Dict[str, Any]:
+        row = self.pending.get(row_id, MISSING)
+        if row is MISSING:
+            location = self._locate(row_id)
+            row = None if location is None else self._row_at(location)
+        if row is None:
+            raise KeyError(row_id)
+        return row
+
+    def __contains__(self, row_id: Any) -> bool:
+        row = self.pending.get(row_id, MISSING)
+        if row is MISSING:
+            return self._locate(row_id) is not None
+        return row is not None
+
+    def __setitem__(self, row_id: int, row: Dict[str, Any]) -> None:
+        self.pending[row_id] = row
+
+    def pop(self, row_id: int, default: Any = None) -> Any:
+        """Удаляет строку до следующего refresh(), возвращает ее прежнюю версию."""
+        row = self.get(row_id, default)
+        self.pending[row_id] = None
+        return row
+
+    def __sizeof__(self) -> int:
+        with self.lock:
+            decoded = list(self.decoded.values())
+        return (
+            object.__sizeof__(self)
+            + sys.getsizeof(self.latest)
+            + sys.getsizeof(self.anchors)
+            + self.directory_bytes
+            + sum(estimate_size(rows) for rows in decoded)
+        )
@@ -0,0 +1,248 @@
+import json
+import math
+import threading
+from contextvars import ContextVar
+from operator import add
+from time import perf_counter_ns
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+# Фазы выполнения команды; время, не отнесенное к другим фазам (проверки,
+# блокировки, индексы), учитывается в execute
+PHASES = ("parse", "metadata", "data", "filter", "format", "save", "execute")
+PARSE, METADATA, DATA, FILTER, FORMAT, SAVE, EXECUTE = range(len(PHASES))
+
+# Корзин гистограммы на удвоение времени: граница корзины отличается
+# от соседней примерно на 9%, с такой точностью и считаются перцентили
+BUCKETS_PER_DOUBLING = 8
+
+PERCENTILES = (50, 95, 99)
+
+
+class QueryProfile:
+    """Время фаз одной команды и число просмотренных и отобранных строк.
+
+    Время фазы исключительное: вложенная фаза приостанавливает внешнюю,
+    поэтому сумма фаз равна времени команды. При detailed=True (EXPLAIN
+    ANALYZE) перебор строк замеряется построчно, и фильтрация отделяется
+    от вывода; без него ленивая фильтрация SELECT входит в фазу format.
+    """
+
+    __slots__ = ("phases", "current", "mark", "stack", "rows_scanned", "rows_returned", "detailed")
+
+    def __init__(self, detailed: bool = False) -> None:
+        # Время фаз в наносекундах по номерам из PHASES
+        self.phases = [0] * len(PHASES)
+        self.current: Optional[int] = None
+        self.mark = 0
+        # Фазы, прерванные вложенными блоками phase()
+        self.stack: List[Optional[int]] = []
+        self.rows_scanned = 0
+        self.rows_returned = 0
+        self.detailed = detailed
+
+    def switch(self, number: Optional[int]) -> Optional[int]:
+        """Переходит в фазу с номером number (None - пауза), возвращает прежнюю."""
+        now = perf_counter_ns()
+        if self.current is not None:
+            self.phases[self.current] += now - self.mark
+        self.mark = now
+        previous = self.current
+        self.current = number
+        return previous
+
+    def total_ns(self) -> int:
+        """Возвращает время команды в наносекундах."""
+        return sum(self.phases)
+
+
+# Профиль выполняемой команды сеанса; None - команда выполняется вне движка
+active_profile: ContextVar[Optional[QueryProfile]] = ContextVar("active_profile", default=None)
+
+
+class _Phase:
+    """Блок with, время которого относится к фазе профиля текущей команды."""
+
+    __slots__ = ("number",)
+
+    def __init__(self, number: int) -> None:
+        self.number = number
+
+    def __enter__(self) -> None:
+        profile = active_profile.get()
+        if profile is not None:
+            profile.stack.append(profile.switch(self.number))
+
+    def __exit__(self, *exc_info: Any) -> None:
+        profile = active_profile.get()
+        if profile is not None:
+            profile.switch(profile.stack.pop())
+
+
+# Объекты фаз создаются один раз: phase() вызывается на каждое чтение
+# метаданных и таблицы, и генератор contextmanager здесь заметно дороже
+_PHASE_BLOCKS = {name: _Phase(number) for number, name in enumerate(PHASES)}
+
+
+def phase(name: str) -> _Phase:
+    """Относит время блока with к фазе name профиля текущей команды."""
+    return _PHASE_BLOCKS[name]
+
+
+def _timed_rows(rows: Iterator[Dict[str, Any]], profile: QueryProfile) -> Iterator[Dict[str, Any]]:
+    """Перебирает строки, относя время их получения к фазе filter."""
+    while True:
+        previous = profile.switch(FILTER)
+        row = next(rows, None)
+        profile.switch(previous)
+        if row is None:
+            return
+        profile.rows_returned += 1
+        yield row
+
+
+def profile_scan(rows: Iterator[Dict[str, Any]], scanned: int) -> Iterator[Dict[str, Any]]:
+    """Учитывает перебор scanned строк; в подробном профиле замеряет фильтрацию."""
+    profile = active_profile.get()
+    if profile is None:
+        return rows
+    profile.rows_scanned += scanned
+    if not profile.detailed:
+        return rows
+    return _timed_rows(rows, profile)
+
+
+class Histogram:
+    """Распределение времени команд одного вида в логарифмических корзинах.
+
+    Память не зависит от числа команд: корзина покрывает диапазон времени
+    шириной около 9%, хранится только число попаданий в нее.
+    """
+
+    __slots__ = ("count", "total_ns", "max_ns", "buckets", "phases", "rows_scanned")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets: Dict[int, int] = {}
+        self.phases = [0] * len(PHASES)
+        self.rows_scanned = 0
+
+    def add(self, profile: QueryProfile) -> None:
+        elapsed = profile.total_ns()
+        bucket = int(math.log2(max(elapsed, 1)) * BUCKETS_PER_DOUBLING)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total_ns += elapsed
+        self.max_ns = max(self.max_ns, elapsed)
+        self.phases = list(map(add, self.phases, profile.phases))
+        self.rows_scanned += profile.rows_scanned
+
+    def percentile(self, share: float) -> int:
+        """Возвращает верхнюю границу корзины, в которую попадает доля share команд."""
+        rank = share * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(_bucket_upper_ns(bucket), self.max_ns)
+        return self.max_ns
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Возвращает сводку для экспорта в JSON; время в микросекундах."""
+        return {
+            "count": self.count,
+            "total_us": self.total_ns / 1000,
+            "max_us": self.max_ns / 1000,
+            **{f"p{p}_us": self.percentile(p / 100) / 1000 for p in PERCENTILES},
+            "phases_us": {name: value / 1000 for name, value in zip(PHASES, self.phases)},
+            "rows_scanned": self.rows_scanned,
+        }
+
+
+def _bucket_upper_ns(bucket: int) -> int:
+    return math.ceil(2 ** ((bucket + 1) / BUCKETS_PER_DOUBLING))
+
+
+# Вид команды -> гистограмма; общие для всех сеансов процесса
+_histograms: Dict[str, Histogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def record(keyword: str, profile: QueryProfile) -> None:
+    """Добавляет выполненную команду в гистограмму ее вида."""
+    with _histograms_lock:
+        histogram = _histograms.get(keyword)
+        if histogram is None:
+            histogram = _histograms[keyword] = Histogram()
+        histogram.add(profile)
+
+
+def _recorded_chunks(chunks: Iterable[str], keyword: str, profile: QueryProfile) -> Iterator[str]:
+    """Выдает фрагменты ответа, относя время их получения к фазе format."""
+    chunks = iter(chunks)
+    try:
+        while True:
+            profile.switch(FORMAT)
+            chunk = next(chunks, None)
+            profile.switch(None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        profile.switch(None)
+        record(keyword, profile)
+
+
+def complete(
+    keyword: str,
+    profile: QueryProfile,
+    result: Union[str, Iterable[str]],
+) -> Union[str, Iterable[str]]:
+    """Учитывает выполненную команду; ленивый ответ учитывается после выдачи."""
+    if isinstance(result, str):
+        record(keyword, profile)
+        return result
+    return _recorded_chunks(result, keyword, profile)
+
+
+def stats_snapshot() -> Dict[str, Dict[str, Any]]:
+    """Возвращает сводку по видам команд: число, перцентили, фазы и просмотренные строки."""
+    with _histograms_lock:
+        return {keyword: _histograms[keyword].snapshot() for keyword in sorted(_histograms)}
+
+
+def export_json() -> str:
+    """Сводка stats_snapshot() в JSON для систем мониторинга."""
+    return json.dumps({"statements": stats_snapshot()}, ensure_ascii=False)
+
+
+def _format_ms(value_ns: float) -> str:
+    return f"{value_ns / 1e6:.3f} мс"
+
+
+def stats_summary() -> List[str]:
+    """Описывает время команд по видам: число и перцентили."""
+    with _histograms_lock:
+        histograms = sorted(_histograms.items())
+        lines = [
+            f"{keyword}: выполнено {histogram.count}, "
+            + ", ".join(
+                f"p{p} {_format_ms(histogram.percentile(p / 100))}" for p in PERCENTILES
+            )
+            + f", макс. {_format_ms(histogram.max_ns)}"
+            for keyword, histogram in histograms
+        ]
+    return lines or ["Команды еще не выполнялись."]
+
+
+def format_profile(keyword: str, profile: QueryProfile) -> str:
+    """Описывает профиль команды для EXPLAIN ANALYZE: фазы и строки."""
+    lines = [f"{keyword}: {_format_ms(profile.total_ns())}"]
+    lines.extend(
+        f"  {name}: {_format_ms(value)}" for name, value in zip(PHASES, profile.phases)
+    )
+    lines.append(
+        f"Строк просмотрено: {profile.rows_scanned}, отобрано: {profile.rows_returned}"
+    )
+    return "\n".join(lines)
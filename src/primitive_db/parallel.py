@@ -0,0 +1,181 @@
+import mmap
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from .codec import Buffer, Schema, decode_rows
+from .constants import PARALLEL_SCAN_MIN_ROWS, PARALLEL_SCAN_WORKERS
+from .mapped import MappedTable
+from .predicates import compile_condition
+
+# Страница для фильтрации: (смещения столбцов, число строк)
+PageLayout = Tuple[List[int], int]
+# Записи страницы, прошедшие фильтр: (позиция в странице, строка)
+PageHits = List[Tuple[int, Dict[str, Any]]]
+
+# Заданий на процесс: куски поменьше выравнивают нагрузку, если часть
+# страниц декодируется дольше (длинные строки, много совпадений)
+CHUNKS_PER_WORKER = 4
+
+_settings = {"workers": PARALLEL_SCAN_WORKERS, "min_rows": PARALLEL_SCAN_MIN_ROWS}
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+class StaleFileError(OSError):
+    """Файл таблицы заменен после того, как было составлено задание."""
+
+
+def set_parallel_scans(workers: int = PARALLEL_SCAN_WORKERS, min_rows: int = PARALLEL_SCAN_MIN_ROWS) -> None:
+    """Задает число процессов параллельного сканирования и порог размера таблицы.
+
+    workers=0 - по числу ядер, workers=1 - сканирование всегда в одном процессе.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None and workers != _settings["workers"]:
+            _executor.shutdown(wait=False)
+            _executor = None
+        _settings["workers"] = workers
+        _settings["min_rows"] = min_rows
+
+
+def scan_workers() -> int:
+    """Возвращает число процессов для параллельного сканирования."""
+    return _settings["workers"] or os.cpu_count() or 1
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn, а не fork: процесс сервера многопоточен, а дочерний процесс
+            # после fork унаследовал бы захваченные другими потоками блокировки
+            _executor = ProcessPoolExecutor(
+                max_workers=scan_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def filter_pages(
+    schema: Schema,
+    data: Buffer,
+    pages: List[PageLayout],
+    condition: Dict[str, Any],
+) -> List[PageHits]:
+    """Декодирует страницы и оставляет записи, удовлетворяющие условию.
+
+    Видимость записей (новые версии, надгробия) не учитывается: ее
+    проверяет MappedTable.visible_matches в основном процессе.
+    """
+    matches = compile_condition(condition)
+    result = []
+    for offsets, count in pages:
+        rows = decode_rows(schema, data, offsets, count)
+        result.append([(index, row) for index, row in enumerate(rows) if matches(row)])
+    return result
+
+
+def _scan_file(
+    path: str,
+    inode: int,
+    schema: Schema,
+    pages: List[PageLayout],
+    condition: Dict[str, Any],
+) -> List[PageHits]:
+    """Задание процесса: отображает файл таблицы и фильтрует свои страницы.
+
+    Файл только дописывается, поэтому страницы до конца, известного основному
+    процессу, не меняются; замену файла целиком выдает новый inode.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_ino != inode:
+            raise StaleFileError(path)
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return filter_pages(schema, data, pages, condition)
+    finally:
+        data.close()
+
+
+def _split(items: List[Any], parts: int) -> List[List[Any]]:
+    """Делит список на parts непрерывных кусков почти равной длины."""
+    size, extra = divmod(len(items), parts)
+    chunks, start = [], 0
+    for part in range(parts):
+        end = start + size + (part < extra)
+        if end > start:
+            chunks.append(items[start:end])
+        start = end
+    return chunks
+
+
+def _merge(
+    table: MappedTable,
+    chunks: List[List[Tuple[int, List[int], int]]],
+    futures: List["Future[List[PageHits]]"],
+    condition: Dict[str, Any],
+) -> Iterator[Dict[str, Any]]:
+    """Выдает результаты заданий в порядке страниц по мере готовности."""
+    matches = compile_condition(condition)
+    try:
+        for chunk, future in zip(chunks, futures):
+            try:
+                hits = future.result()
+            except Exception:
+                # Процесс недоступен или файл заменен: кусок фильтруется здесь,
+                # по отображению основного процесса (ошибки условия повторятся)
+                layouts = [(offsets, count) for _, offsets, count in chunk]
+                hits = filter_pages(table.schema, table.data, layouts, condition)
+            for (page_no, _, _), page_hits in zip(chunk, hits):
+                yield from table.visible_matches(page_no, page_hits, matches)
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def parallel_applicable(rows: Mapping[int, Dict[str, Any]]) -> bool:
+    """Проверяет, будут ли строки таблицы фильтроваться в нескольких процессах."""
+    return (
+        scan_workers() > 1
+        and isinstance(rows, MappedTable)
+        and not rows.pending
+        and len(rows) >= _settings["min_rows"]
+    )
+
+
+def parallel_scan(rows: Mapping[int, Dict[str, Any]], condition: Dict[str, Any]) -> Optional[Iterator[Dict[str, Any]]]:
+    """Фильтрует большую двоичную таблицу по условию в нескольких процессах.
+
+    Страницы делятся на непрерывные куски, каждый процесс сам отображает
+    файл и проверяет условие, скомпилированное из словаря условия (функции
+    условия не передаются между процессами). Результаты склеиваются в
+    порядке страниц, так что он совпадает с последовательным перебором.
+    Возвращает None, если параллельное сканирование не применимо: таблица
+    меньше порога, не отображена в память, изменена в транзакции или
+    процесс всего один.
+    """
+    if not parallel_applicable(rows):
+        return None
+    workers = scan_workers()
+
+    # Процессы запущены в рабочем каталоге на момент старта, путь - абсолютный
+    path = os.path.abspath(rows.path)
+    pages = rows.row_pages()
+    chunks = _split(pages, min(len(pages), workers * CHUNKS_PER_WORKER))
+    executor = _get_executor()
+    futures = [
+        executor.submit(
+            _scan_file,
+            path,
+            rows.inode,
+            rows.schema,
+            [(offsets, count) for _, offsets, count in chunk],
+            condition,
+        )
+        for chunk in chunks
+    ]
+    return _merge(rows, chunks, futures, condition)
@@ -1,91 +1,641 @@
-from typing import Any, Dict, List, Tuple
-
-
-def parse_where_condition(where_clause: str) -> Dict[str, Any]:
-    """Парсит условие WHERE в словарь."""
-    if not where_clause:
-        return {}
-
-    operators = ['=', '!=', '>', '<', '>=', '<=']
-
-    for op in operators:
-        if op in where_clause:
-            parts = where_clause.split(op, 1)
-            if len(parts) == 2:
-                column = parts[0].strip()
-                value = parse_value(parts[1].strip())
-                return {'column': column, 'operator': op, 'value': value}
-
-    return {}
-
-
-def parse_set_clause(set_clause: str) -> Dict[str, Any]:
-    """Парсит предложение SET для UPDATE."""
-    updates = {}
-    if not set_clause:
-        return updates
-
-    assignments = [a.strip() for a in set_clause.split(',')]
-
-    for assignment in assignments:
-        if '=' in assignment:
-            col, val = assignment.split('=', 1)
-            col = col.strip()
-            val = parse_value(val.strip())
-            updates[col] = val
-
-    return updates
-
-
-def parse_values_clause(values_clause: str) -> List[Any]:
-    """Парсит предложение VALUES для INSERT."""
-    if not values_clause:
-        return []
-
-    # Удаляем внешние скобки если есть
-    values_clause = values_clause.strip()
-    if values_clause.startswith('(') and values_clause.endswith(')'):
-        values_clause = values_clause[1:-1].strip()
-
-    # Ручной парсинг значений с учетом кавычек
-    values = []
-    current_value = ""
-    in_quotes = False
-    quote_char = None
-    paren_depth = 0
-
-    i = 0
-    while i < len(values_clause):
-        char = values_clause[i]
-
-        if char in ['"', "'"] and not in_quotes:
-            in_quotes = True
-            quote_char = char
-            current_value += char
-        elif char == quote_char and in_quotes:
-            in_quotes = False
-            current_value += char
-        elif char == '(' and not in_quotes:
-            paren_depth += 1
-            current_value += char
-        elif char == ')' and not in_quotes:
-            paren_depth -= 1
-            current_value += char
-        elif char == ',' and not in_quotes and paren_depth == 0:
-            # Нашли разделитель между значениями
-            if current_value.strip():
-                values.append(parse_value(current_value.strip()))
-            current_value = ""
+import re
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from .aggregates import AGGREGATE_FUNCTIONS, SelectItem, item_label
+from .formatters import OUTPUT_MODES
+from .sorting import OrderItem
+from .statements import (
+    SIMPLE_COMMANDS,
+    Analyze,
+    Command,
+    Compact,
+    Condition,
+    CreateIndex,
+    CreateTable,
+    Deallocate,
+    Delete,
+    DropIndex,
+    DropTable,
+    Execute,
+    Explain,
+    Info,
+    Insert,
+    Load,
+    Output,
+    Placeholder,
+    Prepare,
+    Select,
+    SelectJoin,
+    Statement,
+    Stats,
+    Update,
+    Vacuum,
+)
+
+# Токен: (вид, текст, ключ). Ключ слова - текст в верхнем регистре для
+# сравнения с ключевыми словами, у остальных токенов ключ равен тексту
+Token = Tuple[str, str, str]
+END_TOKEN: Token = ("end", "", "")
+
+TOKEN_RE = re.compile(
+    r'\s*(?:(?P<string>"[^"]*"|\'[^\']*\')'
+    r'|(?P<op><=|>=|!=|<>|=|<|>)'
+    r'|(?P<punct>[(),;])'
+    r'|(?P<word>[^\s()=<>!,;"\']+)'
+    r'|(?P<error>\S))'
+)
+
+WHERE_KEYWORDS = frozenset({"AND", "OR", "NOT", "IN", "BETWEEN", "LIKE"})
+# Ключевые слова предложений SELECT после WHERE
+CLAUSE_KEYWORDS = frozenset({"GROUP", "ORDER", "LIMIT", "OFFSET"})
+WHERE_VALUE_STOP = WHERE_KEYWORDS | CLAUSE_KEYWORDS
+SET_VALUE_STOP = frozenset({"WHERE"})
+NO_STOP: FrozenSet[str] = frozenset()
+
+PARAMETER_MARK = "?"
+
+USAGE = {
+    "CREATE TABLE": "CREATE TABLE table_name (column1 type1, ...)",
+    "DROP TABLE": "DROP TABLE table_name",
+    "CREATE INDEX": "CREATE INDEX ON table_name(column) [USING hash|sorted]",
+    "DROP INDEX": "DROP INDEX ON table_name(column)",
+    "INSERT": "INSERT INTO table_name VALUES (...)",
+    "LOAD": "LOAD table_name FROM 'file.csv'",
+    "SELECT": "SELECT [aggregates] FROM table_name [[INNER|LEFT] JOIN table2 ON table_name.column = table2.column] [WHERE condition] [GROUP BY column] [ORDER BY column [ASC|DESC], ...] [LIMIT n] [OFFSET m]",
+    "OUTPUT": "OUTPUT table|pages|tsv|jsonl [page_size]",
+    "UPDATE": "UPDATE table_name SET column=value [WHERE condition]",
+    "DELETE": "DELETE FROM table_name [WHERE condition]",
+    "INFO": "INFO table_name",
+    "COMPACT": "COMPACT table_name",
+    "VACUUM": "VACUUM [table_name]",
+    "ANALYZE": "ANALYZE [table_name]",
+    "PREPARE": "PREPARE name AS statement",
+    "EXECUTE": "EXECUTE name [(value1, value2, ...)]",
+    "DEALLOCATE": "DEALLOCATE name",
+    "EXPLAIN": "EXPLAIN [ANALYZE] statement",
+    "STATS": "STATS [JSON]",
+}
+
+
+class ParseError(ValueError):
+    """Синтаксическая ошибка команды."""
+
+
+def tokenize(text: str) -> List[Token]:
+    """Разбивает текст команды на токены за один проход.
+
+    Строки в кавычках остаются одним токеном вместе с кавычками, поэтому
+    ключевые слова и операторы внутри них не распознаются.
+    """
+    tokens = []
+    for match in TOKEN_RE.finditer(text):
+        kind = match.lastgroup
+        if kind is None:
+            # Пробелы в конце текста
+            continue
+        token_text = match.group(kind)
+        if kind == "word":
+            tokens.append((kind, token_text, token_text.upper()))
+        elif kind == "error":
+            if token_text in "\"'":
+                raise ParseError(f"Unterminated string starting at position {match.start(kind)}")
+            raise ParseError(f"Unexpected character '{token_text}' at position {match.start(kind)}")
         else:
-            current_value += char
-
-        i += 1
-
-    # Добавляем последнее значение
-    if current_value.strip():
-        values.append(parse_value(current_value.strip()))
-
-    return values
+            tokens.append((kind, token_text, token_text))
+    return tokens
+
+
+def describe(token: Token) -> str:
+    """Описывает токен для сообщения об ошибке."""
+    return "end of command" if token[0] == "end" else f"'{token[1]}'"
+
+
+class TokenParser:
+    """Рекурсивный спуск по списку токенов: условия WHERE и значения.
+
+    Грамматика условия:
+        expr       := and_expr (OR and_expr)*
+        and_expr   := not_expr (AND not_expr)*
+        not_expr   := NOT not_expr | '(' expr ')' | predicate
+        predicate  := column op value
+                    | column [NOT] IN '(' value (',' value)* ')'
+                    | column [NOT] BETWEEN value AND value
+                    | column [NOT] LIKE value
+        value      := строка в кавычках | слово+
+    """
+
+    def __init__(self, tokens: List[Token], allow_parameters: bool = False) -> None:
+        # Завершающий токен избавляет от проверок границы списка
+        self.tokens = tokens + [END_TOKEN]
+        self.position = 0
+        self.allow_parameters = allow_parameters
+        self.parameters = 0
+
+    # Ключ однозначно задает токен-знак или ключевое слово: строки хранятся
+    # с кавычками, а слова не содержат скобок, запятых и операторов
+
+    def peek(self) -> Token:
+        return self.tokens[self.position]
+
+    def advance(self) -> Token:
+        token = self.tokens[self.position]
+        if token[0] != "end":
+            self.position += 1
+        return token
+
+    def at_end(self) -> bool:
+        return self.tokens[self.position][0] == "end"
+
+    def at_word(self, key: str) -> bool:
+        return self.tokens[self.position][2] == key
+
+    def accept_word(self, key: str) -> bool:
+        if self.tokens[self.position][2] == key:
+            self.position += 1
+            return True
+        return False
+
+    def at_punct(self, char: str) -> bool:
+        return self.tokens[self.position][2] == char
+
+    def accept_punct(self, char: str) -> bool:
+        if self.tokens[self.position][2] == char:
+            self.position += 1
+            return True
+        return False
+
+    def error(self, detail: str) -> ParseError:
+        return ParseError(detail)
+
+    def where_error(self, detail: str) -> ParseError:
+        return ParseError(f"Invalid WHERE clause: {detail}")
+
+    def expect_word(self, key: str) -> None:
+        if not self.accept_word(key):
+            raise self.error(f"expected {key}, got {describe(self.peek())}")
+
+    def expect_punct(self, char: str) -> None:
+        if not self.accept_punct(char):
+            raise self.error(f"expected '{char}', got {describe(self.peek())}")
+
+    def expect_name(self, what: str) -> str:
+        kind, text, _ = self.peek()
+        if kind != "word":
+            raise self.error(f"expected {what}, got {describe(self.peek())}")
+        self.position += 1
+        return text
+
+    # Условие WHERE
+
+    def parse_condition(self) -> Condition:
+        """Разбирает условие до первого токена, не входящего в него."""
+        return self.parse_or()
+
+    def parse_or(self) -> Condition:
+        conditions = [self.parse_and()]
+        while self.accept_word("OR"):
+            conditions.append(self.parse_and())
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"operator": "OR", "conditions": conditions}
+
+    def parse_and(self) -> Condition:
+        conditions = [self.parse_not()]
+        while self.accept_word("AND"):
+            conditions.append(self.parse_not())
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"operator": "AND", "conditions": conditions}
+
+    def parse_not(self) -> Condition:
+        if self.accept_word("NOT"):
+            return {"operator": "NOT", "condition": self.parse_not()}
+        if self.accept_punct("("):
+            condition = self.parse_or()
+            if not self.accept_punct(")"):
+                raise self.where_error(f"expected ')', got {describe(self.peek())}")
+            return condition
+        return self.parse_predicate()
+
+    def parse_predicate(self) -> Condition:
+        kind, column, key = self.advance()
+        if kind != "word" or key in WHERE_KEYWORDS:
+            raise self.where_error(f"expected column name, got {describe((kind, column, key))}")
+
+        negated = self.accept_word("NOT")
+        kind, op, key = self.advance()
+        if kind == "op" and not negated:
+            condition = {
+                "column": column,
+                "operator": "!=" if op == "<>" else op,
+                "value": self.parse_where_value(),
+            }
+        elif kind == "word" and key == "IN":
+            if not self.accept_punct("("):
+                raise self.where_error(f"expected '(' after IN, got {describe(self.peek())}")
+            values = [self.parse_where_value()]
+            while self.accept_punct(","):
+                values.append(self.parse_where_value())
+            if not self.accept_punct(")"):
+                raise self.where_error(f"expected ')' after IN list, got {describe(self.peek())}")
+            condition = {"column": column, "operator": "IN", "value": values}
+        elif kind == "word" and key == "BETWEEN":
+            low = self.parse_where_value()
+            if not self.accept_word("AND"):
+                raise self.where_error(f"expected AND in BETWEEN, got {describe(self.peek())}")
+            high = self.parse_where_value()
+            condition = {"column": column, "operator": "BETWEEN", "value": [low, high]}
+        elif kind == "word" and key == "LIKE":
+            condition = {"column": column, "operator": "LIKE", "value": self.parse_where_value()}
+        else:
+            raise self.where_error(f"expected operator after '{column}'")
+
+        if negated:
+            return {"operator": "NOT", "condition": condition}
+        return condition
+
+    def parse_where_value(self) -> Any:
+        try:
+            return self.parse_literal(WHERE_VALUE_STOP)
+        except ParseError as e:
+            raise self.where_error(str(e)) from None
+
+    # Значения
+
+    def parse_literal(self, stop_words: FrozenSet[str]) -> Any:
+        """Разбирает значение: строку в кавычках или подряд идущие слова.
+
+        Слова объединяются через пробел и приводятся к типу parse_value.
+        В подготовленной команде одиночный знак ? - параметр.
+        """
+        kind, text, _ = self.peek()
+        if kind == "string":
+            self.position += 1
+            return text[1:-1]
+
+        words = []
+        while kind == "word" and self.peek()[2] not in stop_words:
+            words.append(text)
+            self.position += 1
+            kind, text, _ = self.peek()
+        if not words:
+            raise ParseError(f"expected value, got {describe(self.peek())}")
+
+        if self.allow_parameters and len(words) == 1 and words[0] == PARAMETER_MARK:
+            self.parameters += 1
+            return Placeholder(self.parameters - 1)
+        return parse_value(' '.join(words))
+
+    def parse_row_value(self) -> Any:
+        try:
+            return self.parse_literal(NO_STOP)
+        except ParseError as e:
+            raise self.error(str(e)) from None
+
+    def parse_value_row(self) -> List[Any]:
+        """Разбирает группу значений в скобках: (значение, ...)."""
+        self.expect_punct("(")
+        values: List[Any] = []
+        if self.accept_punct(")"):
+            return values
+        while True:
+            values.append(self.parse_row_value())
+            if self.accept_punct(")"):
+                return values
+            self.expect_punct(",")
+
+    def parse_value_rows(self) -> List[List[Any]]:
+        """Разбирает группы значений через запятую; без скобок - одна группа."""
+        if not self.at_punct("("):
+            values = [self.parse_row_value()]
+            while self.accept_punct(","):
+                values.append(self.parse_row_value())
+            return [values]
+
+        rows = [self.parse_value_row()]
+        while self.accept_punct(","):
+            rows.append(self.parse_value_row())
+        return rows
+
+
+class StatementParser(TokenParser):
+    """Разбор команды целиком в типизированный узел (statements.py).
+
+    Каждая команда разбирается одним проходом по токенам; ошибки содержат
+    подсказку с синтаксисом команды.
+    """
+
+    # Первое слово команды -> метод разбора
+    PARSERS = {
+        "CREATE": "parse_create",
+        "DROP": "parse_drop",
+        "INSERT": "parse_insert",
+        "LOAD": "parse_load",
+        "SELECT": "parse_select",
+        "UPDATE": "parse_update",
+        "DELETE": "parse_delete",
+        "INFO": "parse_info",
+        "COMPACT": "parse_compact",
+        "VACUUM": "parse_vacuum",
+        "ANALYZE": "parse_analyze",
+        "OUTPUT": "parse_output",
+        "PREPARE": "parse_prepare",
+        "EXECUTE": "parse_execute",
+        "DEALLOCATE": "parse_deallocate",
+        "EXPLAIN": "parse_explain",
+        "STATS": "parse_stats",
+    }
+
+    def __init__(self, tokens: List[Token], allow_parameters: bool = False) -> None:
+        super().__init__(tokens, allow_parameters)
+        self.form = ""
+
+    def error(self, detail: str) -> ParseError:
+        if not self.form:
+            return ParseError(detail)
+        return ParseError(f"Invalid {self.form} syntax: {detail}. Use: {USAGE[self.form]}")
+
+    def parse(self) -> Statement:
+        """Разбирает команду; после нее допускается только ';'."""
+        statement = self.parse_body()
+        self.accept_punct(";")
+        if not self.at_end():
+            raise self.error(f"unexpected {describe(self.peek())}")
+        return statement
+
+    def parse_body(self) -> Statement:
+        kind, text, key = self.advance()
+        if kind != "word":
+            raise ParseError(f"Unknown command {describe((kind, text, key))}")
+        if key in SIMPLE_COMMANDS:
+            return Command(key)
+        method = self.PARSERS.get(key)
+        if method is None:
+            raise ParseError(f"Unknown command '{key}'")
+        self.form = key
+        return getattr(self, method)()
+
+    def parse_where(self) -> Condition:
+        """Разбирает необязательное предложение WHERE."""
+        if not self.accept_word("WHERE"):
+            return {}
+        return self.parse_condition()
+
+    def parse_create(self) -> Statement:
+        if self.accept_word("INDEX"):
+            self.form = "CREATE INDEX"
+            table, column = self.parse_index_target()
+            kind = self.expect_name("index type").lower() if self.accept_word("USING") else "hash"
+            return CreateIndex(table, column, kind)
+
+        self.form = "CREATE TABLE"
+        self.expect_word("TABLE")
+        table = self.expect_name("table name")
+        self.expect_punct("(")
+        columns: Dict[str, str] = {}
+        if not self.accept_punct(")"):
+            while True:
+                column = self.expect_name("column name")
+                columns[column] = self.expect_name(f"type of column '{column}'").lower()
+                if self.accept_punct(")"):
+                    break
+                self.expect_punct(",")
+        return CreateTable(table, columns)
+
+    def parse_drop(self) -> Statement:
+        if self.accept_word("INDEX"):
+            self.form = "DROP INDEX"
+            table, column = self.parse_index_target()
+            if self.accept_word("USING"):
+                self.expect_name("index type")
+            return DropIndex(table, column)
+
+        self.form = "DROP TABLE"
+        self.expect_word("TABLE")
+        return DropTable(self.expect_name("table name"))
+
+    def parse_index_target(self) -> Tuple[str, str]:
+        self.expect_word("ON")
+        table = self.expect_name("table name")
+        self.expect_punct("(")
+        column = self.expect_name("column name")
+        self.expect_punct(")")
+        return table, column
+
+    def parse_insert(self) -> Statement:
+        self.expect_word("INTO")
+        table = self.expect_name("table name")
+        self.expect_word("VALUES")
+        return Insert(table, self.parse_value_rows())
+
+    def parse_load(self) -> Statement:
+        table = self.expect_name("table name")
+        self.expect_word("FROM")
+        kind, text, _ = self.advance()
+        if kind == "string":
+            return Load(table, text[1:-1])
+        if kind == "word":
+            return Load(table, text)
+        raise self.error(f"expected file path, got {describe((kind, text, text))}")
+
+    def parse_select(self) -> Statement:
+        items = None
+        if not self.at_word("FROM"):
+            items = [self.parse_select_item()]
+            while self.accept_punct(","):
+                items.append(self.parse_select_item())
+        self.expect_word("FROM")
+        table = self.expect_name("table name")
+        join_kind = self.parse_join_kind()
+        if join_kind is not None:
+            if items is not None:
+                raise ParseError("Aggregates are not supported with JOIN.")
+            right = self.expect_name("table name")
+            self.expect_word("ON")
+            on = self.parse_join_condition()
+        where = self.parse_where()
+
+        group_by = None
+        if self.accept_word("GROUP"):
+            self.expect_word("BY")
+            group_by = self.expect_name("column name")
+            if items is None:
+                raise ParseError("GROUP BY requires aggregate functions in SELECT.")
+
+        order_by = None
+        if self.accept_word("ORDER"):
+            self.expect_word("BY")
+            order_by = [self.parse_order_item()]
+            while self.accept_punct(","):
+                order_by.append(self.parse_order_item())
+
+        limit = self.parse_count("LIMIT")
+        offset = self.parse_count("OFFSET")
+        if join_kind is not None:
+            return SelectJoin(table, right, join_kind, on, where, order_by, limit, offset or 0)
+        return Select(table, items, where, group_by, order_by, limit, offset or 0)
+
+    def parse_join_kind(self) -> Optional[str]:
+        """Разбирает необязательное [INNER | LEFT [OUTER]] JOIN, возвращает вид соединения."""
+        if self.accept_word("LEFT"):
+            self.accept_word("OUTER")
+            kind = "LEFT"
+        elif self.accept_word("INNER") or self.at_word("JOIN"):
+            kind = "INNER"
+        else:
+            return None
+        self.expect_word("JOIN")
+        return kind
+
+    def parse_join_condition(self) -> Tuple[str, str]:
+        """Разбирает условие ON: таблица.столбец = таблица.столбец."""
+        first = self.expect_name("column name")
+        if not (self.peek()[0] == "op" and self.peek()[1] == "="):
+            raise self.error(f"expected '=' in JOIN condition, got {describe(self.peek())}")
+        self.position += 1
+        return (first, self.expect_name("column name"))
+
+    def parse_select_item(self) -> SelectItem:
+        """Разбирает элемент SELECT: FUNC(столбец|*) или столбец группировки."""
+        name = self.expect_name("aggregate or column")
+        if not self.accept_punct("("):
+            return (None, name)
+        function = name.upper()
+        if function not in AGGREGATE_FUNCTIONS:
+            raise ParseError(f"Unknown aggregate function '{function}'.")
+        argument = self.expect_name("column name or *")
+        self.expect_punct(")")
+        return (function, argument)
+
+    def parse_order_item(self) -> OrderItem:
+        """Разбирает элемент ORDER BY: столбец или FUNC(аргумент) и ASC|DESC."""
+        label = item_label(self.parse_select_item())
+        if self.accept_word("DESC"):
+            return (label, True)
+        self.accept_word("ASC")
+        return (label, False)
+
+    def parse_count(self, keyword: str) -> Optional[int]:
+        """Разбирает необязательное LIMIT n или OFFSET m."""
+        if not self.accept_word(keyword):
+            return None
+        text = self.expect_name(f"number after {keyword}")
+        if not text.isdigit():
+            raise self.error(f"{keyword} must be a non-negative integer, got '{text}'")
+        return int(text)
+
+    def parse_update(self) -> Statement:
+        table = self.expect_name("table name")
+        self.expect_word("SET")
+        assignments = {}
+        while True:
+            column = self.expect_name("column name")
+            if not (self.peek()[0] == "op" and self.peek()[1] == "="):
+                raise self.error(f"expected '=' after '{column}', got {describe(self.peek())}")
+            self.position += 1
+            try:
+                assignments[column] = self.parse_literal(SET_VALUE_STOP)
+            except ParseError as e:
+                raise self.error(str(e)) from None
+            if not self.accept_punct(","):
+                break
+        return Update(table, assignments, self.parse_where())
+
+    def parse_delete(self) -> Statement:
+        self.expect_word("FROM")
+        table = self.expect_name("table name")
+        return Delete(table, self.parse_where())
+
+    def parse_info(self) -> Statement:
+        return Info(self.expect_name("table name"))
+
+    def parse_compact(self) -> Statement:
+        return Compact(self.expect_name("table name"))
+
+    def parse_vacuum(self) -> Statement:
+        if self.at_end() or self.at_punct(";"):
+            return Vacuum(None)
+        return Vacuum(self.expect_name("table name"))
+
+    def parse_analyze(self) -> Statement:
+        if self.at_end() or self.at_punct(";"):
+            return Analyze(None)
+        return Analyze(self.expect_name("table name"))
+
+    def parse_output(self) -> Statement:
+        if self.at_end() or self.at_punct(";"):
+            return Output(None, None)
+        mode = self.expect_name("output mode").lower()
+        if mode not in OUTPUT_MODES:
+            raise self.error(f"unknown output mode '{mode}'")
+        page_size = None
+        if self.peek()[0] == "word":
+            text = self.advance()[1]
+            if not text.isdigit() or int(text) < 1:
+                raise ParseError("Page size must be a positive integer.")
+            page_size = int(text)
+        return Output(mode, page_size)
+
+    def parse_prepare(self) -> Statement:
+        name = self.expect_name("statement name")
+        self.expect_word("AS")
+        if self.peek()[2] in ("PREPARE", "EXECUTE", "DEALLOCATE", "EXPLAIN"):
+            raise ParseError(f"Cannot prepare {self.peek()[2]} statement.")
+        self.allow_parameters = True
+        statement = self.parse_body()
+        return Prepare(name, statement, self.parameters)
+
+    def parse_execute(self) -> Statement:
+        name = self.expect_name("statement name")
+        if self.at_end() or self.at_punct(";"):
+            return Execute(name, [])
+        rows = self.parse_value_rows()
+        if len(rows) > 1:
+            raise self.error("expected one group of values")
+        return Execute(name, rows[0])
+
+    def parse_deallocate(self) -> Statement:
+        return Deallocate(self.expect_name("statement name"))
+
+    def parse_explain(self) -> Statement:
+        analyze = self.accept_word("ANALYZE")
+        if self.peek()[2] in ("PREPARE", "DEALLOCATE", "EXPLAIN"):
+            raise ParseError(f"Cannot explain {self.peek()[2]} statement.")
+        statement = self.parse_body()
+        if not analyze and not isinstance(statement, (Select, SelectJoin, Update, Delete)):
+            raise ParseError(f"Cannot explain {statement.keyword} statement without ANALYZE.")
+        return Explain(statement, analyze)
+
+    def parse_stats(self) -> Statement:
+        return Stats(self.accept_word("JSON"))
+
+
+def parse_statement(command: str) -> Optional[Statement]:
+    """Разбирает команду в типизированный узел, пустая команда - None.
+
+    При синтаксической ошибке возбуждает ParseError (подкласс ValueError).
+    """
+    tokens = tokenize(command)
+    if not tokens:
+        return None
+    return StatementParser(tokens).parse()
+
+
+def parse_where_condition(where_clause: str) -> Condition:
+    """Парсит условие WHERE в дерево условий.
+
+    Простое сравнение - словарь {column, operator, value}, как и раньше.
+    Составные условия - {operator: AND|OR, conditions: [...]} и
+    {operator: NOT, condition: {...}}; IN, BETWEEN и LIKE хранят
+    в value список значений, границы диапазона и шаблон соответственно.
+    """
+    parser = TokenParser(tokenize(where_clause))
+    if parser.at_end():
+        return {}
+    condition = parser.parse_condition()
+    if not parser.at_end():
+        raise parser.where_error(f"unexpected {describe(parser.peek())}")
+    return condition
 
 
 def parse_value(value_str: str) -> Any:
@@ -124,33 +674,34 @@ def parse_value(value_str: str) -> Any:
     return value_str
 
 
-def parse_create_table(command_parts: List[str]) -> Tuple[str, Dict[str, str]]:
-    """Парсит команду CREATE TABLE."""
-    if len(command_parts) < 4:
-        raise ValueError("Invalid CREATE TABLE syntax")
-
-    table_name = command_parts[2]
-
-    # Объединяем оставшиеся части для получения определения столбцов
-    columns_str = ' '.join(command_parts[3:])
+def split_statements(script: str) -> List[Tuple[int, str]]:
+    """Делит текст сценария на команды, возвращает пары (номер строки, команда).
 
-    if not columns_str.startswith('(') or not columns_str.endswith(')'):
-        raise ValueError("Column definitions must be in parentheses")
-
-    columns_str = columns_str[1:-1].strip()
-    columns = {}
-
-    for col_def in columns_str.split(','):
-        col_def = col_def.strip()
-        if not col_def:
+    Команда занимает одну строку, несколько команд в строке разделяются
+    точкой с запятой вне кавычек. Строки, начинающиеся с --, - комментарии.
+    """
+    statements = []
+    for line_number, line in enumerate(script.splitlines(), 1):
+        if line.lstrip().startswith('--'):
             continue
 
-        parts = col_def.split()
-        if len(parts) < 2:
-            raise ValueError(f"Invalid column definition: {col_def}")
-
-        col_name = parts[0]
-        col_type = parts[1].lower()
-        columns[col_name] = col_type
-
-    return table_name, columns
+        current: List[str] = []
+        quote = None
+        for char in line:
+            if quote:
+                if char == quote:
+                    quote = None
+            elif char in '"\'':
+                quote = char
+            elif char == ';':
+                statement = ''.join(current).strip()
+                if statement:
+                    statements.append((line_number, statement))
+                current = []
+                continue
+            current.append(char)
+
+        statement = ''.join(current).strip()
+        if statement:
+            statements.append((line_number, statement))
+    return statements
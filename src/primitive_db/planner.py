@@ -0,0 +1,403 @@
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from .constants import (
+    COLUMNAR_INDEX_MAX_SELECTIVITY,
+    COLUMNAR_MIN_ROWS,
+    INDEX_MAX_SELECTIVITY,
+)
+from .indexes import index_kind
+from .parallel import parallel_applicable, scan_workers
+from .predicates import COMPARISON_OPERATORS
+
+# Способы перебора строк по условию WHERE
+ALL_ROWS = "all"
+EMPTY = "empty"
+INDEX = "index"
+PARALLEL = "parallel"
+COLUMNAR = "columnar"
+SCAN = "scan"
+
+# Доли строк для сравнений по столбцам без статистики (как в PostgreSQL)
+DEFAULT_EQ_SELECTIVITY = 0.005
+DEFAULT_RANGE_SELECTIVITY = 1 / 3
+DEFAULT_LIKE_SELECTIVITY = 0.1
+
+# Если различных значений больше этой доли строк, ANALYZE сохраняет долю,
+# а не число: оценка растет вместе с таблицей (ID, email)
+DISTINCT_RATIO_MIN = 0.1
+ANALYZE_CHUNK_ROWS = 10000
+
+# Типы значений условия, которые можно сравнивать с границами столбца
+COMPARABLE_TYPES = {"int": (int, float), "str": (str,), "bool": (bool,)}
+
+ColumnStats = Dict[str, Any]
+
+
+def new_column_stats(column_type: str) -> ColumnStats:
+    """Статистика пустого столбца.
+
+    distinct >= 0 - число различных значений, отрицательное значение - их
+    доля от числа строк. Пока ANALYZE не выполнялся, значения всех столбцов,
+    кроме bool, считаются различными.
+    """
+    return {"min": None, "max": None, "nulls": 0, "distinct": 0 if column_type == "bool" else -1.0}
+
+
+def init_table_stats(table_meta: Dict[str, Any]) -> None:
+    """Заводит статистику столбцов новой таблицы."""
+    table_meta["stats"] = {
+        column: new_column_stats(column_type)
+        for column, column_type in table_meta["columns"].items()
+    }
+
+
+def _add_values(column_stats: ColumnStats, values: List[Any], count_new: bool) -> None:
+    """Расширяет границы столбца значениями, считает пустые и новые значения.
+
+    Новым значение считается, только если оно вне прежних границ: так
+    оценка числа различных значений растет без хранения самих значений.
+    """
+    present = [value for value in values if value is not None]
+    column_stats["nulls"] += len(values) - len(present)
+    if not present:
+        return
+    low, high = min(present), max(present)
+    old_low, old_high = column_stats["min"], column_stats["max"]
+    if count_new and column_stats["distinct"] >= 0:
+        column_stats["distinct"] += sum(
+            1 for value in set(present)
+            if old_low is None or value < old_low or value > old_high
+        )
+    if old_low is None or low < old_low:
+        column_stats["min"] = low
+    if old_high is None or high > old_high:
+        column_stats["max"] = high
+
+
+def add_to_stats(
+    table_meta: Dict[str, Any],
+    rows: List[Dict[str, Any]],
+    columns: Optional[Iterable[str]] = None,
+) -> None:
+    """Учитывает в статистике новые строки или новые значения столбцов columns.
+
+    Границы только расширяются: после удаления строк они остаются верными,
+    хотя и менее точными. Изменение нужно сохранить вызовом save_metadata.
+    """
+    stats = table_meta.get("stats")
+    if not stats or not rows:
+        return
+    for column in list(columns if columns is not None else stats):
+        column_stats = stats.get(column)
+        if column_stats is None:
+            continue
+        try:
+            _add_values(column_stats, [row.get(column) for row in rows], count_new=True)
+        except TypeError:
+            # Значения разных типов несравнимы: границ у столбца больше нет
+            del stats[column]
+
+
+def remove_from_stats(
+    table_meta: Dict[str, Any],
+    rows: List[Dict[str, Any]],
+    columns: Optional[Iterable[str]] = None,
+) -> None:
+    """Учитывает удаление строк или старых значений столбцов columns.
+
+    Меняется только число пустых значений; границы и число различных
+    значений до ANALYZE остаются прежними.
+    """
+    stats = table_meta.get("stats")
+    if not stats or not rows:
+        return
+    for column in columns if columns is not None else stats:
+        column_stats = stats.get(column)
+        if column_stats is not None and column_stats["nulls"]:
+            removed = sum(1 for row in rows if row.get(column) is None)
+            column_stats["nulls"] = max(column_stats["nulls"] - removed, 0)
+
+
+def analyze_rows(table_meta: Dict[str, Any], rows: Iterable[Dict[str, Any]]) -> int:
+    """Пересчитывает статистику таблицы по всем строкам, возвращает их число.
+
+    Строки перебираются пачками: границы считаются встроенными min и max,
+    различные значения - множествами по столбцам.
+    """
+    columns = table_meta["columns"]
+    stats = {column: new_column_stats(column_type) for column, column_type in columns.items()}
+    seen: Dict[str, set] = {column: set() for column in columns}
+    count = 0
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, ANALYZE_CHUNK_ROWS))
+        if not chunk:
+            break
+        count += len(chunk)
+        for column in list(stats):
+            values = [row.get(column) for row in chunk]
+            try:
+                _add_values(stats[column], values, count_new=False)
+            except TypeError:
+                del stats[column]
+                continue
+            seen[column].update(value for value in values if value is not None)
+
+    for column, column_stats in stats.items():
+        distinct = len(seen[column])
+        if columns[column] != "bool" and distinct > count * DISTINCT_RATIO_MIN:
+            column_stats["distinct"] = -distinct / count
+        else:
+            column_stats["distinct"] = distinct
+    table_meta["stats"] = stats
+    table_meta["row_count"] = count
+    return count
+
+
+def _comparable(column_type: str, value: Any) -> bool:
+    types = COMPARABLE_TYPES.get(column_type, ())
+    return isinstance(value, types) and (column_type == "bool" or not isinstance(value, bool))
+
+
+def never_matches(condition: Dict[str, Any], table_meta: Dict[str, Any]) -> bool:
+    """Проверяет по границам столбцов, что условию не может удовлетворять ни одна строка.
+
+    Пустые значения не удовлетворяют ни сравнениям, кроме !=, ни IN,
+    BETWEEN и LIKE, поэтому столбец без непустых значений отсекает их все.
+    """
+    op = condition["operator"]
+    if op == "AND":
+        return any(never_matches(part, table_meta) for part in condition["conditions"])
+    if op == "OR":
+        return all(never_matches(part, table_meta) for part in condition["conditions"])
+    if op in ("NOT", "!="):
+        return False
+
+    column = condition["column"]
+    column_stats = table_meta["stats"].get(column)
+    if column_stats is None:
+        return False
+    low, high = column_stats["min"], column_stats["max"]
+    if low is None:
+        return True
+    if op == "LIKE":
+        return False
+
+    column_type = table_meta["columns"].get(column)
+    value = condition["value"]
+    values = value if op in ("IN", "BETWEEN") else [value]
+    if not all(_comparable(column_type, item) for item in values):
+        return False
+
+    if op == "IN":
+        return all(item < low or item > high for item in value)
+    if op == "BETWEEN":
+        return value[1] < low or value[0] > high or value[0] > value[1]
+    if op == "=":
+        return value < low or value > high
+    if op in ("<", "<="):
+        return not COMPARISON_OPERATORS[op](low, value)
+    return not COMPARISON_OPERATORS[op](high, value)
+
+
+def _distinct(column_stats: ColumnStats, total: int) -> float:
+    distinct = column_stats["distinct"]
+    if distinct < 0:
+        distinct = -distinct * total
+    return min(max(distinct, 1), max(total, 1))
+
+
+def _range_share(column_stats: ColumnStats, op: str, value: Any) -> Optional[float]:
+    """Доля непустых значений, удовлетворяющих сравнению, при равномерном распределении.
+
+    None - границы или значение не числовые.
+    """
+    low, high = column_stats["min"], column_stats["max"]
+    if not (isinstance(low, (int, float)) and isinstance(value, (int, float))):
+        return None
+    if low == high:
+        return 1.0 if COMPARISON_OPERATORS[op](low, value) else 0.0
+    below = min(max((value - low) / (high - low), 0.0), 1.0)
+    return below if op in ("<", "<=") else 1.0 - below
+
+
+def estimate_share(condition: Dict[str, Any], table_meta: Dict[str, Any], total: int) -> float:
+    """Оценивает долю строк, удовлетворяющих условию, по статистике столбцов.
+
+    Условия внутри AND и OR считаются независимыми, значения столбца -
+    распределенными равномерно между границами.
+    """
+    op = condition["operator"]
+    if op == "AND":
+        share = 1.0
+        for part in condition["conditions"]:
+            share *= estimate_share(part, table_meta, total)
+        return share
+    if op == "OR":
+        missed = 1.0
+        for part in condition["conditions"]:
+            missed *= 1.0 - estimate_share(part, table_meta, total)
+        return 1.0 - missed
+    if op == "NOT":
+        return 1.0 - estimate_share(condition["condition"], table_meta, total)
+
+    column_stats = table_meta["stats"].get(condition["column"])
+    if column_stats is None:
+        if op == "=":
+            return DEFAULT_EQ_SELECTIVITY
+        if op == "!=":
+            return 1.0 - DEFAULT_EQ_SELECTIVITY
+        if op == "IN":
+            return min(DEFAULT_EQ_SELECTIVITY * len(condition["value"]), 1.0)
+        return DEFAULT_LIKE_SELECTIVITY if op == "LIKE" else DEFAULT_RANGE_SELECTIVITY
+    if never_matches(condition, table_meta):
+        return 0.0
+
+    present = max(1.0 - column_stats["nulls"] / total, 0.0) if total else 1.0
+    distinct = _distinct(column_stats, total)
+    value = condition["value"]
+    if op == "=":
+        return present / distinct
+    if op == "!=":
+        return present * (1.0 - 1.0 / distinct)
+    if op == "IN":
+        return present * min(len(value) / distinct, 1.0)
+    if op == "LIKE":
+        return present * DEFAULT_LIKE_SELECTIVITY
+
+    if op == "BETWEEN":
+        above = _range_share(column_stats, ">=", value[0])
+        below = _range_share(column_stats, "<=", value[1])
+        share = None if above is None or below is None else max(above + below - 1.0, 0.0)
+    else:
+        share = _range_share(column_stats, op, value)
+    return present * (DEFAULT_RANGE_SELECTIVITY if share is None else share)
+
+
+def index_probes(index_defs: Dict[str, str], condition: Dict[str, Any]) -> Optional[List[str]]:
+    """Перечисляет поиски по ID и индексам, которыми lookup_index найдет кандидатов.
+
+    None - индексы к условию неприменимы (см. indexes.lookup_index).
+    """
+    op = condition["operator"]
+    if op in ("AND", "OR"):
+        probes: List[str] = []
+        for part in condition["conditions"]:
+            part_probes = index_probes(index_defs, part)
+            if part_probes is None:
+                if op == "OR":
+                    return None
+                continue
+            probes.extend(probe for probe in part_probes if probe not in probes)
+        return probes or None
+    if op == "NOT":
+        return None
+
+    kind = index_kind(index_defs, condition)
+    if kind is None:
+        return None
+    return ["ID"] if kind == "ID" else [f"{condition['column']} ({kind})"]
+
+
+def _candidates_share(
+    condition: Dict[str, Any],
+    table_meta: Dict[str, Any],
+    total: int,
+) -> Optional[float]:
+    """Оценивает долю строк, которые lookup_index соберет по индексам.
+
+    None - индексы к условию неприменимы. Поиск по ID не требует сбора и
+    сортировки кандидатов и считается бесплатным, как и любой индекс
+    таблицы без статистики.
+    """
+    op = condition["operator"]
+    if op in ("AND", "OR"):
+        shares = [_candidates_share(part, table_meta, total) for part in condition["conditions"]]
+        if op == "AND":
+            known = [share for share in shares if share is not None]
+            return min(known) if known else None
+        if None in shares:
+            return None
+        return min(sum(shares), 1.0)
+    if op == "NOT":
+        return None
+
+    kind = index_kind(table_meta.get("indexes"), condition)
+    if kind is None:
+        return None
+    if kind == "ID" or "stats" not in table_meta:
+        return 0.0
+    return estimate_share(condition, table_meta, total)
+
+
+def plan_scan(
+    table_meta: Dict[str, Any],
+    condition: Dict[str, Any],
+    rows: Mapping[int, Dict[str, Any]],
+    columnar: bool = False,
+) -> str:
+    """Выбирает способ перебора строк таблицы по условию WHERE.
+
+    По статистике условие, заведомо ложное для всех строк, дает пустой
+    результат без чтения данных, а индекс используется, только если он
+    отбирает не больше INDEX_MAX_SELECTIVITY строк: широкий диапазон
+    быстрее проверить перебором, чем собирать и сортировать ID. Перебор по
+    столбцам проверяет условие сразу по массивам, поэтому для него порог
+    ниже (COLUMNAR_INDEX_MAX_SELECTIVITY). Без статистики подходящий
+    индекс используется всегда.
+    """
+    if not condition:
+        return ALL_ROWS
+    if "stats" in table_meta and never_matches(condition, table_meta):
+        return EMPTY
+
+    total = len(rows)
+    share = _candidates_share(condition, table_meta, total)
+    if share is not None and share <= COLUMNAR_INDEX_MAX_SELECTIVITY:
+        return INDEX
+    parallel = parallel_applicable(rows)
+    columnar = columnar and not parallel and total >= COLUMNAR_MIN_ROWS
+    if share is not None and not columnar and share <= INDEX_MAX_SELECTIVITY:
+        return INDEX
+    if parallel:
+        return PARALLEL
+    return COLUMNAR if columnar else SCAN
+
+
+def estimate_rows(table_meta: Dict[str, Any], condition: Dict[str, Any], total: int) -> Optional[float]:
+    """Оценивает число строк, удовлетворяющих условию; None - у таблицы нет статистики."""
+    if "stats" not in table_meta:
+        return None
+    if not condition:
+        return float(total)
+    return estimate_share(condition, table_meta, total) * total
+
+
+def rows_per_value(table_meta: Dict[str, Any], column: str, total: int) -> Optional[float]:
+    """Оценивает число строк с одним значением столбца; None - у столбца нет статистики."""
+    if column == "ID":
+        return 1.0
+    column_stats = table_meta.get("stats", {}).get(column)
+    if column_stats is None:
+        return None
+    present = max(total - column_stats["nulls"], 0)
+    return present / _distinct(column_stats, total)
+
+
+def describe_scan(strategy: str, table_meta: Dict[str, Any], condition: Dict[str, Any]) -> str:
+    """Описывает способ перебора строк для EXPLAIN."""
+    if strategy == ALL_ROWS:
+        return "все строки без проверки условия"
+    if strategy == EMPTY:
+        return "пустой результат: условие вне границ значений столбцов, данные не читаются"
+    if strategy == INDEX:
+        probes = index_probes(table_meta.get("indexes"), condition) or []
+        if probes == ["ID"]:
+            return "поиск по ID: ID уникален, читаются только найденные строки"
+        return f"индекс: {', '.join(probes)}"
+    if strategy == PARALLEL:
+        return f"параллельное сканирование, процессов: {scan_workers()}"
+    if strategy == COLUMNAR:
+        return "сканирование по столбцам"
+    return "перебор строк с проверкой условия"
@@ -0,0 +1,136 @@
+import re
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Hashable, List, Optional, Union
+
+from .cache import MISSING, LRUCache, Stamp
+from .constants import PLAN_CACHE_SIZE
+from .statements import Placeholder
+
+# Пробелы вне кавычек не влияют на разбор команды
+STATEMENT_SPACE_RE = re.compile(r'("[^"]*"|\'[^\']*\')|\s+')
+
+# Планы не зависят от файлов базы, поэтому отпечаток у всех записей один
+PLAN_STAMP: Stamp = (0, 0, 0)
+
+
+class Plan:
+    """Разобранная команда: вид команды, функция ядра и готовые аргументы.
+
+    План не зависит от данных и может выполняться повторно: функции ядра
+    не изменяют переданные им условия и значения.
+    """
+
+    __slots__ = ("keyword", "function", "args")
+
+    def __init__(self, keyword: str, function: Callable[..., Any], *args: Any) -> None:
+        self.keyword = keyword
+        self.function = function
+        self.args = args
+
+    def run(self) -> Any:
+        """Выполняет команду."""
+        return self.function(*self.args)
+
+
+class PreparedStatement:
+    """Подготовленная команда: план с параметрами Placeholder и их число."""
+
+    __slots__ = ("plan", "parameters")
+
+    def __init__(self, plan: Plan, parameters: int) -> None:
+        self.plan = plan
+        self.parameters = parameters
+
+
+# Подготовленные команды сеанса: имя -> команда. Словарь заменяется
+# целиком при изменении, поэтому контексты не разделяют его между собой
+_prepared: ContextVar[Optional[Dict[str, PreparedStatement]]] = ContextVar(
+    "prepared_statements", default=None
+)
+
+# Разобранные команды по нормализованному тексту, общий для всех сеансов.
+# Объем кеша считается в записях: стоимость каждого плана - 1
+statement_cache = LRUCache(PLAN_CACHE_SIZE)
+
+
+def _substitute(value: Any, replace: Callable[[Any], Any]) -> Any:
+    """Копирует аргументы плана, заменяя листовые значения (ключи словарей не трогает)."""
+    if isinstance(value, dict):
+        return {key: _substitute(item, replace) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_substitute(item, replace) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_substitute(item, replace) for item in value)
+    return replace(value)
+
+
+def bind_parameters(prepared: PreparedStatement, values: List[Any]) -> Plan:
+    """Подставляет значения параметров в план подготовленной команды."""
+    if len(values) != prepared.parameters:
+        raise ValueError(
+            f"Expected {prepared.parameters} parameters, got {len(values)}"
+        )
+    if not prepared.parameters:
+        return prepared.plan
+
+    def replace(value: Any) -> Any:
+        if isinstance(value, Placeholder):
+            return values[value.index]
+        return value
+
+    plan = prepared.plan
+    return Plan(plan.keyword, plan.function, *_substitute(plan.args, replace))
+
+
+def get_prepared(name: str) -> Optional[PreparedStatement]:
+    """Возвращает подготовленную команду сеанса или None."""
+    return (_prepared.get() or {}).get(name)
+
+
+def set_prepared(name: str, prepared: Optional[PreparedStatement]) -> None:
+    """Сохраняет подготовленную команду сеанса, None удаляет ее."""
+    statements = dict(_prepared.get() or {})
+    if prepared is None:
+        statements.pop(name, None)
+    else:
+        statements[name] = prepared
+    _prepared.set(statements)
+
+
+def prepared_count() -> int:
+    """Возвращает число подготовленных команд сеанса."""
+    return len(_prepared.get() or {})
+
+
+def normalize_statement(command: str) -> str:
+    """Приводит текст команды к ключу кеша: пробелы вне кавычек схлопываются."""
+    return STATEMENT_SPACE_RE.sub(lambda m: m.group(1) or ' ', command.strip())
+
+
+def cached_plan(
+    command: str,
+    build: Callable[[str], Union[str, Plan]],
+) -> Union[str, Plan]:
+    """Возвращает план команды из кеша или строит и кеширует его.
+
+    Ошибки разбора (строки) не кешируются.
+    """
+    key: Hashable = normalize_statement(command)
+    plan = statement_cache.get(key, PLAN_STAMP)
+    if plan is MISSING:
+        plan = build(command)
+        if isinstance(plan, Plan):
+            statement_cache.put(key, PLAN_STAMP, plan, 1)
+    return plan
+
+
+def cache_summary(name: str, cache: LRUCache) -> str:
+    """Описывает состояние кеша: записи, попадания, промахи и их доля."""
+    with cache.lock:
+        hits, misses, entries = cache.hits, cache.misses, len(cache.entries)
+    total = hits + misses
+    hit_rate = hits / total * 100 if total else 0.0
+    return (
+        f"{name}: записей {entries}, попаданий {hits}, промахов {misses}, "
+        f"доля попаданий {hit_rate:.1f}%"
+    )
@@ -0,0 +1,185 @@
+import operator
+import re
+from typing import Any, Callable, Dict, List
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+COMPARISON_OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+}
+
+
+def _always_true(row: Dict[str, Any]) -> bool:
+    """Предикат для пустого условия."""
+    return True
+
+
+def like_to_regex(pattern: str) -> "re.Pattern[str]":
+    """Преобразует шаблон LIKE (% и _) в регулярное выражение."""
+    parts = []
+    for char in pattern:
+        if char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts), re.DOTALL)
+
+
+def _compile_comparison(column: str, compare: Callable, value: Any) -> Predicate:
+    """Компилирует сравнение столбца с константой.
+
+    Как в SQL, сравнение с NULL (None, например в правых столбцах строки
+    LEFT JOIN без пары) ложно, в том числе для !=.
+    """
+    def predicate(row: Dict[str, Any]) -> bool:
+        current = row.get(column)
+        if current is None:
+            return False
+        try:
+            return compare(current, value)
+        except TypeError:
+            return False
+    return predicate
+
+
+def _compile_in(column: str, values: List[Any]) -> Predicate:
+    """Компилирует проверку вхождения в список значений."""
+    try:
+        members = frozenset(values)
+    except TypeError:
+        members = tuple(values)
+
+    def predicate(row: Dict[str, Any]) -> bool:
+        try:
+            return row[column] in members
+        except (KeyError, TypeError):
+            return False
+    return predicate
+
+
+def _compile_between(column: str, low: Any, high: Any) -> Predicate:
+    """Компилирует проверку попадания в диапазон [low, high]."""
+    def predicate(row: Dict[str, Any]) -> bool:
+        try:
+            return low <= row[column] <= high
+        except (KeyError, TypeError):
+            return False
+    return predicate
+
+
+def _compile_like(column: str, pattern: str) -> Predicate:
+    """Компилирует сопоставление строки с шаблоном LIKE."""
+    fullmatch = like_to_regex(str(pattern)).fullmatch
+
+    def predicate(row: Dict[str, Any]) -> bool:
+        value = row.get(column)
+        return isinstance(value, str) and fullmatch(value) is not None
+    return predicate
+
+
+def _compile_and(predicates: List[Predicate]) -> Predicate:
+    """Компилирует конъюнкцию предикатов."""
+    if len(predicates) == 1:
+        return predicates[0]
+    if len(predicates) == 2:
+        first, second = predicates
+        return lambda row: first(row) and second(row)
+
+    def predicate(row: Dict[str, Any]) -> bool:
+        for part in predicates:
+            if not part(row):
+                return False
+        return True
+    return predicate
+
+
+def _compile_or(predicates: List[Predicate]) -> Predicate:
+    """Компилирует дизъюнкцию предикатов."""
+    if len(predicates) == 1:
+        return predicates[0]
+    if len(predicates) == 2:
+        first, second = predicates
+        return lambda row: first(row) or second(row)
+
+    def predicate(row: Dict[str, Any]) -> bool:
+        for part in predicates:
+            if part(row):
+                return True
+        return False
+    return predicate
+
+
+def _compile_not(condition: Dict[str, Any]) -> Predicate:
+    """Компилирует отрицание условия.
+
+    NOT переносится к простым условиям по законам де Моргана: простое
+    условие со столбцом NULL ложно вместе со своим отрицанием, как в SQL.
+    """
+    op = condition["operator"]
+    if op == "AND":
+        return _compile_or([_compile_not(c) for c in condition["conditions"]])
+    elif op == "OR":
+        return _compile_and([_compile_not(c) for c in condition["conditions"]])
+    elif op == "NOT":
+        return compile_condition(condition["condition"])
+
+    column = condition["column"]
+    inner = compile_condition(condition)
+
+    def predicate(row: Dict[str, Any]) -> bool:
+        return row.get(column) is not None and not inner(row)
+    return predicate
+
+
+def compile_condition(condition: Dict[str, Any]) -> Predicate:
+    """Компилирует дерево условия WHERE в функцию от строки.
+
+    Дерево разбирается один раз до начала сканирования, поэтому при проверке
+    строки не читаются поля условия и не сравниваются имена операторов.
+    """
+    if not condition:
+        return _always_true
+
+    op = condition["operator"]
+
+    if op == "AND":
+        return _compile_and([compile_condition(c) for c in condition["conditions"]])
+    elif op == "OR":
+        return _compile_or([compile_condition(c) for c in condition["conditions"]])
+    elif op == "NOT":
+        return _compile_not(condition["condition"])
+    elif op == "IN":
+        return _compile_in(condition["column"], condition["value"])
+    elif op == "BETWEEN":
+        low, high = condition["value"]
+        return _compile_between(condition["column"], low, high)
+    elif op == "LIKE":
+        return _compile_like(condition["column"], condition["value"])
+    elif op in COMPARISON_OPERATORS:
+        return _compile_comparison(
+            condition["column"], COMPARISON_OPERATORS[op], condition["value"]
+        )
+
+    raise ValueError(f"Unsupported operator '{op}' in WHERE clause")
+
+
+def condition_columns(condition: Dict[str, Any]) -> List[str]:
+    """Возвращает имена столбцов, используемых в условии."""
+    if not condition:
+        return []
+    op = condition["operator"]
+    if op in ("AND", "OR"):
+        columns = []
+        for part in condition["conditions"]:
+            columns.extend(condition_columns(part))
+        return columns
+    if op == "NOT":
+        return condition_columns(condition["condition"])
+    return [condition["column"]]
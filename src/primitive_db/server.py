@@ -0,0 +1,224 @@
+import asyncio
+import contextvars
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional, Union
+
+from .constants import SERVER_MAX_LINE
+from .decorators import confirmations_enabled
+from .engine import execute_plan, plan_command, plan_keyword
+from .locks import acquire_writer_lock, release_writer_lock
+from .plans import Plan
+from .utils import (
+    close_database,
+    in_transaction,
+    recover_database,
+    rollback_transaction,
+)
+
+# Команды, которые не изменяют данные и выполняются параллельно
+READ_COMMANDS = {
+    "SELECT", "INFO", "HELP", "OUTPUT", "STATS", "PREPARE", "DEALLOCATE", "EXIT",
+}
+
+
+def encode_frames(chunks: Iterable[str]) -> bytes:
+    """Кодирует ответ: кадры "<длина>\\n<байты UTF-8>", в конце кадр "0\\n"."""
+    out = bytearray()
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        if data:
+            out += b"%d\n" % len(data)
+            out += data
+    out += b"0\n"
+    return bytes(out)
+
+
+class ReadWriteLock:
+    """Блокировка читателей-писателя для потоков одного процесса.
+
+    Закешированные таблицы общие для всех соединений, а запись изменяет их
+    на месте, поэтому чтение не должно идти одновременно с записью.
+    Ожидающий писатель не пропускает новых читателей.
+    """
+
+    def __init__(self) -> None:
+        self.condition = threading.Condition()
+        self.readers = 0
+        self.writer = False
+        self.waiting_writers = 0
+
+    @contextmanager
+    def reading(self) -> Iterator[None]:
+        with self.condition:
+            while self.writer or self.waiting_writers:
+                self.condition.wait()
+            self.readers += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.readers -= 1
+                if not self.readers:
+                    self.condition.notify_all()
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        with self.condition:
+            self.waiting_writers += 1
+            while self.writer or self.readers:
+                self.condition.wait()
+            self.waiting_writers -= 1
+            self.writer = True
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.writer = False
+                self.condition.notify_all()
+
+
+def _init_session() -> None:
+    """Настраивает сеанс соединения: без подтверждений удаления."""
+    confirmations_enabled.set(False)
+
+
+class DatabaseServer:
+    """TCP-сервер: одна команда в строке, ответ кадрами с длиной.
+
+    Каждое соединение выполняет команды в своем контексте contextvars
+    (режим вывода, транзакция, блокировки), сами команды выполняются в пуле
+    потоков. Таблицы, индексы и кеши общие для всех соединений.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db")
+        self.rw_lock = ReadWriteLock()
+        # Записи соединений процесса идут по одной; транзакция держит слот до конца.
+        # Создается в цикле событий сервера
+        self.write_slot: Optional[asyncio.Lock] = None
+
+    def execute(self, plan: Union[str, Plan], is_write: bool) -> Optional[List[str]]:
+        """Выполняет команду в потоке пула, возвращает фрагменты ответа или None для EXIT."""
+        if not is_write:
+            with self.rw_lock.reading():
+                return self._run(plan)
+
+        # Блокировку записи базы ждем до блокировки потоков процесса, чтобы
+        # чтения не стояли, пока другой процесс держит транзакцию
+        acquire_writer_lock()
+        try:
+            with self.rw_lock.writing():
+                return self._run(plan)
+        finally:
+            release_writer_lock()
+
+    def _run(self, plan: Union[str, Plan]) -> Optional[List[str]]:
+        try:
+            result = execute_plan(plan)
+            if result == "EXIT":
+                return None
+            if isinstance(result, str):
+                return [result]
+            return list(result)
+        except Exception as e:
+            return [f"Unexpected error: {str(e)}"]
+
+    async def handle_connection(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Обслуживает одно соединение до EXIT или разрыва."""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        context.run(_init_session)
+        holds_slot = False
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode("utf-8").strip()
+                if not command:
+                    writer.write(encode_frames([]))
+                    await writer.drain()
+                    continue
+
+                # Команда разбирается один раз; ошибку разбора отвечаем сразу
+                plan = context.run(plan_command, command)
+                if isinstance(plan, str):
+                    writer.write(encode_frames([plan]))
+                    await writer.drain()
+                    continue
+
+                # EXECUTE относится к виду подготовленной команды сеанса
+                is_write = context.run(plan_keyword, plan) not in READ_COMMANDS
+                if is_write and not holds_slot:
+                    await self.write_slot.acquire()
+                    holds_slot = True
+                try:
+                    chunks = await loop.run_in_executor(
+                        self.executor, context.run, self.execute, plan, is_write
+                    )
+                finally:
+                    if holds_slot and not context.run(in_transaction):
+                        self.write_slot.release()
+                        holds_slot = False
+
+                if chunks is None:
+                    writer.write(encode_frames(["Goodbye!"]))
+                    await writer.drain()
+                    break
+                writer.write(encode_frames(chunks))
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # Остановка сервера: соединение закрывается как при разрыве
+            pass
+        finally:
+            if context.run(in_transaction):
+                await loop.run_in_executor(self.executor, context.run, rollback_transaction)
+            if holds_slot:
+                self.write_slot.release()
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        """Принимает соединения до SIGINT или SIGTERM."""
+        self.write_slot = asyncio.Lock()
+        stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stopped.set)
+            except (NotImplementedError, RuntimeError):
+                # Windows: остановка через KeyboardInterrupt
+                pass
+
+        server = await asyncio.start_server(
+            self.handle_connection, host, port, limit=SERVER_MAX_LINE
+        )
+        print(f"Сервер запущен на {host}:{port}", flush=True)
+        async with server:
+            await stopped.wait()
+        print("Сервер остановлен", flush=True)
+
+
+def run_server(host: str, port: int, workers: int) -> None:
+    """Запускает сервер базы данных."""
+    recovered = recover_database()
+    if recovered:
+        print(f"Восстановлено из журнала операций: {recovered}")
+
+    server = DatabaseServer(workers)
+    try:
+        asyncio.run(server.serve(host, port))
+    except KeyboardInterrupt:
+        print("\nСервер остановлен")
+    finally:
+        server.executor.shutdown()
+        close_database()
@@ -0,0 +1,155 @@
+import heapq
+import operator
+import os
+import pickle
+import tempfile
+from itertools import chain, islice
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .cache import estimate_size
+from .constants import DATA_DIR, SORT_MEMORY_BYTES
+
+Row = Dict[str, Any]
+# Элемент ORDER BY: (столбец или заголовок агрегата, по убыванию)
+OrderItem = Tuple[str, bool]
+SortKey = Callable[[Row], tuple]
+
+# Строк, по которым оценивается объем строки в памяти
+SAMPLE_ROWS = 1000
+# Строк в одной записи pickle временного файла: при слиянии в памяти
+# держится по одной такой пачке на каждую сброшенную часть
+SPILL_BATCH_ROWS = 1000
+
+_settings = {"memory_bytes": SORT_MEMORY_BYTES}
+
+
+def set_sort_memory(memory_bytes: int = SORT_MEMORY_BYTES) -> None:
+    """Задает бюджет памяти сортировки одной команды в байтах."""
+    _settings["memory_bytes"] = memory_bytes
+
+
+class _Descending:
+    """Значение ключа сортировки с обратным порядком сравнения."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __eq__(self, other: object) -> bool:
+        return self.value == other.value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+
+def sort_key(order_by: List[OrderItem], column_types: Dict[str, str]) -> SortKey:
+    """Строит ключ сортировки строк по списку ORDER BY.
+
+    NULL больше любого значения, как в PostgreSQL: при ASC он в конце, при
+    DESC в начале. На столбец в ключе пара (признак, значение), поэтому
+    NULL не сравнивается со значениями. По убыванию числа и bool
+    сортируются по -значению, остальные типы - через _Descending.
+    """
+    parts = []
+    for column, descending in order_by:
+        if not descending:
+            transform = None
+        elif column_types.get(column) in ("int", "bool"):
+            transform = operator.neg
+        else:
+            transform = _Descending
+        parts.append((column, descending, transform))
+
+    if len(parts) == 1 and not parts[0][1]:
+        column = parts[0][0]
+
+        def single_key(row: Row) -> tuple:
+            value = row.get(column)
+            return (value is None, value)
+        return single_key
+
+    def key(row: Row) -> tuple:
+        result: List[Any] = []
+        for column, descending, transform in parts:
+            value = row.get(column)
+            if value is None:
+                result += (not descending, None)
+            else:
+                result += (descending, value if transform is None else transform(value))
+        return tuple(result)
+    return key
+
+
+def sort_rows(rows: Iterable[Row], key: SortKey, keep: Optional[int] = None) -> Iterator[Row]:
+    """Возвращает строки в порядке key; keep - сколько первых строк нужно (None - все).
+
+    Если keep строк помещается в бюджет памяти, отбираются keep наименьших
+    кучей (heapq.nsmallest): O(N log k) времени и O(k) памяти. Иначе строки
+    сортируются в памяти, а не поместившиеся в бюджет - внешней сортировкой
+    слиянием. Порядок равных строк сохраняется.
+    """
+    rows = iter(rows)
+    buffer = list(islice(rows, SAMPLE_ROWS))
+    if not buffer:
+        return iter(())
+    row_bytes = max(estimate_size(buffer) // len(buffer), 1)
+    run_rows = max(_settings["memory_bytes"] // row_bytes, SAMPLE_ROWS)
+
+    if keep is not None and keep <= run_rows:
+        return iter(heapq.nsmallest(keep, chain(buffer, rows), key=key))
+
+    buffer.extend(islice(rows, run_rows - len(buffer)))
+    extra = next(rows, None)
+    if extra is None:
+        buffer.sort(key=key)
+        return iter(buffer[:keep])
+    buffer.append(extra)
+    return islice(_merge_runs(buffer, rows, key, run_rows), keep)
+
+
+def _merge_runs(buffer: List[Row], rows: Iterator[Row], key: SortKey, run_rows: int) -> Iterator[Row]:
+    """Сортирует данные частями по run_rows строк и сливает части из временных файлов.
+
+    Файлы создаются в DATA_DIR без имени (tempfile.TemporaryFile) и
+    удаляются при закрытии, в том числе если вывод прерван.
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    runs: List[IO[bytes]] = []
+    try:
+        while buffer:
+            buffer.sort(key=key)
+            runs.append(_spill(buffer))
+            buffer = list(islice(rows, run_rows))
+        yield from heapq.merge(*map(_read_run, runs), key=key)
+    finally:
+        for run in runs:
+            run.close()
+
+
+def _spill(rows: List[Row]) -> IO[bytes]:
+    """Записывает отсортированную часть во временный файл пачками."""
+    run = tempfile.TemporaryFile(dir=DATA_DIR, prefix="sort_", suffix=".tmp")
+    for start in range(0, len(rows), SPILL_BATCH_ROWS):
+        pickle.dump(rows[start:start + SPILL_BATCH_ROWS], run, pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+
+def _read_run(run: IO[bytes]) -> Iterator[Row]:
+    """Читает часть из временного файла по одной пачке."""
+    while True:
+        try:
+            batch = pickle.load(run)
+        except EOFError:
+            return
+        yield from batch
+
+
+def describe_sort(order_by: List[OrderItem], keep: Optional[int]) -> str:
+    """Описывает сортировку для EXPLAIN."""
+    columns = ", ".join(f"{column} {'DESC' if descending else 'ASC'}" for column, descending in order_by)
+    if keep is not None:
+        return f"{columns}; первые {keep} записей отбираются кучей"
+    budget = _settings["memory_bytes"] / (1024 * 1024)
+    return f"{columns}; в памяти до {budget:.0f} МБ, сверх - слиянием частей из временных файлов"
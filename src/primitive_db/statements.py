@@ -0,0 +1,306 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from .aggregates import SelectItem
+from .sorting import OrderItem
+
+# Условие WHERE хранится в виде дерева словарей (см. parser.parse_where_condition)
+Condition = Dict[str, Any]
+
+
+class Placeholder:
+    """Параметр подготовленной команды: номер значения в EXECUTE."""
+
+    __slots__ = ("index",)
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"Placeholder({self.index})"
+
+
+class Statement:
+    """Разобранная команда. keyword - первое слово команды."""
+
+    __slots__ = ()
+    keyword = ""
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other: object) -> bool:
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+
+class CreateTable(Statement):
+    """CREATE TABLE таблица (столбец тип, ...)."""
+
+    __slots__ = ("table", "columns")
+    keyword = "CREATE"
+
+    def __init__(self, table: str, columns: Dict[str, str]) -> None:
+        self.table = table
+        self.columns = columns
+
+
+class DropTable(Statement):
+    """DROP TABLE таблица."""
+
+    __slots__ = ("table",)
+    keyword = "DROP"
+
+    def __init__(self, table: str) -> None:
+        self.table = table
+
+
+class CreateIndex(Statement):
+    """CREATE INDEX ON таблица(столбец) [USING тип]."""
+
+    __slots__ = ("table", "column", "kind")
+    keyword = "CREATE"
+
+    def __init__(self, table: str, column: str, kind: str) -> None:
+        self.table = table
+        self.column = column
+        self.kind = kind
+
+
+class DropIndex(Statement):
+    """DROP INDEX ON таблица(столбец)."""
+
+    __slots__ = ("table", "column")
+    keyword = "DROP"
+
+    def __init__(self, table: str, column: str) -> None:
+        self.table = table
+        self.column = column
+
+
+class Insert(Statement):
+    """INSERT INTO таблица VALUES (...), (...)."""
+
+    __slots__ = ("table", "rows")
+    keyword = "INSERT"
+
+    def __init__(self, table: str, rows: List[List[Any]]) -> None:
+        self.table = table
+        self.rows = rows
+
+
+class Load(Statement):
+    """LOAD таблица FROM 'файл'."""
+
+    __slots__ = ("table", "path")
+    keyword = "LOAD"
+
+    def __init__(self, table: str, path: str) -> None:
+        self.table = table
+        self.path = path
+
+
+class Select(Statement):
+    """SELECT [элементы] FROM таблица [WHERE] [GROUP BY] [ORDER BY] [LIMIT] [OFFSET].
+
+    items равен None для выборки строк и списку элементов для агрегатов.
+    order_by - None или список (столбец или заголовок агрегата, по убыванию).
+    """
+
+    __slots__ = ("table", "items", "where", "group_by", "order_by", "limit", "offset")
+    keyword = "SELECT"
+
+    def __init__(
+        self,
+        table: str,
+        items: Optional[List[SelectItem]],
+        where: Condition,
+        group_by: Optional[str],
+        order_by: Optional[List[OrderItem]],
+        limit: Optional[int],
+        offset: int,
+    ) -> None:
+        self.table = table
+        self.items = items
+        self.where = where
+        self.group_by = group_by
+        self.order_by = order_by
+        self.limit = limit
+        self.offset = offset
+
+
+class SelectJoin(Statement):
+    """SELECT FROM таблица [INNER|LEFT] JOIN таблица ON t1.столбец = t2.столбец
+    [WHERE] [ORDER BY] [LIMIT] [OFFSET].
+
+    on - пара имен таблица.столбец в порядке записи; столбцы в WHERE и
+    ORDER BY тоже указываются с именем таблицы.
+    """
+
+    __slots__ = ("left", "right", "kind", "on", "where", "order_by", "limit", "offset")
+    keyword = "SELECT"
+
+    def __init__(
+        self,
+        left: str,
+        right: str,
+        kind: str,
+        on: Tuple[str, str],
+        where: Condition,
+        order_by: Optional[List[OrderItem]],
+        limit: Optional[int],
+        offset: int,
+    ) -> None:
+        self.left = left
+        self.right = right
+        self.kind = kind
+        self.on = on
+        self.where = where
+        self.order_by = order_by
+        self.limit = limit
+        self.offset = offset
+
+
+class Update(Statement):
+    """UPDATE таблица SET столбец = значение, ... [WHERE]."""
+
+    __slots__ = ("table", "assignments", "where")
+    keyword = "UPDATE"
+
+    def __init__(self, table: str, assignments: Dict[str, Any], where: Condition) -> None:
+        self.table = table
+        self.assignments = assignments
+        self.where = where
+
+
+class Delete(Statement):
+    """DELETE FROM таблица [WHERE]."""
+
+    __slots__ = ("table", "where")
+    keyword = "DELETE"
+
+    def __init__(self, table: str, where: Condition) -> None:
+        self.table = table
+        self.where = where
+
+
+class Info(Statement):
+    """INFO таблица."""
+
+    __slots__ = ("table",)
+    keyword = "INFO"
+
+    def __init__(self, table: str) -> None:
+        self.table = table
+
+
+class Compact(Statement):
+    """COMPACT таблица."""
+
+    __slots__ = ("table",)
+    keyword = "COMPACT"
+
+    def __init__(self, table: str) -> None:
+        self.table = table
+
+
+class Vacuum(Statement):
+    """VACUUM [таблица]; None - все таблицы с устаревшими записями."""
+
+    __slots__ = ("table",)
+    keyword = "VACUUM"
+
+    def __init__(self, table: Optional[str]) -> None:
+        self.table = table
+
+
+class Analyze(Statement):
+    """ANALYZE [таблица]; None - все таблицы."""
+
+    __slots__ = ("table",)
+    keyword = "ANALYZE"
+
+    def __init__(self, table: Optional[str]) -> None:
+        self.table = table
+
+
+class Output(Statement):
+    """OUTPUT [режим [размер_страницы]]; None - оставить текущее значение."""
+
+    __slots__ = ("mode", "page_size")
+    keyword = "OUTPUT"
+
+    def __init__(self, mode: Optional[str], page_size: Optional[int]) -> None:
+        self.mode = mode
+        self.page_size = page_size
+
+
+class Prepare(Statement):
+    """PREPARE имя AS команда; значения ? в команде - Placeholder."""
+
+    __slots__ = ("name", "statement", "parameters")
+    keyword = "PREPARE"
+
+    def __init__(self, name: str, statement: Statement, parameters: int) -> None:
+        self.name = name
+        self.statement = statement
+        self.parameters = parameters
+
+
+class Execute(Statement):
+    """EXECUTE имя [(значение, ...)]."""
+
+    __slots__ = ("name", "values")
+    keyword = "EXECUTE"
+
+    def __init__(self, name: str, values: List[Any]) -> None:
+        self.name = name
+        self.values = values
+
+
+class Deallocate(Statement):
+    """DEALLOCATE имя."""
+
+    __slots__ = ("name",)
+    keyword = "DEALLOCATE"
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+
+class Explain(Statement):
+    """EXPLAIN [ANALYZE] команда.
+
+    Без ANALYZE описывает выбранный способ поиска строк, с ANALYZE -
+    выполняет команду и описывает время ее фаз.
+    """
+
+    __slots__ = ("statement", "analyze")
+    keyword = "EXPLAIN"
+
+    def __init__(self, statement: Statement, analyze: bool) -> None:
+        self.statement = statement
+        self.analyze = analyze
+
+
+class Stats(Statement):
+    """STATS [JSON]: статистика кешей и времени команд."""
+
+    __slots__ = ("json_format",)
+    keyword = "STATS"
+
+    def __init__(self, json_format: bool) -> None:
+        self.json_format = json_format
+
+
+class Command(Statement):
+    """Команда без аргументов: BEGIN, COMMIT, ROLLBACK, HELP, EXIT."""
+
+    __slots__ = ("keyword",)
+
+    def __init__(self, keyword: str) -> None:
+        self.keyword = keyword
+
+
+SIMPLE_COMMANDS = {"BEGIN", "COMMIT", "ROLLBACK", "HELP", "EXIT"}
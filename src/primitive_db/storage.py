@@ -0,0 +1,417 @@
+import json
+import os
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from .codec import (
+    Schema,
+    encode_header,
+    encode_rows_page,
+    encode_tombstone_page,
+    read_header,
+    schema_from_columns,
+    schema_from_row,
+    tail_is_complete,
+    valid_length,
+)
+from .constants import BINARY_PAGE_ROWS, DATA_DIR, STORAGE_FORMAT
+from .mapped import MappedTable
+
+TOMBSTONE_KEY = "__deleted__"
+
+
+class TableStorage:
+    """Базовый интерфейс движка хранения данных таблицы."""
+
+    name = ""
+    extension = ""
+
+    def file_path(self, table_name: str) -> str:
+        """Возвращает путь к файлу таблицы."""
+        return os.path.join(DATA_DIR, f"{table_name}{self.extension}")
+
+    def exists(self, table_name: str) -> bool:
+        """Проверяет наличие файла таблицы."""
+        return os.path.exists(self.file_path(table_name))
+
+    def iter_rows(self, table_name: str) -> Iterator[Dict[str, Any]]:
+        """Итерирует живые строки таблицы."""
+        raise NotImplementedError
+
+    def load_rows(self, table_name: str) -> List[Dict[str, Any]]:
+        """Загружает все живые строки таблицы."""
+        return list(self.iter_rows(table_name))
+
+    def load_row_map(self, table_name: str) -> Dict[int, Dict[str, Any]]:
+        """Загружает живые строки таблицы в словарь по ID."""
+        return {row["ID"]: row for row in self.iter_rows(table_name)}
+
+    def open_rows(self, table_name: str) -> Tuple[Mapping[int, Dict[str, Any]], int]:
+        """Открывает живые строки таблицы для чтения по ID и перебора.
+
+        Возвращает строки и число всех записей файла, включая устаревшие
+        версии и надгробия. По умолчанию строки загружаются в словарь;
+        форматы с произвольным доступом к файлу возвращают ленивое отображение.
+        """
+        rows = self.load_row_map(table_name)
+        return rows, len(rows)
+
+    def rows_after_rewrite(
+        self, table_name: str, rows: List[Dict[str, Any]]
+    ) -> Mapping[int, Dict[str, Any]]:
+        """Возвращает строки таблицы, только что перезаписанной строками rows."""
+        return {row["ID"]: row for row in rows}
+
+    def append_rows(self, table_name: str, rows: Iterable[Dict[str, Any]]) -> None:
+        """Дописывает новые строки или новые версии существующих строк."""
+        raise NotImplementedError
+
+    def delete_rows(self, table_name: str, ids: Iterable[int]) -> None:
+        """Удаляет строки с указанными ID."""
+        raise NotImplementedError
+
+    def write_rows(
+        self,
+        table_name: str,
+        rows: List[Dict[str, Any]],
+        ids: List[int],
+        columns: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Записывает новые версии строк и удаления одной операцией.
+
+        columns - типы столбцов из метаданных таблицы; форматы со схемой
+        в файле берут ее из них, а не из значений строк.
+        """
+        if rows:
+            self.append_rows(table_name, rows)
+        if ids:
+            self.delete_rows(table_name, ids)
+
+    def rewrite(
+        self,
+        table_name: str,
+        rows: List[Dict[str, Any]],
+        columns: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Полностью перезаписывает файл таблицы (columns - см. write_rows)."""
+        raise NotImplementedError
+
+    def compact(self, table_name: str) -> Tuple[int, int]:
+        """Перезаписывает только живые строки, возвращает (живые, удаленные записи)."""
+        rows = self.load_rows(table_name)
+        self.rewrite(table_name, rows)
+        return len(rows), 0
+
+    def drop(self, table_name: str) -> None:
+        """Удаляет файл таблицы."""
+        try:
+            os.remove(self.file_path(table_name))
+        except FileNotFoundError:
+            pass
+
+
+def _replace_file(path: str, content: Union[str, bytes]) -> None:
+    """Записывает файл через временный файл и атомарную замену.
+
+    Временный файл сбрасывается на диск до замены, чтобы после сбоя на месте
+    таблицы оказалась либо старая, либо новая версия целиком.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb' if isinstance(content, bytes) else 'w') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class JsonStorage(TableStorage):
+    """Исходный формат: весь файл таблицы - один JSON-массив."""
+
+    name = "json"
+    extension = ".json"
+
+    def iter_rows(self, table_name: str) -> Iterator[Dict[str, Any]]:
+        try:
+            with open(self.file_path(table_name), 'r') as f:
+                return iter(json.load(f))
+        except FileNotFoundError:
+            return iter([])
+
+    def append_rows(self, table_name: str, rows: Iterable[Dict[str, Any]]) -> None:
+        data = self.load_rows(table_name)
+        positions = {row["ID"]: i for i, row in enumerate(data)}
+        for row in rows:
+            if row["ID"] in positions:
+                data[positions[row["ID"]]] = row
+            else:
+                positions[row["ID"]] = len(data)
+                data.append(row)
+        self.rewrite(table_name, data)
+
+    def delete_rows(self, table_name: str, ids: Iterable[int]) -> None:
+        ids = set(ids)
+        data = [row for row in self.load_rows(table_name) if row["ID"] not in ids]
+        self.rewrite(table_name, data)
+
+    def rewrite(
+        self,
+        table_name: str,
+        rows: List[Dict[str, Any]],
+        columns: Optional[Dict[str, str]] = None,
+    ) -> None:
+        _replace_file(self.file_path(table_name), json.dumps(rows, indent=2))
+
+
+class LogStorage(TableStorage):
+    """Журнальный формат JSON Lines: вставки и изменения только дописываются.
+
+    Каждая строка файла - полная версия строки таблицы. Более поздняя версия
+    с тем же ID заменяет предыдущую, запись-надгробие удаляет строку.
+    """
+
+    name = "jsonl"
+    extension = ".jsonl"
+
+    def _replay(self, table_name: str) -> Tuple[Dict[int, Dict[str, Any]], int]:
+        """Проигрывает журнал, возвращает живые строки и число всех записей."""
+        rows: Dict[int, Dict[str, Any]] = {}
+        records = 0
+        try:
+            with open(self.file_path(table_name), 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Недописанная последняя запись после сбоя
+                        continue
+                    records += 1
+                    if record.get(TOMBSTONE_KEY):
+                        rows.pop(record["ID"], None)
+                    else:
+                        rows[record["ID"]] = record
+        except FileNotFoundError:
+            pass
+        return rows, records
+
+    def iter_rows(self, table_name: str) -> Iterator[Dict[str, Any]]:
+        rows, _ = self._replay(table_name)
+        return iter(rows.values())
+
+    def load_row_map(self, table_name: str) -> Dict[int, Dict[str, Any]]:
+        rows, _ = self._replay(table_name)
+        return rows
+
+    def open_rows(self, table_name: str) -> Tuple[Mapping[int, Dict[str, Any]], int]:
+        return self._replay(table_name)
+
+    def _append_lines(self, table_name: str, records: Iterable[Dict[str, Any]]) -> None:
+        chunk = "".join(json.dumps(record) + "\n" for record in records)
+        if not chunk:
+            return
+        with open(self.file_path(table_name), 'ab+') as f:
+            # Недописанную после сбоя строку завершаем, чтобы не склеить ее
+            # с новой записью
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    chunk = "\n" + chunk
+            f.write(chunk.encode("utf-8"))
+
+    def append_rows(self, table_name: str, rows: Iterable[Dict[str, Any]]) -> None:
+        self._append_lines(table_name, rows)
+
+    def delete_rows(self, table_name: str, ids: Iterable[int]) -> None:
+        self._append_lines(
+            table_name, ({"ID": row_id, TOMBSTONE_KEY: True} for row_id in ids)
+        )
+
+    def write_rows(
+        self,
+        table_name: str,
+        rows: List[Dict[str, Any]],
+        ids: List[int],
+        columns: Optional[Dict[str, str]] = None,
+    ) -> None:
+        tombstones = ({"ID": row_id, TOMBSTONE_KEY: True} for row_id in ids)
+        self._append_lines(table_name, chain(rows, tombstones))
+
+    def rewrite(
+        self,
+        table_name: str,
+        rows: List[Dict[str, Any]],
+        columns: Optional[Dict[str, str]] = None,
+    ) -> None:
+        content = "".join(json.dumps(row) + "\n" for row in rows)
+        _replace_file(self.file_path(table_name), content)
+
+    def compact(self, table_name: str) -> Tuple[int, int]:
+        rows, records = self._replay(table_name)
+        live_rows = list(rows.values())
+        self.rewrite(table_name, live_rows)
+        return len(live_rows), records - len(live_rows)
+
+
+class BinaryStorage(TableStorage):
+    """Двоичный формат: страницы строк, закодированные по схеме (см. codec.py).
+
+    Схема хранится один раз в заголовке файла, значения - по столбцам без
+    имен. Как и в журнальном формате, изменения дописываются страницами:
+    более поздняя версия строки заменяет предыдущую, страница надгробий
+    удаляет строки.
+    """
+
+    name = "binary"
+    extension = ".tbl"
+
+    def open_rows(self, table_name: str) -> Tuple[Mapping[int, Dict[str, Any]], int]:
+        table = MappedTable(self.file_path(table_name))
+        return table, table.records
+
+    def rows_after_rewrite(
+        self, table_name: str, rows: List[Dict[str, Any]]
+    ) -> Mapping[int, Dict[str, Any]]:
+        return MappedTable(self.file_path(table_name))
+
+    def iter_rows(self, table_name: str) -> Iterator[Dict[str, Any]]:
+        return MappedTable(self.file_path(table_name)).values()
+
+    def load_row_map(self, table_name: str) -> Dict[int, Dict[str, Any]]:
+        return dict(MappedTable(self.file_path(table_name)).items())
+
+    def _schema(self, rows: List[Dict[str, Any]], columns: Optional[Dict[str, str]]) -> Schema:
+        """Схема нового файла: по типам столбцов, а без них - по первой строке."""
+        if columns is not None:
+            return schema_from_columns(columns)
+        return schema_from_row(rows[0])
+
+    def _encode_pages(self, schema: Schema, rows: List[Dict[str, Any]], ids: List[int]) -> bytes:
+        pages = [
+            encode_rows_page(schema, rows[start:start + BINARY_PAGE_ROWS])
+            for start in range(0, len(rows), BINARY_PAGE_ROWS)
+        ]
+        if ids:
+            pages.append(encode_tombstone_page(ids))
+        return b"".join(pages)
+
+    def write_rows(
+        self,
+        table_name: str,
+        rows: List[Dict[str, Any]],
+        ids: List[int],
+        columns: Optional[Dict[str, str]] = None,
+    ) -> None:
+        path = self.file_path(table_name)
+        if file_size(path) == 0:
+            # Новый файл создается целиком, поэтому заголовок не бывает
+            # недописанным. В пустой таблице удалять нечего
+            if rows:
+                schema = self._schema(rows, columns)
+                _replace_file(path, encode_header(schema) + self._encode_pages(schema, rows, []))
+            return
+
+        with open(path, 'ab+') as f:
+            schema, header_end = read_header(f)
+            size = f.seek(0, os.SEEK_END)
+            if not tail_is_complete(f, size, header_end):
+                # Недописанную после сбоя страницу отрезаем, чтобы новые
+                # страницы начинались с границы
+                f.seek(0)
+                f.truncate(valid_length(f.read(), header_end))
+            chunk = self._encode_pages(schema, rows, list(ids))
+            if chunk:
+                f.write(chunk)
+
+    def append_rows(self, table_name: str, rows: Iterable[Dict[str, Any]]) -> None:
+        self.write_rows(table_name, list(rows), [])
+
+    def delete_rows(self, table_name: str, ids: Iterable[int]) -> None:
+        self.write_rows(table_name, [], list(ids))
+
+    def rewrite(
+        self,
+        table_name: str,
+        rows: List[Dict[str, Any]],
+        columns: Optional[Dict[str, str]] = None,
+    ) -> None:
+        content = b""
+        if rows:
+            schema = self._schema(rows, columns)
+            content = encode_header(schema) + self._encode_pages(schema, rows, [])
+        _replace_file(self.file_path(table_name), content)
+
+    def compact(self, table_name: str) -> Tuple[int, int]:
+        table = MappedTable(self.file_path(table_name))
+        live_rows = list(table.values())
+        self.rewrite(table_name, live_rows, dict(table.schema))
+        return len(live_rows), table.records - len(live_rows)
+
+
+STORAGE_BACKENDS: Dict[str, TableStorage] = {
+    "json": JsonStorage(),
+    "jsonl": LogStorage(),
+    "binary": BinaryStorage(),
+}
+
+LEGACY_FORMAT = "json"
+
+
+def migrate_legacy_table(table_name: str, storage: TableStorage) -> None:
+    """Переносит таблицу из исходного JSON-формата в указанный движок."""
+    legacy = STORAGE_BACKENDS[LEGACY_FORMAT]
+    if storage is legacy or storage.exists(table_name):
+        return
+    if not legacy.exists(table_name):
+        return
+    storage.rewrite(table_name, legacy.load_rows(table_name))
+    legacy.drop(table_name)
+
+
+def get_storage(table_name: str) -> TableStorage:
+    """Возвращает движок хранения таблицы.
+
+    Формат таблицы определяется по существующему файлу, поэтому таблицы
+    в разных форматах работают одновременно; новые таблицы создаются в
+    формате STORAGE_FORMAT. Таблицы в исходном JSON-формате переносятся
+    в него при первом обращении.
+    """
+    storage = STORAGE_BACKENDS[STORAGE_FORMAT]
+    if storage.exists(table_name):
+        return storage
+    for name, other in STORAGE_BACKENDS.items():
+        if name != LEGACY_FORMAT and other is not storage and other.exists(table_name):
+            return other
+    migrate_legacy_table(table_name, storage)
+    return storage
+
+
+def convert_table(
+    table_name: str,
+    storage_format: str,
+    columns: Optional[Dict[str, str]] = None,
+) -> Tuple[str, int, int]:
+    """Переписывает таблицу в указанный формат (columns - см. TableStorage.write_rows).
+
+    Возвращает прежний формат и размеры файла до и после преобразования.
+    Блокировки и кеш - забота вызывающего кода.
+    """
+    source = get_storage(table_name)
+    target = STORAGE_BACKENDS[storage_format]
+    size_before = file_size(source.file_path(table_name))
+    if source is not target:
+        target.rewrite(table_name, source.load_rows(table_name), columns)
+        source.drop(table_name)
+    return source.name, size_before, file_size(target.file_path(table_name))
+
+
+def file_size(path: str) -> int:
+    """Возвращает размер файла, 0 - если файла нет."""
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def drop_table_files(table_name: str) -> None:
+    """Удаляет файлы таблицы во всех известных форматах."""
+    for storage in STORAGE_BACKENDS.values():
+        storage.drop(table_name)
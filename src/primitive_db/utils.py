@@ -1,8 +1,69 @@
+import csv
 import json
 import os
-from typing import Any, Dict, List
+import pickle
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
 
-from .constants import DATA_DIR, META_FILE
+from .cache import Stamp, estimate_size, file_stamp
+from .constants import (
+    DATA_DIR,
+    META_FILE,
+    VACUUM_DEAD_RATIO,
+    VACUUM_MIN_DEAD,
+    WAL_CHECKPOINT_BYTES,
+    WAL_FILE,
+    WAL_FSYNC,
+    WAL_FSYNC_INTERVAL_MS,
+)
+from .decorators import cache_results
+from .locks import (
+    WRITER_LOCK,
+    HeldLock,
+    acquire_writer_lock,
+    file_lock,
+    on_writer_lock,
+    read_lock_note,
+    release_writer_lock,
+    write_lock_note,
+    writer_lock,
+)
+from .mapped import MappedTable
+from .metrics import phase
+from .storage import convert_table, drop_table_files, get_storage
+from .wal import WriteAheadLog
+
+
+class TableState:
+    """Строки таблицы по ID, индексы и столбцовое представление.
+
+    Строки - словарь или ленивое отображение файла (см. mapped.py)
+    с теми же операциями.
+
+    Объект живет в кеше между командами, поэтому строки из него нельзя
+    изменять на месте: изменения записываются новыми версиями строк.
+    """
+
+    __slots__ = ("rows", "indexes", "columnar", "dead")
+
+    def __init__(self, rows: Mapping[int, Dict[str, Any]], dead: int = 0) -> None:
+        self.rows: Any = rows
+        self.indexes: Dict[str, Any] = {}
+        self.columnar: Any = None
+        # Устаревшие записи файла: замененные версии строк и надгробия
+        self.dead = dead
 
 
 def ensure_data_dir() -> None:
@@ -11,49 +72,593 @@ def ensure_data_dir() -> None:
         os.makedirs(DATA_DIR)
 
 
-def save_metadata(metadata: Dict[str, Any]) -> None:
-    """Сохраняет метаданные базы данных."""
-    ensure_data_dir()
-    with open(os.path.join(DATA_DIR, META_FILE), 'w') as f:
-        json.dump(metadata, f, indent=2)
+def get_metadata_path() -> str:
+    """Возвращает путь к файлу метаданных."""
+    return os.path.join(DATA_DIR, META_FILE)
 
 
-def load_metadata() -> Dict[str, Any]:
-    """Загружает метаданные базы данных."""
+@cache_results(stamp=lambda: file_stamp(get_metadata_path()))
+def _read_metadata() -> Dict[str, Any]:
+    """Читает метаданные с диска."""
     try:
-        with open(os.path.join(DATA_DIR, META_FILE), 'r') as f:
+        with open(get_metadata_path(), 'r') as f:
             return json.load(f)
     except FileNotFoundError:
         return {"tables": {}}
 
 
+def _copy_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Копирует метаданные целиком.
+
+    Метаданные копируются на каждую команду, и вместе со статистикой
+    столбцов их объем растет с числом таблиц. Круговое преобразование
+    pickle в несколько раз быстрее copy.deepcopy для словарей JSON.
+    """
+    return pickle.loads(pickle.dumps(metadata, pickle.HIGHEST_PROTOCOL))
+
+
+def _write_metadata_file(metadata: Dict[str, Any]) -> None:
+    """Записывает файл метаданных через временный файл и атомарную замену."""
+    tmp_path = f"{get_metadata_path()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_path, get_metadata_path())
+    stamp = file_stamp(get_metadata_path())
+    _read_metadata.cache.put((), stamp, _copy_metadata(metadata), max(stamp[1], 0))
+
+
+def save_metadata(metadata: Dict[str, Any]) -> None:
+    """Сохраняет метаданные базы данных."""
+    _write_records([{"op": "meta", "metadata": _copy_metadata(metadata)}])
+
+
+def _current_metadata() -> Dict[str, Any]:
+    """Возвращает метаданные с учетом изменений текущей транзакции."""
+    transaction = _transaction.get()
+    if transaction is not None and transaction.metadata is not None:
+        return transaction.metadata
+    return _read_metadata()
+
+
+def load_metadata() -> Dict[str, Any]:
+    """Загружает метаданные базы данных."""
+    with phase("metadata"):
+        return _copy_metadata(_current_metadata())
+
+
+def _table_stamp(table_name: str) -> Stamp:
+    """Возвращает отпечаток файла данных таблицы."""
+    return file_stamp(get_table_file_path(table_name))
+
+
+def _table_state_size(state: TableState) -> int:
+    """Оценивает объем памяти, занимаемый строками таблицы."""
+    return estimate_size(state.rows)
+
+
+@cache_results(stamp=_table_stamp, cost=_table_state_size)
+def load_table_state(table_name: str) -> TableState:
+    """Загружает строки таблицы, переиспользуя разобранные ранее данные.
+
+    Чтение идет под разделяемой блокировкой таблицы, поэтому набор изменений
+    другого процесса виден целиком или не виден вовсе.
+    """
+    with file_lock(table_name, exclusive=False):
+        rows, records = get_storage(table_name).open_rows(table_name)
+        return TableState(rows, records - len(rows))
+
+
+def _write_through(
+    table_name: str,
+    previous_stamp: Stamp,
+    apply: Callable[[TableState], None],
+) -> None:
+    """Переносит записанные изменения в кеш таблицы."""
+    load_table_state.cache.update(
+        (table_name,),
+        previous_stamp,
+        _table_stamp(table_name),
+        apply,
+        _table_state_size,
+    )
+
+
+def _table_columns(table_name: str) -> Optional[Dict[str, str]]:
+    """Возвращает типы столбцов таблицы из метаданных на диске.
+
+    Запись метаданных в журнале идет раньше записей данных, поэтому
+    при их применении метаданные на диске уже актуальны.
+    """
+    return _read_metadata()["tables"].get(table_name, {}).get("columns")
+
+
+def _apply_rewrite(table_name: str, rows: List[Dict[str, Any]]) -> None:
+    storage = get_storage(table_name)
+    storage.rewrite(table_name, rows, _table_columns(table_name))
+    state = TableState(storage.rows_after_rewrite(table_name, rows))
+    load_table_state.cache.put(
+        (table_name,), _table_stamp(table_name), state, _table_state_size(state)
+    )
+
+
 def save_table_data(table_name: str, data: List[Dict[str, Any]]) -> None:
-    """Сохраняет данные таблицы в отдельный JSON-файл."""
-    ensure_data_dir()
-    filename = os.path.join(DATA_DIR, f"{table_name}.json")
-    with open(filename, 'w') as f:
-        json.dump(data, f, indent=2)
+    """Полностью перезаписывает данные таблицы."""
+    _write_records([{"op": "rewrite", "table": table_name, "rows": data}])
+
+
+def get_table_state(table_name: str) -> TableState:
+    """Возвращает состояние таблицы с учетом изменений текущей транзакции."""
+    with phase("data"):
+        transaction = _transaction.get()
+        if transaction is not None and table_name in transaction.tables:
+            return transaction.tables[table_name].view(table_name)
+        return load_table_state(table_name)
 
 
 def load_table_data(table_name: str) -> List[Dict[str, Any]]:
-    """Загружает данные таблицы из JSON-файла."""
+    """Загружает живые строки таблицы."""
+    return list(get_table_state(table_name).rows.values())
+
+
+def iter_table_rows(table_name: str) -> Iterator[Dict[str, Any]]:
+    """Лениво перебирает живые строки таблицы без копирования списка."""
+    return iter(get_table_state(table_name).rows.values())
+
+
+def load_table_rows_by_id(table_name: str) -> Mapping[int, Dict[str, Any]]:
+    """Возвращает живые строки таблицы в словаре по ID (только для чтения)."""
+    return get_table_state(table_name).rows
+
+
+def _put_into_state(state: TableState, rows: Iterable[Dict[str, Any]]) -> None:
+    """Добавляет версии строк в состояние таблицы, поддерживая индексы."""
+    for row in rows:
+        old_row = state.rows.get(row["ID"])
+        for index in state.indexes.values():
+            if old_row is not None:
+                index.remove(old_row)
+            index.add(row)
+        state.rows[row["ID"]] = row
+        if old_row is not None:
+            state.dead += 1
+        if state.columnar is not None:
+            if old_row is None:
+                state.columnar.append(row)
+            else:
+                state.columnar = None
+
+
+def _delete_from_state(state: TableState, ids: Iterable[int]) -> None:
+    """Удаляет строки из состояния таблицы, поддерживая индексы."""
+    for row_id in ids:
+        old_row = state.rows.pop(row_id, None)
+        # Надгробие само становится устаревшей записью
+        state.dead += 1
+        if old_row is not None:
+            state.dead += 1
+            for index in state.indexes.values():
+                index.remove(old_row)
+            state.columnar = None
+
+
+# Таблицы, которые стоит сжать при ближайшей контрольной точке
+_vacuum_candidates: Set[str] = set()
+
+
+def _refresh_mapped_rows(state: TableState) -> None:
+    """Дочитывает в отображенные строки таблицы страницы, записанные в файл."""
+    if isinstance(state.rows, MappedTable):
+        state.rows.refresh()
+
+
+def _apply_write(table_name: str, rows: List[Dict[str, Any]], ids: List[int]) -> None:
+    previous_stamp = _table_stamp(table_name)
+    get_storage(table_name).write_rows(table_name, rows, ids, _table_columns(table_name))
+
+    def apply(state: TableState) -> None:
+        _put_into_state(state, rows)
+        _delete_from_state(state, ids)
+        _refresh_mapped_rows(state)
+        if needs_vacuum(state):
+            _vacuum_candidates.add(table_name)
+
+    _write_through(table_name, previous_stamp, apply)
+
+
+def needs_vacuum(state: TableState) -> bool:
+    """Проверяет, занимают ли устаревшие записи заметную часть файла таблицы."""
+    return (
+        state.dead >= VACUUM_MIN_DEAD
+        and state.dead >= (state.dead + len(state.rows)) * VACUUM_DEAD_RATIO
+    )
+
+
+def append_table_rows(table_name: str, rows: Iterable[Dict[str, Any]]) -> None:
+    """Дописывает новые строки или новые версии строк в таблицу."""
+    _write_records([{"op": "write", "table": table_name, "rows": list(rows), "ids": []}])
+
+
+def delete_table_rows(table_name: str, ids: Iterable[int]) -> None:
+    """Помечает строки с указанными ID как удаленные."""
+    _write_records([{"op": "write", "table": table_name, "rows": [], "ids": list(ids)}])
+
+
+def _after_compact(state: TableState) -> None:
+    state.dead = 0
+    _refresh_mapped_rows(state)
+
+
+def compact_table_data(table_name: str) -> Tuple[int, int]:
+    """Перезаписывает только живые строки таблицы."""
+    with writer_lock(), file_lock(table_name, exclusive=True):
+        previous_stamp = _table_stamp(table_name)
+        result = get_storage(table_name).compact(table_name)
+        _write_through(table_name, previous_stamp, _after_compact)
+        _vacuum_candidates.discard(table_name)
+    return result
+
+
+def table_dead_records(table_name: str) -> int:
+    """Возвращает число устаревших записей в файле таблицы."""
+    return load_table_state(table_name).dead
+
+
+def vacuum_pending_tables() -> List[Tuple[str, int, int]]:
+    """Сжимает таблицы, в которых после записи накопилось много устаревших записей.
+
+    Возвращает (таблица, живых записей, удалено устаревших) по каждой
+    сжатой таблице. Кандидаты отмечаются при записи (см. needs_vacuum),
+    решение перепроверяется: файл могли сжать или удалить.
+    """
+    results = []
+    with writer_lock():
+        while _vacuum_candidates:
+            table_name = _vacuum_candidates.pop()
+            if table_exists(table_name) and needs_vacuum(load_table_state(table_name)):
+                results.append((table_name, *compact_table_data(table_name)))
+    return results
+
+
+def convert_table_storage(table_name: str, storage_format: str) -> Tuple[str, int, int]:
+    """Переводит файл таблицы в другой формат хранения (см. storage.convert_table)."""
+    with writer_lock(), file_lock(table_name, exclusive=True):
+        result = convert_table(table_name, storage_format, _table_columns(table_name))
+        load_table_state.cache.invalidate((table_name,))
+    return result
+
+
+def _apply_drop(table_name: str) -> None:
+    drop_table_files(table_name)
+    load_table_state.cache.invalidate((table_name,))
+
+
+def drop_table_data(table_name: str) -> None:
+    """Удаляет файлы данных таблицы."""
+    _write_records([{"op": "drop", "table": table_name}])
+
+
+class PendingTable:
+    """Незафиксированные изменения одной таблицы внутри транзакции.
+
+    Хранятся только измененные строки. Полное состояние таблицы для чтения
+    внутри транзакции строится при первом обращении и дальше поддерживается.
+    """
+
+    __slots__ = ("base", "dropped", "changes", "state")
+
+    def __init__(self) -> None:
+        # Строки после перезаписи таблицы, None - за основу берутся сохраненные
+        self.base: Optional[Dict[int, Dict[str, Any]]] = None
+        self.dropped = False
+        # ID -> новая версия строки или None для удаленной
+        self.changes: Dict[int, Optional[Dict[str, Any]]] = {}
+        self.state: Optional[TableState] = None
+
+    def write(self, rows: List[Dict[str, Any]], ids: List[int]) -> None:
+        for row in rows:
+            self.changes[row["ID"]] = row
+        for row_id in ids:
+            self.changes[row_id] = None
+        if self.state is not None:
+            _put_into_state(self.state, rows)
+            _delete_from_state(self.state, ids)
+
+    def rewrite(self, rows: List[Dict[str, Any]]) -> None:
+        self.base = {row["ID"]: row for row in rows}
+        self.dropped = False
+        self.changes = {}
+        self.state = None
+
+    def drop(self) -> None:
+        self.base = {}
+        self.dropped = True
+        self.changes = {}
+        self.state = None
+
+    def view(self, table_name: str) -> TableState:
+        """Возвращает состояние таблицы с примененными изменениями."""
+        if self.state is None:
+            base = self.base if self.base is not None else load_table_state(table_name).rows
+            rows = dict(base.items())
+            for row_id, row in self.changes.items():
+                if row is None:
+                    rows.pop(row_id, None)
+                else:
+                    rows[row_id] = row
+            self.state = TableState(rows)
+        return self.state
+
+    def records(self, table_name: str) -> List[Dict[str, Any]]:
+        """Сворачивает изменения таблицы в одну запись журнала."""
+        if self.dropped:
+            return [{"op": "drop", "table": table_name}]
+        if self.base is not None:
+            rows = list(self.view(table_name).rows.values())
+            return [{"op": "rewrite", "table": table_name, "rows": rows}]
+
+        rows = [row for row in self.changes.values() if row is not None]
+        ids = [row_id for row_id, row in self.changes.items() if row is None]
+        if ids:
+            # Строки, вставленные и удаленные в этой же транзакции, не записываем
+            saved = load_table_state(table_name).rows
+            ids = [row_id for row_id in ids if row_id in saved]
+        if not rows and not ids:
+            return []
+        return [{"op": "write", "table": table_name, "rows": rows, "ids": ids}]
+
+
+class Transaction:
+    """Буфер изменений метаданных и таблиц до фиксации."""
+
+    def __init__(self) -> None:
+        self.metadata: Optional[Dict[str, Any]] = None
+        self.tables: Dict[str, PendingTable] = {}
+
+    def apply(self, record: Dict[str, Any]) -> None:
+        """Применяет запись к буферу вместо файлов данных."""
+        op = record["op"]
+        if op == "meta":
+            self.metadata = record["metadata"]
+            return
+
+        pending = self.tables.setdefault(record["table"], PendingTable())
+        if op == "write":
+            pending.write(record["rows"], record["ids"])
+        elif op == "rewrite":
+            pending.rewrite(record["rows"])
+        elif op == "drop":
+            pending.drop()
+        else:
+            raise ValueError(f"Unknown log record '{op}'")
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Возвращает итоговые записи: метаданные и по одной на таблицу."""
+        records = []
+        if self.metadata is not None:
+            records.append({"op": "meta", "metadata": self.metadata})
+        for table_name, pending in self.tables.items():
+            records.extend(pending.records(table_name))
+        return records
+
+
+def get_wal_path() -> str:
+    """Возвращает путь к журналу упреждающей записи."""
+    return os.path.join(DATA_DIR, WAL_FILE)
+
+
+_wal = WriteAheadLog(get_wal_path(), WAL_FSYNC, WAL_FSYNC_INTERVAL_MS)
+
+# Транзакция текущего контекста: BEGIN или блок atomic_write()
+_transaction: ContextVar[Optional[Transaction]] = ContextVar("transaction", default=None)
+
+
+def set_wal_fsync_policy(policy: str, interval_ms: int = WAL_FSYNC_INTERVAL_MS) -> None:
+    """Меняет политику fsync журнала: always, interval или never."""
+    global _wal
+    _wal.close()
+    _wal = WriteAheadLog(get_wal_path(), policy, interval_ms)
+
+
+def _apply_record(record: Dict[str, Any]) -> None:
+    """Применяет запись журнала к файлам данных и кешу.
+
+    Каждая запись задает итоговое состояние (версии строк, удаленные ID,
+    метаданные целиком), поэтому повторное применение безопасно.
+    """
+    op = record["op"]
+    if op == "meta":
+        _write_metadata_file(record["metadata"])
+        return
+
+    table_name = record["table"]
+    with file_lock(table_name, exclusive=True):
+        if op == "write":
+            _apply_write(table_name, record["rows"], record["ids"])
+        elif op == "rewrite":
+            _apply_rewrite(table_name, record["rows"])
+        elif op == "drop":
+            _apply_drop(table_name)
+        else:
+            raise ValueError(f"Unknown log record '{op}'")
+
+
+def _commit_records(records: List[Dict[str, Any]]) -> None:
+    """Записывает набор в журнал, затем применяет его к файлам данных.
+
+    После применения в файле блокировки записи отмечается смещение конца
+    журнала: если процесс завершится аварийно посередине, следующий
+    захвативший блокировку процесс допишет набор.
+    """
+    if not records:
+        return
+    ensure_data_dir()
+    with phase("save"), writer_lock() as lock:
+        _wal.append(records)
+        for record in records:
+            _apply_record(record)
+        write_lock_note(lock, str(_wal.size()))
+        if _wal.size() >= WAL_CHECKPOINT_BYTES:
+            checkpoint()
+
+
+def _replay_wal(start: int) -> int:
+    """Повторно применяет наборы журнала начиная со смещения, возвращает их число."""
+    replayed = 0
+    for records in _wal.read_batches(start):
+        for record in records:
+            _apply_record(record)
+        replayed += 1
+    return replayed
+
+
+@on_writer_lock
+def _finish_interrupted_commit(lock: HeldLock) -> None:
+    """Дописывает набор, прерванный аварийным завершением другого процесса.
+
+    Метаданные перечитываются с диска: команда записи должна видеть
+    последние изменения других процессов независимо от точности mtime.
+    """
+    _read_metadata.cache.invalidate(())
+    note = read_lock_note(lock)
+    wal_size = _wal.size()
+    applied = int(note) if note.isdigit() else 0
+    if applied > wal_size:
+        # Журнал очищен контрольной точкой
+        applied = 0
+    if applied < wal_size:
+        _replay_wal(applied)
+        write_lock_note(lock, str(wal_size))
+
+
+def _write_records(records: List[Dict[str, Any]]) -> None:
+    transaction = _transaction.get()
+    if transaction is None:
+        _commit_records(records)
+        return
+    for record in records:
+        transaction.apply(record)
+
+
+@contextmanager
+def atomic_write() -> Iterator[None]:
+    """Объединяет изменения нескольких вызовов в один набор журнала.
+
+    Изменения применяются при выходе из блока и только если в нем не было
+    исключения: после сбоя набор восстанавливается целиком или не
+    восстанавливается вовсе. Внутри транзакции изменения остаются в ней.
+    """
+    if _transaction.get() is not None:
+        yield
+        return
+
+    transaction = Transaction()
+    token = _transaction.set(transaction)
     try:
-        filename = os.path.join(DATA_DIR, f"{table_name}.json")
-        with open(filename, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
+        yield
+    finally:
+        _transaction.reset(token)
+    _commit_records(transaction.records())
+
+
+def in_transaction() -> bool:
+    """Проверяет, открыта ли транзакция в текущем контексте."""
+    return _transaction.get() is not None
+
+
+def begin_transaction() -> None:
+    """Открывает транзакцию: изменения накапливаются в памяти до COMMIT.
+
+    Транзакция удерживает блокировку записи базы до COMMIT или ROLLBACK,
+    поэтому изменения других процессов не могут с ней пересечься.
+    """
+    if _transaction.get() is not None:
+        raise ValueError("Transaction already in progress")
+    ensure_data_dir()
+    acquire_writer_lock()
+    _transaction.set(Transaction())
+
+
+def commit_transaction() -> int:
+    """Фиксирует транзакцию одним набором журнала, возвращает число таблиц."""
+    transaction = _transaction.get()
+    if transaction is None:
+        raise ValueError("No transaction in progress")
+    _transaction.set(None)
+    try:
+        _commit_records(transaction.records())
+    finally:
+        release_writer_lock()
+    return len(transaction.tables)
+
+
+def rollback_transaction() -> None:
+    """Отменяет транзакцию, не обращаясь к диску."""
+    if _transaction.get() is None:
+        raise ValueError("No transaction in progress")
+    _transaction.set(None)
+    release_writer_lock()
+
+
+def _data_file_paths() -> List[str]:
+    """Возвращает пути всех файлов данных и метаданных."""
+    return [
+        os.path.join(DATA_DIR, name)
+        for name in os.listdir(DATA_DIR)
+        if name != WAL_FILE and not name.endswith(".tmp")
+        and os.path.isfile(os.path.join(DATA_DIR, name))
+    ]
+
+
+def checkpoint() -> None:
+    """Сбрасывает файлы данных на диск и очищает журнал.
+
+    Сбрасываются все файлы, а не только измененные этим процессом: журнал
+    общий для всех процессов, работающих с DATA_DIR.
+    """
+    if not os.path.exists(DATA_DIR):
+        return
+    with writer_lock() as lock:
+        # Файлы, сжатые до сброса, попадают на диск вместе с остальными
+        vacuum_pending_tables()
+        _wal.checkpoint(_data_file_paths())
+        write_lock_note(lock, "0")
+
+
+def recover_database() -> int:
+    """Проигрывает журнал после сбоя, возвращает число восстановленных наборов.
+
+    При запуске журнал проигрывается целиком: после сбоя системы отметка
+    о примененной части могла не попасть на диск. Записи журнала
+    идемпотентны, поэтому повторное применение безопасно.
+    """
+    if not os.path.exists(DATA_DIR):
+        return 0
+    with file_lock(WRITER_LOCK, exclusive=True):
+        recovered = _replay_wal(0)
+        if recovered or _wal.size():
+            checkpoint()
+    return recovered
+
+
+def close_database() -> None:
+    """Выполняет контрольную точку и закрывает журнал при выходе."""
+    checkpoint()
+    _wal.close()
+
+
+def count_table_rows(table_name: str) -> int:
+    """Возвращает количество живых строк таблицы."""
+    return len(get_table_state(table_name).rows)
 
 
 def table_exists(table_name: str) -> bool:
     """Проверяет существование таблицы."""
-    metadata = load_metadata()
-    return table_name in metadata["tables"]
+    return table_name in _current_metadata()["tables"]
 
 
 def get_table_file_path(table_name: str) -> str:
     """Возвращает путь к файлу таблицы."""
-    return os.path.join(DATA_DIR, f"{table_name}.json")
+    return get_storage(table_name).file_path(table_name)
 
 
 def get_next_id(table_data: List[Dict[str, Any]]) -> int:
@@ -61,3 +666,75 @@ def get_next_id(table_data: List[Dict[str, Any]]) -> int:
     if not table_data:
         return 1
     return max(item.get("ID", 0) for item in table_data) + 1
+
+
+def peek_next_id(table_name: str, table_meta: Dict[str, Any]) -> int:
+    """Возвращает ID, который получит следующая вставленная строка."""
+    if "next_id" in table_meta:
+        return table_meta["next_id"]
+    return get_next_id(load_table_data(table_name))
+
+
+def reserve_ids(table_name: str, table_meta: Dict[str, Any], count: int = 1) -> int:
+    """Продвигает счетчик ID таблицы на count значений, возвращает первый ID.
+
+    Счетчик хранится в метаданных таблицы, поэтому для выдачи ID не нужно
+    читать строки. Для таблиц без счетчика он один раз вычисляется по данным.
+    Изменение нужно сохранить вызовом save_metadata.
+    """
+    first_id = peek_next_id(table_name, table_meta)
+    table_meta["next_id"] = first_id + count
+    return first_id
+
+
+def iter_import_file(file_path: str, columns: List[str]) -> Iterator[List[Any]]:
+    """Потоково читает строки значений из CSV или JSONL файла.
+
+    Первая строка CSV пропускается, если совпадает с именами столбцов.
+    Строка JSONL может быть объектом с именами столбцов или массивом значений.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+
+    if extension == ".csv":
+        with open(file_path, 'r', newline='') as f:
+            reader = csv.reader(f)
+            for line_number, record in enumerate(reader, 1):
+                if line_number == 1 and record == columns:
+                    continue
+                if record:
+                    yield record
+
+    elif extension in (".jsonl", ".ndjson"):
+        with open(file_path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if isinstance(record, dict):
+                    missing = [col for col in columns if col not in record]
+                    if missing:
+                        raise ValueError(f"Missing columns in record: {', '.join(missing)}.")
+                    yield [record[col] for col in columns]
+                else:
+                    yield record
+
+    else:
+        raise ValueError(f"Unsupported file format '{extension}'. Use .csv or .jsonl.")
+
+
+def peek_row_count(table_name: str, table_meta: Dict[str, Any]) -> int:
+    """Возвращает количество строк таблицы из метаданных за O(1).
+
+    Для таблиц без счетчика строки считаются по данным.
+    """
+    if "row_count" in table_meta:
+        return table_meta["row_count"]
+    return count_table_rows(table_name)
+
+
+def adjust_row_count(table_name: str, table_meta: Dict[str, Any], delta: int) -> None:
+    """Изменяет счетчик строк в метаданных таблицы на delta.
+
+    Изменение нужно сохранить вызовом save_metadata.
+    """
+    table_meta["row_count"] = peek_row_count(table_name, table_meta) + delta
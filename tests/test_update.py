@@ -0,0 +1,30 @@
+import pytest
+
+from primitive_db import utils
+from primitive_db.engine import execute_command
+
+
+@pytest.fixture
+def table(tmp_path, monkeypatch):
+    """Таблица a с записями x (ID=1) и y (ID=2) в пустом рабочем каталоге."""
+    monkeypatch.chdir(tmp_path)
+    execute_command("CREATE TABLE a (name str)")
+    execute_command('INSERT INTO a VALUES ("x")')
+    execute_command('INSERT INTO a VALUES ("y")')
+    yield "a"
+    utils.close_database()
+
+
+def stored_rows(table_name):
+    return sorted((row["ID"], row["name"]) for row in utils.load_table_data(table_name))
+
+
+@pytest.mark.parametrize("new_id", [2, 10])
+def test_update_rejects_id(table, new_id):
+    result = execute_command(f'UPDATE a SET ID = {new_id} WHERE name = "x"')
+
+    assert result == "Error: Column 'ID' cannot be updated."
+    assert stored_rows(table) == [(1, "x"), (2, "y")]
+    table_meta = utils.load_metadata()["tables"][table]
+    assert table_meta["row_count"] == 2
+    assert table_meta["next_id"] == 3